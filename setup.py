@@ -21,4 +21,7 @@ setuptools.setup(
         "Operating System :: OS Independent",
     ],
     python_requires='>=3.6',
+    extras_require={
+        'aio': ['aiohttp'],
+    },
 )
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Benchmark of the download throughput of BoxFile.download().
+
+The stand-in vagrancy server of the unit tests serves a box file of the given
+size from memory. The box file is downloaded once using the former
+implementation that iterates over the response (128 byte chunks) and once using
+the current implementation.
+
+Usage:
+    PYTHONPATH=. tests/benchmarks/bench_download.py [SIZE_MB]
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import os
+import sys
+import tempfile
+import time
+
+from tests.unittests.vagrancy_server import VagrancyServer
+
+from vagrancy.box_file import BoxFile
+
+
+# -----------------------------------------------------------------------------
+# Benchmark
+# -----------------------------------------------------------------------------
+def legacy_download(box_file, target):
+    """Download the box file like the former BoxFile.download() did."""
+    # pylint: disable=W0212
+    response = box_file._session.get(box_file.get_url(), stream=True)
+    with open(target, 'wb') as payload:
+        for chunk in response:
+            payload.write(chunk)
+    return response.status_code == 200
+
+
+def measure(function, size):
+    """Call the function and return the throughput in MB/s."""
+    start = time.perf_counter()
+    function()
+    return size / (time.perf_counter() - start) / 1e6
+
+
+# -----------------------------------------------------------------------------
+# Main
+# -----------------------------------------------------------------------------
+def main():
+    """Run the benchmark."""
+    size = int(sys.argv[1] if len(sys.argv) > 1 else 256) * 1000 * 1000
+    payload = os.urandom(1024 * 1024) * (size // (1024 * 1024))
+    size = len(payload)
+
+    with VagrancyServer() as server, tempfile.TemporaryDirectory() as tmp_dir:
+        server.add_box_file("bench/box", "1.0.0", "libvirt", payload)
+        box_file = BoxFile(server.url, "bench/box", "1.0.0", "libvirt")
+        target = os.path.join(tmp_dir, 'box')
+        print("Download of %d MB:" % (size // 1000000))
+        print(" before (128 byte iteration): %8.1f MB/s" %
+              measure(lambda: legacy_download(box_file, target), size))
+        print(" after (1 MiB buffer):        %8.1f MB/s" %
+              measure(lambda: box_file.download(target), size))
+
+
+if __name__ == '__main__':
+    main()
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
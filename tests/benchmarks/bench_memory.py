@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Benchmark of the memory usage of Box objects of a large inventory.
+
+Box objects are created from the synthetic box data of a large inventory, as
+Vagrancy.get_boxes() does. The peak memory allocated while creating the boxes
+is measured with tracemalloc for three use cases: printing only the box names,
+printing the latest and next versions of each provider and getting all box
+files, e.g., to prune them. Each use case is measured with the current Box
+class and with a copy of the former Box class, that created all BoxFile objects
+and maps when the box data was set.
+
+Usage:
+    PYTHONPATH=. tests/benchmarks/bench_memory.py [NUM_BOXES] [NUM_VERSIONS] [NUM_PROVIDERS]
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import fnmatch
+import sys
+import tracemalloc
+
+from vagrancy.box import Box
+from vagrancy.session import create_session
+
+
+# -----------------------------------------------------------------------------
+# Former Implementation
+# -----------------------------------------------------------------------------
+# pylint: disable=R0903
+class LegacyBoxFile:
+    """The attributes of the former BoxFile class."""
+
+    def __init__(self, server_url, box_name, version, provider):
+        """Create a new LegacyBoxFile object."""
+        self._server_url = server_url
+        self.box_name = box_name
+        self.version = version
+        self.provider = provider
+
+
+# pylint: disable=R0903
+class LegacyBox:
+    """The maps of the former Box class created when the box data is set."""
+
+    def __init__(self, server_url, box_name, box_data, provider_pattern = "*"):
+        """Create a new LegacyBox object like the former Box.retrieve_box_data() did."""
+        self._server_url = server_url
+        self.box_name = box_name
+        self.version_provider_map = {}
+        self.provider_version_map = {}
+
+        for version_entry in box_data['versions']:
+            version = version_entry['version']
+            for provider_entry in version_entry['providers']:
+                provider = provider_entry['name']
+                if fnmatch.fnmatch(provider, provider_pattern):
+                    box_file = LegacyBoxFile(server_url, box_name, version, provider)
+                    self.version_provider_map.setdefault(version, {}).setdefault(provider,
+                                                                                 box_file)
+                    self.provider_version_map.setdefault(provider, {}).setdefault(version,
+                                                                                  box_file)
+
+        self.provider_latest_versions = {}
+        self.provider_next_versions = {}
+        for provider in self.provider_version_map:
+            all_versions = list(self.provider_version_map[provider].keys())
+            all_versions.sort(reverse = True, key=lambda s: list(map(int, s.split('.'))))
+            split_version = all_versions[0].split('.')
+            split_version[-1] = str(int(split_version[-1]) + 1)
+            self.provider_next_versions[provider] = '.'.join(split_version)
+            self.provider_latest_versions[provider] = all_versions[0]
+
+    def is_empty(self):
+        """Check if the box has no box files."""
+        return not self.version_provider_map
+
+    def get_filtered_box_files(self):
+        """Get all box files."""
+        return [box_file for versions in self.provider_version_map.values()
+                for box_file in versions.values()]
+
+
+def create_legacy_box(box_name, session, box_data):
+    """Create a LegacyBox object, the session was not shared by the former Box."""
+    del session
+    return LegacyBox("http://127.0.0.1:8099", box_name, box_data)
+
+
+def create_box(box_name, session, box_data):
+    """Create a Box object sharing the session."""
+    return Box("http://127.0.0.1:8099", box_name, session = session, box_data = box_data)
+
+
+# -----------------------------------------------------------------------------
+# Benchmark
+# -----------------------------------------------------------------------------
+def create_box_data(num_versions, num_providers):
+    """Create the box data of a box with the given number of box files."""
+    return {'versions': [{'version': "1.%d.%d" % (i // 100, i % 100),
+                          'providers': [{'name': "provider%d" % j}
+                                        for j in range(num_providers)]}
+                         for i in range(num_versions)]}
+
+
+def measure(function, *args):
+    """Call the function with the arguments and return the peak of the allocated memory in MiB."""
+    tracemalloc.start()
+    result = function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak / (1024 * 1024)
+
+
+def names_only(create, session, inventory):
+    """Create the boxes and get the names of the non-empty ones."""
+    boxes = [create(box_name, session, box_data) for box_name, box_data in inventory.items()]
+    return boxes, [box.box_name for box in boxes if not box.is_empty()]
+
+
+def latest_versions(create, session, inventory):
+    """Create the boxes and get the latest and next versions of each provider."""
+    boxes = [create(box_name, session, box_data) for box_name, box_data in inventory.items()]
+    return boxes, [(box.provider_latest_versions[provider], box.provider_next_versions[provider])
+                   for box in boxes for provider in box.provider_version_map]
+
+
+def all_box_files(create, session, inventory):
+    """Create the boxes and get all of their box files."""
+    boxes = [create(box_name, session, box_data) for box_name, box_data in inventory.items()]
+    return boxes, [box_file for box in boxes for box_file in box.get_filtered_box_files()]
+
+
+# -----------------------------------------------------------------------------
+# Main
+# -----------------------------------------------------------------------------
+def main():
+    """Run the benchmark."""
+    num_boxes = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    num_versions = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    num_providers = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+
+    session = create_session()
+    inventory = {"bench/box%d" % i: create_box_data(num_versions, num_providers)
+                 for i in range(num_boxes)}
+
+    print("Peak memory of %d boxes with %d versions and %d providers (%d box files):" %
+          (num_boxes, num_versions, num_providers, num_boxes * num_versions * num_providers))
+    print("                               before      after")
+    for name, use_case in ((" names only:              ", names_only),
+                           (" latest and next versions:", latest_versions),
+                           (" all box files:           ", all_box_files)):
+        print("%s %7.1f MiB %7.1f MiB" %
+              (name, measure(use_case, create_legacy_box, session, inventory),
+               measure(use_case, create_box, session, inventory)))
+
+
+if __name__ == '__main__':
+    main()
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Benchmark of the version ordering of a Box.
+
+A box with the given number of versions of a single provider is created from
+box data. Then the latest and the sorted versions of the provider are accessed
+as the print and prune commands do, first after setting the box data and again
+on the same box data. The former implementation sorted the versions using
+``map(int, split('.'))`` on every call of ``Box.set_box_data()``.
+
+Usage:
+    PYTHONPATH=. tests/benchmarks/bench_version.py [NUM_VERSIONS]
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import sys
+import time
+
+from vagrancy.box import Box
+
+
+# -----------------------------------------------------------------------------
+# Benchmark
+# -----------------------------------------------------------------------------
+def legacy_sort(versions):
+    """Sort the versions like the former Box.set_box_data() did."""
+    all_versions = list(versions)
+    all_versions.sort(reverse = True, key=lambda s: list(map(int, s.split('.'))))
+    return all_versions[0]
+
+
+def measure(function):
+    """Call the function and return the duration in ms."""
+    start = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) * 1000
+
+
+# -----------------------------------------------------------------------------
+# Main
+# -----------------------------------------------------------------------------
+def main():
+    """Run the benchmark."""
+    num_versions = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    versions = ["%d.%d.%d" % (i // 10000, (i // 100) % 100, i % 100) for i in range(num_versions)]
+    box_data = {'versions': [{'version': version, 'providers': [{'name': 'libvirt'}]}
+                             for version in versions]}
+    box = Box("http://127.0.0.1:8099", "bench/box", box_data = {'versions': []})
+
+    def access():
+        """Access the latest and the sorted versions of the provider."""
+        return (box.provider_latest_versions['libvirt'],
+                box.provider_sorted_versions['libvirt'])
+
+    print("Box with %d versions:" % num_versions)
+    print(" legacy sort key:           %8.1f ms" % measure(lambda: legacy_sort(versions)))
+    print(" set_box_data():            %8.1f ms" % measure(lambda: box.set_box_data(box_data)))
+    print(" latest and sorted (first): %8.1f ms" % measure(access))
+    print(" latest and sorted (again): %8.1f ms" % measure(access))
+    print(" refresh and access:        %8.1f ms" %
+          measure(lambda: (box.set_box_data(box_data), access())))
+
+
+if __name__ == '__main__':
+    main()
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Performance benchmark suite of the client library and the CLI.
+
+All scenarios run against the in-process stand-in server
+tests/unittests/vagrancy_server.py, so no network is involved:
+
+- inventory: Vagrancy.get_boxes() and Vagrancy.get_box_names() for inventories
+  of 10, 1000 and 10000 boxes.
+- versions:  Vagrancy.get_box() including the version ordering for boxes with
+  10 to 10000 versions.
+- transfer:  BoxFile.download() with one and four segments and BoxFile.upload()
+  in MB/s for box files of 100, 1000 and 2000 MB.
+- cli:       The wall time of ``vagrancyCtrl print``, ``print --csv``,
+  ``delete`` and ``upload -1`` including the interpreter startup.
+
+The results are printed and optionally saved as JSON. A previous result file
+can be given to print the relative change of each result.
+
+Usage:
+    PYTHONPATH=. tests/benchmarks/run_benchmarks.py [--quick] [--output FILE] [--compare FILE]
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import argparse
+import datetime
+import functools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from tests.unittests.vagrancy_server import VagrancyServer
+
+from vagrancy.client import Vagrancy
+
+
+# -----------------------------------------------------------------------------
+# Module Variables
+# -----------------------------------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCENARIOS = {
+    'full':  {'inventory_sizes': (10, 1000, 10000),
+              'version_counts':  (10, 100, 1000, 10000),
+              'transfer_sizes':  (100, 1000, 2000),
+              'cli_boxes':       1000,
+              'repeat':          3},
+    'quick': {'inventory_sizes': (10, 1000),
+              'version_counts':  (10, 1000),
+              'transfer_sizes':  (100,),
+              'cli_boxes':       100,
+              'repeat':          1},
+}
+
+
+# -----------------------------------------------------------------------------
+# Benchmark
+# -----------------------------------------------------------------------------
+class Results:
+    """Collection of the benchmark results."""
+
+    def __init__(self):
+        """Create an empty collection."""
+        self.entries = []
+
+    def add(self, name, params, value, unit):
+        """Add and print a result.
+
+        Args:
+            name (str):    The name of the benchmark.
+            params (dict): The parameters of the benchmark.
+            value (float): The measured value.
+            unit (str):    The unit of the value, ``s`` or ``MB/s``.
+        """
+        self.entries.append({'name': name, 'params': params, 'value': value, 'unit': unit})
+        print(" %-40s %10.3f %s" % (get_label(name, params), value, unit))
+        sys.stdout.flush()
+
+
+def get_label(name, params):
+    """Get the label of a result."""
+    return "%s(%s)" % (name, ", ".join("%s=%s" % item for item in sorted(params.items())))
+
+
+def measure(function, repeat = 1, setup = None):
+    """Call the function and return the best wall time in seconds."""
+    durations = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def remove_file(path):
+    """Remove the file if it exists."""
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def bench_inventory(results, scenario):
+    """Measure the retrieval of inventories of different sizes."""
+    print("Inventory:")
+    for num_boxes in scenario['inventory_sizes']:
+        with VagrancyServer() as server:
+            server.add_synthetic_inventory(num_boxes, num_versions = 3,
+                                           providers = ('libvirt', 'virtualbox'))
+            with Vagrancy(server.url) as vagrancy:
+                results.add('get_boxes', {'boxes': num_boxes},
+                            measure(vagrancy.get_boxes, scenario['repeat']), 's')
+                results.add('get_box_names', {'boxes': num_boxes},
+                            measure(vagrancy.get_box_names, scenario['repeat']), 's')
+
+
+def bench_versions(results, scenario):
+    """Measure the retrieval and ordering of boxes with many versions."""
+    print("Versions:")
+    for num_versions in scenario['version_counts']:
+        with VagrancyServer() as server:
+            server.add_synthetic_inventory(1, num_versions = num_versions,
+                                           providers = ('libvirt', 'virtualbox'))
+            with Vagrancy(server.url) as vagrancy:
+                def retrieve():
+                    box = vagrancy.get_box("synthetic/box0")
+                    _ = box.provider_sorted_versions['virtualbox']
+                    _ = box.provider_next_versions['virtualbox']
+
+                results.add('get_box', {'versions': num_versions},
+                            measure(retrieve, scenario['repeat']), 's')
+
+
+def bench_transfer(results, scenario):
+    """Measure the download and upload throughput."""
+    print("Transfer:")
+    for size_mb in scenario['transfer_sizes']:
+        size = size_mb * 1000 * 1000
+        with VagrancyServer() as server, Vagrancy(server.url) as vagrancy, \
+                tempfile.TemporaryDirectory() as tmp_dir:
+            server.add_box_file("bench/box", "1.0.0", "libvirt", bytearray(size))
+            target = os.path.join(tmp_dir, "box")
+            box_file = vagrancy.get_box_file("bench/box", "1.0.0", "libvirt")
+
+            for segments in (1, 4):
+                duration = measure(functools.partial(box_file.download, target,
+                                                     segments = segments),
+                                   setup = functools.partial(remove_file, target))
+                results.add('download', {'size_mb': size_mb, 'segments': segments},
+                            size / duration / 1e6, 'MB/s')
+
+            # Only keep one copy of the box file in the memory of the server
+            server.delete_box_file("bench/box", "1.0.0", "libvirt")
+            upload = vagrancy.get_box_file("bench/box", "1.0.1", "libvirt")
+            duration = measure(functools.partial(upload.upload, target))
+            results.add('upload', {'size_mb': size_mb}, size / duration / 1e6, 'MB/s')
+
+
+def bench_cli(results, scenario):
+    """Measure the wall time of vagrancyCtrl commands."""
+    print("CLI:")
+    num_boxes = scenario['cli_boxes']
+    with VagrancyServer() as server, tempfile.TemporaryDirectory() as tmp_dir:
+        server.add_synthetic_inventory(num_boxes, num_versions = 3,
+                                       providers = ('libvirt', 'virtualbox'))
+        box_path = os.path.join(tmp_dir, "upload.box")
+        with open(box_path, 'wb') as handle:
+            handle.write(bytearray(1000 * 1000))
+
+        def run(*args):
+            subprocess.run([sys.executable, os.path.join(BASE_DIR, 'vagrancyCtrl'),
+                            '-u', server.url] + list(args),
+                           stdout = subprocess.DEVNULL, check = True,
+                           env = dict(os.environ, PYTHONPATH = BASE_DIR))
+
+        commands = [
+            ('print', ('print',), None),
+            ('print --csv', ('print', '--csv'), None),
+            ('delete', ('delete', '-f', 'synthetic/box0', '1.0.0'),
+             lambda: [server.add_box_file("synthetic/box0", "1.0.0", provider, b"")
+                      for provider in ('libvirt', 'virtualbox')]),
+            ('upload -1', ('upload', '--', box_path, 'synthetic/box1', 'libvirt', '-1'),
+             None),
+        ]
+        for label, args, setup in commands:
+            results.add('cli', {'command': label, 'boxes': num_boxes},
+                        measure(lambda args = args: run(*args), scenario['repeat'], setup), 's')
+
+
+def get_metadata(quick):
+    """Get the description of the environment of the benchmark run."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd = BASE_DIR,
+                                stdout = subprocess.PIPE, stderr = subprocess.DEVNULL,
+                                universal_newlines = True, check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {'date':     datetime.datetime.now().isoformat(timespec = 'seconds'),
+            'commit':   commit,
+            'python':   platform.python_version(),
+            'platform': platform.platform(),
+            'cpus':     os.cpu_count(),
+            'scenario': 'quick' if quick else 'full'}
+
+
+def load_results(result_file):
+    """Load the results of a previous run indexed by their labels."""
+    with open(result_file, 'r') as handle:
+        return {get_label(entry['name'], entry['params']): entry
+                for entry in json.load(handle)['results']}
+
+
+def compare(entries, previous):
+    """Print the relative change of each result compared to a previous run."""
+    for entry in entries:
+        label = get_label(entry['name'], entry['params'])
+        if label in previous and previous[label]['value']:
+            change = entry['value'] / previous[label]['value'] - 1.0
+            # A higher throughput, but a lower time is better
+            if abs(change) < 0.05:
+                verdict = "unchanged"
+            elif (change > 0) == (entry['unit'] == 'MB/s'):
+                verdict = "better"
+            else:
+                verdict = "worse"
+            print(" %-40s %+8.1f %% (%s)" % (label, change * 100, verdict))
+
+
+# -----------------------------------------------------------------------------
+# Main
+# -----------------------------------------------------------------------------
+def main():
+    """Run the benchmark suite."""
+    parser = argparse.ArgumentParser(description = "Run the benchmark suite of vagrancyCtrl.")
+    parser.add_argument("--quick", action = "store_true",
+                        help = "Run a reduced set of scenarios.")
+    parser.add_argument("--output", action = "store",
+                        help = "Save the results as JSON to the given file.")
+    parser.add_argument("--compare", action = "store",
+                        help = "Compare the results with a previously saved JSON file.")
+    args = parser.parse_args()
+
+    previous = load_results(args.compare) if args.compare else None
+    scenario = SCENARIOS['quick' if args.quick else 'full']
+    results = Results()
+    metadata = get_metadata(args.quick)
+    bench_inventory(results, scenario)
+    bench_versions(results, scenario)
+    bench_transfer(results, scenario)
+    bench_cli(results, scenario)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok = True)
+        with open(args.output, 'w') as handle:
+            json.dump({'metadata': metadata, 'results': results.entries}, handle, indent = 1)
+        print("Results saved to %s." % args.output)
+
+    if previous is not None:
+        print("Comparison with %s:" % args.compare)
+        compare(results.entries, previous)
+
+
+if __name__ == '__main__':
+    main()
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -22,6 +22,9 @@ capture_output_success main -h
 capture_output_success delete delete -h
 capture_output_success download download -h
 capture_output_success print print -h
+capture_output_success prune prune -h
+capture_output_success replicate replicate -h
+capture_output_success sync sync -h
 capture_output_success upload upload -h
 
 
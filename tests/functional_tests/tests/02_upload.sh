@@ -50,8 +50,8 @@ capture_output_success upload_alternative upload $BOXFILE base/alternative virtu
 capture_output_failure upload_multi_boxes upload $BOXFILE base/* virtualbox
 
 # Upload with non-semantic versions fails
-echo "1.2.3-alpha" > $BOXFILE
-capture_output_success upload_non_semantic upload $BOXFILE base/non-semantic virtualbox 1.2.3-alpha
+echo "bionic" > $BOXFILE
+capture_output_success upload_non_semantic upload $BOXFILE base/non-semantic virtualbox bionic
 capture_output_failure upload_non_semantic_increment upload $BOXFILE base/non-semantic virtualbox
 
 # Upload same version twice
@@ -25,6 +25,9 @@ capture_output_success print_verbose_all              print --verbose
 capture_output_success print_verbose_box_pattern      print --verbose base/dtest*
 capture_output_success print_verbose_provider_pattern print --verbose --provider v*box
 
+capture_output_success print_json_box_pattern         print --json base/dtest*
+capture_output_success print_ndjson_box_pattern       print --ndjson base/dtest*
+
 capture_output_success print_all                      print
 capture_output_success print_box_pattern              print base/dtest*
 capture_output_success print_provider_pattern         print --provider v*box
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Unit tests of the vagrancy.aio package."""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import asyncio
+import os
+from unittest import IsolatedAsyncioTestCase, mock
+
+from aiohttp import ClientResponseError, web
+from aiohttp.test_utils import TestServer
+
+from testfixtures import TempDirectory
+
+from vagrancy.aio.client import AsyncVagrancy
+
+
+# -----------------------------------------------------------------------------
+# Test Infos
+# -----------------------------------------------------------------------------
+def create_app(store, errors):
+    """Create a minimal vagrancy application serving the given box store.
+
+    Args:
+        store (dict):  A map of (box_name, version, provider) to the box contents.
+        errors (dict): A map of request paths to the status codes of injected errors.
+
+    Returns:
+        aiohttp.web.Application: The application.
+    """
+    @web.middleware
+    async def inject_errors(request, handler):
+        if request.path in errors:
+            return web.Response(status = errors[request.path])
+        return await handler(request)
+
+    def get_box_names():
+        return sorted({key[0] for key in store})
+
+    async def inventory(_):
+        return web.json_response({"boxes": get_box_names()})
+
+    async def box_data(request):
+        box_name = "%s/%s" % (request.match_info['user'], request.match_info['name'])
+        versions = {}
+        for (name, version, provider) in sorted(store):
+            if name == box_name:
+                versions.setdefault(version, []).append({"name": provider})
+        return web.json_response({"name": box_name,
+                                  "versions": [{"version": version, "providers": providers}
+                                               for version, providers in versions.items()]})
+
+    def get_key(request):
+        return ("%s/%s" % (request.match_info['user'], request.match_info['name']),
+                request.match_info['version'], request.match_info['provider'])
+
+    async def get_box_file(request):
+        if get_key(request) not in store:
+            raise web.HTTPNotFound()
+        return web.Response(body = store[get_key(request)])
+
+    async def put_box_file(request):
+        store[get_key(request)] = await request.read()
+        return web.Response(status = 201)
+
+    async def delete_box_file(request):
+        if store.pop(get_key(request), None) is None:
+            raise web.HTTPNotFound()
+        return web.Response()
+
+    app = web.Application(middlewares = [inject_errors])
+    app.router.add_get('/inventory', inventory)
+    app.router.add_get('/{user}/{name}', box_data)
+    app.router.add_get('/{user}/{name}/{version}/{provider}', get_box_file)
+    app.router.add_put('/{user}/{name}/{version}/{provider}', put_box_file)
+    app.router.add_delete('/{user}/{name}/{version}/{provider}', delete_box_file)
+    return app
+
+
+# -----------------------------------------------------------------------------
+# Test Class
+# -----------------------------------------------------------------------------
+class VagrancyAioTest(IsolatedAsyncioTestCase):
+    """Test the :class:`vagrancy.aio.client.AsyncVagrancy` class."""
+
+    # pylint: disable=W0201
+    async def asyncSetUp(self):
+        """Start the test server."""
+        self.store = {("user/test", "1.2.3", "virtualbox"): b"box 1.2.3 virtualbox",
+                      ("user/test", "1.2.3", "libvirt"):    b"box 1.2.3 libvirt",
+                      ("user/test", "1.2.4", "virtualbox"): b"box 1.2.4 virtualbox",
+                      ("user/other", "bionic", "vmware"):   b"box bionic vmware"}
+        self.errors = {}
+        self.server = TestServer(create_app(self.store, self.errors))
+        await self.server.start_server()
+        self.base_url = str(self.server.make_url('')).rstrip('/')
+
+    async def asyncTearDown(self):
+        """Stop the test server."""
+        await self.server.close()
+
+    async def test_get_boxes(self):
+        """AsyncVagrancy.get_boxes(): Box retrieval and version logic."""
+        async with AsyncVagrancy(self.base_url, concurrency = 2) as client:
+            self.assertEqual(await client.inventory(), ["user/other", "user/test"])
+
+            boxes = await client.get_boxes()
+            self.assertEqual([box.box_name for box in boxes], ["user/other", "user/test"])
+            self.assertEqual(boxes[1].provider_latest_versions["virtualbox"], "1.2.4")
+            self.assertEqual(boxes[1].provider_next_versions["virtualbox"], "1.2.5")
+            self.assertEqual(boxes[0].provider_next_versions["vmware"], None)
+
+            boxes = await client.get_boxes(provider_pattern = "libvirt")
+            self.assertEqual([box.box_name for box in boxes], ["user/test"])
+
+    async def test_transfers(self):
+        """AsyncBoxFile: Upload, download and delete."""
+        async with AsyncVagrancy(self.base_url) as client:
+            box = await client.get_box("user/test")
+            box_files = box.get_filtered_box_files("-1", "virtualbox")
+            self.assertEqual([box_file.version for box_file in box_files], ["1.2.3"])
+
+            with TempDirectory() as tmp_dir:
+                target = os.path.join(tmp_dir.path, 'box')
+                self.assertTrue(await box_files[0].download(target))
+                with open(target, 'rb') as handle:
+                    self.assertEqual(handle.read(), b"box 1.2.3 virtualbox")
+
+                new_box_file = client.get_box_file("user/test", "1.2.5", "virtualbox")
+                self.assertTrue(await new_box_file.upload(target))
+                self.assertEqual(self.store[("user/test", "1.2.5", "virtualbox")],
+                                 b"box 1.2.3 virtualbox")
+
+            self.assertTrue(await box_files[0].delete())
+            self.assertFalse(await box_files[0].delete())
+            self.assertNotIn(("user/test", "1.2.3", "virtualbox"), self.store)
+
+    async def test_failed_download(self):
+        """AsyncBoxFile.download(): A failed download leaves no target or part file."""
+        async with AsyncVagrancy(self.base_url) as client:
+            box_file = client.get_box_file("user/test", "1.2.3", "virtualbox")
+
+            with TempDirectory() as tmp_dir:
+                target = os.path.join(tmp_dir.path, 'box')
+                for exception in (OSError("No space left on device"),
+                                  asyncio.CancelledError()):
+                    with mock.patch('vagrancy.aio.box_file.write_all',
+                                    side_effect = exception):
+                        with self.assertRaises(type(exception)):
+                            await box_file.download(target)
+                    self.assertEqual(os.listdir(tmp_dir.path), [])
+
+                self.assertTrue(await box_file.download(target))
+                self.assertEqual(os.listdir(tmp_dir.path), ['box'])
+
+    async def test_server_errors(self):
+        """AsyncVagrancy: Missing boxes are empty, server errors are raised."""
+        async with AsyncVagrancy(self.base_url) as client:
+            self.errors["/user/test"] = 404
+            self.assertTrue((await client.get_box("user/test")).is_empty())
+
+            for status in (500, 503):
+                self.errors["/user/test"] = status
+                with self.assertRaises(ClientResponseError):
+                    await client.get_box("user/test")
+
+                self.errors["/inventory"] = status
+                with self.assertRaises(ClientResponseError):
+                    await client.inventory()
+                with self.assertRaises(ClientResponseError):
+                    await client.get_boxes()
+
+    async def test_no_blocking_methods(self):
+        """AsyncBox, AsyncBoxFile: The blocking methods of the sync classes are not exposed."""
+        async with AsyncVagrancy(self.base_url) as client:
+            box = await client.get_box("user/test")
+            self.assertEqual(box.to_dict()['name'], "user/test")
+            box_file = box.version_provider_map["1.2.3"]["libvirt"]
+            self.assertEqual(box_file, client.get_box_file("user/test", "1.2.3", "libvirt"))
+            for name in ('stat', 'upload_data', 'replicate', '_download_file',
+                         '_download_cached'):
+                self.assertFalse(hasattr(box_file, name))
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -14,11 +14,14 @@
 # -----------------------------------------------------------------------------
 import json
 import os
-from unittest import TestCase
+from unittest import TestCase, mock
+
+import requests
 
 import requests_mock
 
 import vagrancy.box
+import vagrancy.version
 
 
 # -----------------------------------------------------------------------------
@@ -146,6 +149,22 @@ class VagrancyBoxTest(TestCase):
         self.assertTrue(len(box.provider_latest_versions) == 0)
         self.assertTrue(len(box.provider_next_versions) == 0)
 
+    @requests_mock.mock()
+    def test_constructor_missing_box(self, mock_get):
+        """Box.__init__(): A box that does not exist is empty."""
+        mock_get.get("http://mock.vagrancy.net/user/test", status_code = 404)
+
+        box = vagrancy.box.Box("http://mock.vagrancy.net", "user/test")
+        self.assertTrue(box.is_empty())
+
+    @requests_mock.mock()
+    def test_constructor_server_error(self, mock_get):
+        """Box.__init__(): Server errors are raised instead of an empty box."""
+        for status_code in (500, 503):
+            mock_get.get("http://mock.vagrancy.net/user/test", status_code = status_code)
+            with self.assertRaises(requests.exceptions.HTTPError):
+                vagrancy.box.Box("http://mock.vagrancy.net", "user/test")
+
     def test_invalid_constructor(self):
         """Box.__init__(): Invalid box name."""
         with self.assertRaises(ValueError):
@@ -213,6 +232,72 @@ class VagrancyBoxTest(TestCase):
         self.assertNotIn(box.provider_version_map["virtualbox"]["1.2.4"], box_list)
         self.assertNotIn(box.provider_version_map["libvirt"]["1.2.3"], box_list)
 
+    def test_lazy_box_files(self):
+        """Box.set_box_data(): Box files are created on demand."""
+        box = vagrancy.box.Box("http://mock.vagrancy.net", "user/test",
+                               box_data = TEST_BOX_MAP)
+        # pylint: disable=W0212
+        self.assertEqual(box._box_files, {})
+        self.assertEqual(sorted(box.provider_version_map), ["libvirt", "virtualbox", "vmware"])
+        self.assertEqual("1.2.4", box.provider_latest_versions["virtualbox"])
+        self.assertEqual(box._box_files, {})
+
+        box_list = box.get_filtered_box_files(version_pattern = "+1", provider_pattern = "v*box")
+        self.assertEqual(len(box._box_files), 1)
+        self.assertIs(box_list[0], box.provider_version_map["virtualbox"]["1.2.4"])
+        self.assertIs(box_list[0], box.version_provider_map["1.2.4"]["virtualbox"])
+
+        box.set_box_data({'versions': []})
+        self.assertTrue(box.is_empty())
+        self.assertNotIn("virtualbox", box.provider_latest_versions)
+        with self.assertRaises(KeyError):
+            _ = box.provider_latest_versions["virtualbox"]
+
+        with self.assertRaises(AttributeError):
+            box.unknown_attribute = None  # pylint: disable=E0237
+
+    def test_sort_keys_computed_once(self):
+        """Box.set_box_data(): The sort key of each version is computed once per box data."""
+        box = vagrancy.box.Box("http://mock.vagrancy.net", "user/test",
+                               box_data = TEST_BOX_MAP)
+        with mock.patch('vagrancy.version.get_sort_key',
+                        side_effect = vagrancy.version.get_sort_key) as mock_key:
+            for _ in range(2):
+                self.assertEqual("1.2.4", box.provider_latest_versions["virtualbox"])
+                self.assertEqual(["1.2.4", "1.2.3"], box.provider_sorted_versions["virtualbox"])
+            self.assertEqual(mock_key.call_count, 2)
+
+            box.set_box_data(TEST_BOX_MAP)
+            self.assertEqual("1.2.4", box.provider_latest_versions["virtualbox"])
+            self.assertEqual(mock_key.call_count, 4)
+
+    def test_to_dict(self):
+        """Box.to_dict(): JSON record of the box."""
+        box = vagrancy.box.Box("http://mock.vagrancy.net", "user/test",
+                               box_data = TEST_BOX_MAP)
+        box_dict = json.loads(json.dumps(box.to_dict()))
+
+        self.assertEqual(box_dict["name"], "user/test")
+        self.assertEqual([provider["name"] for provider in box_dict["providers"]],
+                         ["libvirt", "virtualbox", "vmware"])
+
+        virtualbox = box_dict["providers"][1]
+        self.assertEqual(virtualbox["latest_version"], "1.2.4")
+        self.assertEqual(virtualbox["next_version"], "1.2.5")
+        self.assertEqual(virtualbox["download_url"],
+                         "http://mock.vagrancy.net/user/test/1.2.4/virtualbox")
+        self.assertEqual(virtualbox["upload_url"],
+                         "http://mock.vagrancy.net/user/test/1.2.5/virtualbox")
+        self.assertEqual(virtualbox["versions"],
+                         [{"version": "1.2.4",
+                           "url": "http://mock.vagrancy.net/user/test/1.2.4/virtualbox"},
+                          {"version": "1.2.3",
+                           "url": "http://mock.vagrancy.net/user/test/1.2.3/virtualbox"}])
+
+        vmware = box_dict["providers"][2]
+        self.assertIsNone(vmware["next_version"])
+        self.assertIsNone(vmware["upload_url"])
+
 
 # -----------------------------------------------------------------------------
 # EOF
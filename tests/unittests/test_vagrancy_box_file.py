@@ -52,6 +52,19 @@ class VagrancyBoxFileTest(TestCase):
         self.assertEqual(box.get_url(),
                          "http://mock.vagrancy.net/user/test/1.0.0/virtualbox")
 
+    def test_equality(self):
+        """BoxFile.__eq__(): Same server, box, version and provider."""
+        box = vagrancy.box_file.BoxFile("http://mock.vagrancy.net",
+                                        "user/test", "1.0.0", "virtualbox")
+        same_box = vagrancy.box_file.BoxFile("http://mock.vagrancy.net",
+                                             "user/test", "1.0.0", "virtualbox")
+        other_box = vagrancy.box_file.BoxFile("http://mock.vagrancy.net",
+                                              "user/test", "1.0.0", "libvirt")
+        self.assertEqual(box, same_box)
+        self.assertEqual(hash(box), hash(same_box))
+        self.assertNotEqual(box, other_box)
+        self.assertEqual(len({box, same_box, other_box}), 2)
+
     @requests_mock.mock()
     def test_delete(self, mock_delete):
         """BoxFile.delete(): Existing and non-existing boxes."""
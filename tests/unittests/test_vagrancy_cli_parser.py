@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Unit tests of the argument parser of the vagrancy.cli module."""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import io
+from unittest import TestCase, mock
+
+from vagrancy.cli import get_parser
+
+
+# -----------------------------------------------------------------------------
+# Test Class
+# -----------------------------------------------------------------------------
+class VagrancyCliParserTest(TestCase):
+    """Test the parser of the :mod:`vagrancy.cli` module."""
+
+    def _assert_rejected(self, arguments):
+        """Check that the parser exits with an error on the given arguments."""
+        with mock.patch('sys.stderr', new_callable = io.StringIO) as stderr:
+            with self.assertRaises(SystemExit) as context:
+                get_parser().parse_args(arguments)
+        self.assertEqual(context.exception.code, 2)
+        self.assertIn("is not a positive integer", stderr.getvalue())
+
+    def test_positive_int(self):
+        """get_parser(): Chunk sizes and segments must be at least 1."""
+        args = get_parser().parse_args(["download", "--chunk-size", "4096",
+                                        "--segments", "4", "out.box", "user/test", "1.0.0"])
+        self.assertEqual((args.chunk_size, args.segments), (4096, 4))
+
+        for value in ("0", "-1", "many"):
+            self._assert_rejected(["download", "--chunk-size", value,
+                                   "out.box", "user/test", "1.0.0"])
+            self._assert_rejected(["download", "--segments", value,
+                                   "out.box", "user/test", "1.0.0"])
+            self._assert_rejected(["sync", "--chunk-size", value, "/tmp/mirror"])
+            self._assert_rejected(["replicate", "--chunk-size", value,
+                                   "http://127.0.0.1:8100"])
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
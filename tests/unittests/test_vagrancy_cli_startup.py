@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Unit tests of the startup time of the vagrancy.cli module."""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+
+# -----------------------------------------------------------------------------
+# Test Infos
+# -----------------------------------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The maximum cumulative import time of vagrancy.cli in microseconds. Importing
+# requests alone takes longer than that.
+IMPORT_TIME_BUDGET = 50000
+
+# The modules that must only be imported if a command is executed
+HEAVY_MODULES = ('requests', 'urllib3', 'argcomplete', 'aiohttp')
+
+
+def get_import_times():
+    """Get the cumulative import times of all modules imported to build the parser.
+
+    Returns:
+        dict: The cumulative import time in microseconds of each module.
+    """
+    env = dict(os.environ, PYTHONPATH = BASE_DIR)
+    env.pop('_ARGCOMPLETE', None)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                             'import vagrancy.cli; vagrancy.cli.get_parser()'],
+                            env = env, stdout = subprocess.PIPE, stderr = subprocess.PIPE,
+                            universal_newlines = True, check = True)
+
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, name = line.split('|')
+            if cumulative.strip().isdigit():
+                import_times[name.strip()] = int(cumulative)
+    return import_times
+
+
+# -----------------------------------------------------------------------------
+# Test Class
+# -----------------------------------------------------------------------------
+class VagrancyCliStartupTest(TestCase):
+    """Test the startup of the :mod:`vagrancy.cli` module."""
+
+    def test_no_heavy_imports(self):
+        """vagrancy.cli: Building the parser does not import heavy modules."""
+        import_times = get_import_times()
+        self.assertIn('vagrancy.cli', import_times)
+        for name in import_times:
+            self.assertNotIn(name.split('.')[0], HEAVY_MODULES)
+
+    def test_import_time_budget(self):
+        """vagrancy.cli: The import time stays within the budget."""
+        # The best of a few runs is used to reduce the noise of a busy machine.
+        import_time = min(get_import_times()['vagrancy.cli'] for _ in range(3))
+        self.assertLess(import_time, IMPORT_TIME_BUDGET)
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Unit tests of the vagrancy.client.Vagrancy.delete_box_files method."""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+from unittest import TestCase
+
+import requests
+
+import requests_mock
+
+from vagrancy.client import Vagrancy
+
+
+# -----------------------------------------------------------------------------
+# Test Infos
+# -----------------------------------------------------------------------------
+BASE_URL = "http://mock.vagrancy.net"
+VERSIONS = ["1.0.%d" % i for i in range(10)]
+
+
+# -----------------------------------------------------------------------------
+# Test Class
+# -----------------------------------------------------------------------------
+class VagrancyClientDeleteBoxFilesTest(TestCase):
+    """Test the :meth:`vagrancy.client.Vagrancy.delete_box_files` method."""
+
+    def test_continue_after_failures(self):
+        """Vagrancy.delete_box_files(): Delete all box files despite failures."""
+        vagrancy = Vagrancy(BASE_URL, concurrency = 4)
+        box_files = [vagrancy.get_box_file("user/test", version, "libvirt")
+                     for version in VERSIONS]
+        reported = []
+
+        with requests_mock.Mocker() as mocker:
+            for box_file in box_files:
+                mocker.delete(box_file.get_url())
+            mocker.delete(box_files[2].get_url(), status_code = 500)
+            mocker.delete(box_files[5].get_url(), exc = requests.exceptions.ConnectionError)
+
+            results = vagrancy.delete_box_files(
+                box_files, lambda box_file, success: reported.append((box_file.version, success)))
+            deleted_urls = {request.url for request in mocker.request_history}
+
+        expected = [version not in ("1.0.2", "1.0.5") for version in VERSIONS]
+        self.assertEqual(results, expected)
+        self.assertEqual(sorted(reported), list(zip(VERSIONS, expected)))
+        self.assertEqual(deleted_urls, {box_file.get_url() for box_file in box_files})
+
+    def test_empty(self):
+        """Vagrancy.delete_box_files(): An empty list deletes nothing."""
+        self.assertEqual(Vagrancy(BASE_URL).delete_box_files([]), [])
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Unit tests of the vagrancy.client.Vagrancy.download_box_files method."""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import os
+import time
+from unittest import TestCase
+
+import requests
+
+import requests_mock
+
+from testfixtures import TempDirectory
+
+from vagrancy.client import Vagrancy
+from vagrancy.rate_limiter import RateLimiter
+
+
+# -----------------------------------------------------------------------------
+# Test Infos
+# -----------------------------------------------------------------------------
+BASE_URL = "http://mock.vagrancy.net"
+
+
+# -----------------------------------------------------------------------------
+# Test Class
+# -----------------------------------------------------------------------------
+class VagrancyClientDownloadBoxFilesTest(TestCase):
+    """Test the :meth:`vagrancy.client.Vagrancy.download_box_files` method."""
+
+    def setUp(self):
+        """Create the temporary directory."""
+        self.tmp_dir = TempDirectory()
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.tmp_dir.cleanup()
+
+    def test_download_tree(self):
+        """Vagrancy.download_box_files(): Download all box files despite failures."""
+        vagrancy = Vagrancy(BASE_URL, concurrency = 3)
+        box_files = [vagrancy.get_box_file("user/box%d" % i, "1.0.%d" % i, "libvirt")
+                     for i in range(5)]
+        reported = []
+
+        with requests_mock.Mocker() as mocker:
+            for index, box_file in enumerate(box_files):
+                mocker.get(box_file.get_url(), content = b"x" * (index + 1))
+            mocker.get(box_files[1].get_url(), status_code = 404)
+            mocker.get(box_files[3].get_url(), exc = requests.exceptions.ConnectionError)
+
+            results = vagrancy.download_box_files(
+                box_files, self.tmp_dir.path,
+                callback = lambda box_file, result: reported.append(box_file.version))
+
+        self.assertEqual([(success, size) for success, size, _ in results],
+                         [(True, 1), (False, 0), (True, 3), (False, 0), (True, 5)])
+        self.assertEqual(sorted(reported), [box_file.version for box_file in box_files])
+        self.assertEqual(os.path.getsize(os.path.join(self.tmp_dir.path, "user", "box4",
+                                                      "1.0.4", "libvirt.box")), 5)
+
+    def test_rate_limit(self):
+        """Vagrancy.download_box_files(): Limit the aggregate throughput."""
+        vagrancy = Vagrancy(BASE_URL, concurrency = 2)
+        box_files = [vagrancy.get_box_file("user/box", "1.0.%d" % i, "libvirt")
+                     for i in range(2)]
+
+        with requests_mock.Mocker() as mocker:
+            for box_file in box_files:
+                mocker.get(box_file.get_url(), content = b"x" * 50000)
+
+            start = time.monotonic()
+            results = vagrancy.download_box_files(box_files, self.tmp_dir.path,
+                                                  chunk_size = 5000,
+                                                  rate_limiter = RateLimiter(50000))
+            duration = time.monotonic() - start
+
+        # The first 50000 bytes are a burst, the remaining 50000 bytes take a second.
+        self.assertEqual([success for success, _, _ in results], [True, True])
+        self.assertGreater(duration, 0.9)
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Unit tests of the vagrancy.download_cache module."""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import fcntl
+import os
+import time
+from unittest import TestCase
+
+import requests_mock
+
+from testfixtures import TempDirectory
+
+from vagrancy.box_file import BoxFile
+from vagrancy.download_cache import DownloadCache
+
+
+# -----------------------------------------------------------------------------
+# Test Infos
+# -----------------------------------------------------------------------------
+BASE_URL = "http://mock.vagrancy.net"
+
+
+# pylint: disable=R0903
+class CachingServer:
+    """Response callback of a box file download supporting conditional requests."""
+
+    def __init__(self, body, etag):
+        """Create a new callback object."""
+        self.body = body
+        self.etag = etag
+        self.conditions = []
+        self.methods = []
+
+    def __call__(self, request, context):
+        """Return the box file or 304 if the client has the current one."""
+        self.conditions.append(request.headers.get('If-None-Match'))
+        self.methods.append(request.method)
+        context.headers['ETag'] = self.etag
+        if request.headers.get('If-None-Match') == self.etag:
+            context.status_code = 304
+            return b''
+        context.headers['Content-Length'] = str(len(self.body))
+        return self.body
+
+
+# -----------------------------------------------------------------------------
+# Test Class
+# -----------------------------------------------------------------------------
+class VagrancyDownloadCacheTest(TestCase):
+    """Test the :class:`vagrancy.download_cache.DownloadCache` class."""
+
+    def setUp(self):
+        """Create the temporary directory and the cache."""
+        self.tmp_dir = TempDirectory()
+        self.cache = DownloadCache(os.path.join(self.tmp_dir.path, 'cache'), max_size = 25)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.tmp_dir.cleanup()
+
+    def _download(self, server, version = "1.0.0"):
+        """Download the box file into the target file using the cache."""
+        box_file = BoxFile(BASE_URL, "user/test", version, "virtualbox",
+                           download_cache = self.cache)
+        target = os.path.join(self.tmp_dir.path, 'box')
+        with requests_mock.Mocker() as mocker:
+            mocker.head(box_file.get_url(), content = server)
+            mocker.get(box_file.get_url(), content = server)
+            self.assertTrue(box_file.download(target))
+
+        with open(target, 'rb') as handle:
+            self.assertEqual(handle.read(), server.body)
+        return box_file.get_url()
+
+    def test_miss_and_hit(self):
+        """BoxFile.download(): Cache miss followed by a validated hit."""
+        server = CachingServer(b"0123456789", '"v1"')
+        url = self._download(server)
+        self.assertEqual(server.conditions, [None])
+        self.assertEqual(server.methods, ['GET'])
+        self.assertEqual(self.cache.get_metadata(url)['etag'], '"v1"')
+        self.assertEqual(self.cache.get_metadata(url)['size'], 10)
+
+        self._download(server)
+        self.assertEqual(server.conditions, [None, '"v1"'])
+        self.assertEqual(server.methods, ['GET', 'HEAD'])
+
+    def test_changed_box_file(self):
+        """BoxFile.download(): A changed box file replaces the entry."""
+        server = CachingServer(b"0123456789", '"v1"')
+        url = self._download(server)
+
+        server.body, server.etag = b"abcdefghij", '"v2"'
+        self._download(server)
+        self.assertEqual(server.conditions[-2:], ['"v1"', None])
+        self.assertEqual(server.methods[-2:], ['HEAD', 'GET'])
+        self.assertEqual(self.cache.get_metadata(url)['etag'], '"v2"')
+        with open(self.cache.get_path(url), 'rb') as handle:
+            self.assertEqual(handle.read(), b"abcdefghij")
+
+    def test_changed_during_download(self):
+        """BoxFile.download(): The entry stores the validators of the downloaded contents."""
+        server = CachingServer(b"0123456789", '"v1"')
+        url = self._download(server)
+
+        def change(request, context):
+            """Validate against v2 and change the box file to v3 afterwards."""
+            server.body, server.etag = b"abcdefghij", '"v2"'
+            body = server(request, context)
+            server.body, server.etag = b"ABCDEFGHIJ", '"v3"'
+            return body
+
+        box_file = BoxFile(BASE_URL, "user/test", "1.0.0", "virtualbox",
+                           download_cache = self.cache)
+        target = os.path.join(self.tmp_dir.path, 'box')
+        with requests_mock.Mocker() as mocker:
+            mocker.head(url, content = change)
+            mocker.get(url, content = server)
+            self.assertTrue(box_file.download(target))
+
+        self.assertEqual(self.cache.get_metadata(url)['etag'], '"v3"')
+        with open(self.cache.get_path(url), 'rb') as handle:
+            self.assertEqual(handle.read(), b"ABCDEFGHIJ")
+
+    def test_lru_eviction(self):
+        """DownloadCache.evict(): Remove the least recently used entries."""
+        urls = []
+        for version in ("1.0.0", "1.0.1"):
+            urls.append(self._download(CachingServer(b"0123456789", '"%s"' % version),
+                                       version))
+            time.sleep(0.01)
+
+        # Use the first entry again, so that the second one is the oldest.
+        self.cache.touch(urls[0])
+        time.sleep(0.01)
+        urls.append(self._download(CachingServer(b"0123456789", '"1.0.2"'), "1.0.2"))
+
+        self.assertIsNotNone(self.cache.get_metadata(urls[0]))
+        self.assertIsNone(self.cache.get_metadata(urls[1]))
+        self.assertIsNotNone(self.cache.get_metadata(urls[2]))
+        self.assertEqual(len([name for name in os.listdir(self.cache.directory)
+                              if name.endswith('.lock')]), 3)
+
+    def test_locked_eviction(self):
+        """DownloadCache.evict(): Entries locked by other processes are kept."""
+        urls = []
+        for version in ("1.0.0", "1.0.1"):
+            urls.append(self._download(CachingServer(b"0123456789", '"%s"' % version),
+                                       version))
+            time.sleep(0.01)
+
+        self.cache.max_size = 0
+        lock_file = os.path.join(self.cache.directory, self.cache.get_key(urls[0]) + '.lock')
+        with open(lock_file, 'w', encoding = 'utf-8') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            self.cache.evict()
+            self.assertTrue(os.path.exists(lock_file))
+
+        self.assertIsNotNone(self.cache.get_metadata(urls[0]))
+        self.assertIsNone(self.cache.get_metadata(urls[1]))
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Unit tests of the vagrancy.client.Vagrancy.get_boxes and iter_boxes methods."""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import threading
+import time
+from unittest import TestCase, mock
+
+from vagrancy import client
+
+
+# -----------------------------------------------------------------------------
+# Test Infos
+# -----------------------------------------------------------------------------
+BOX_NAMES = ["user/box%02d" % i for i in range(20)]
+
+
+# pylint: disable=R0903
+class MockResponse:
+    """Mock response of a requests.Session.get() call."""
+
+    def __init__(self, json_data):
+        """Create a new mock response returning the given JSON data."""
+        self.json_data = json_data
+        self.status_code = 200
+
+    def json(self):
+        """Return the JSON data."""
+        return self.json_data
+
+
+class ConcurrencyRecorder:
+    """Mock of requests.Session.get() that records the concurrent requests.
+
+    Note that requests_mock serializes all requests, so it can't be used here.
+    """
+
+    def __init__(self):
+        """Create a new recorder."""
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.requested = 0
+        self.urls = []
+
+    def __call__(self, url, **_):
+        """Return the inventory or the box data of the requested box."""
+        self.urls.append(url)
+        if url == "http://mock.vagrancy.net/inventory":
+            return MockResponse({"boxes": BOX_NAMES})
+
+        with self.lock:
+            self.requested += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+
+        box_name = url[len("http://mock.vagrancy.net/"):]
+        # Let later boxes finish first to check the order of the result.
+        time.sleep(0.002 * (len(BOX_NAMES) - int(box_name[-2:])))
+
+        with self.lock:
+            self.active -= 1
+
+        versions = [] if box_name.endswith("3") else [{"version": "1.0.0",
+                                                       "providers": [{"name": "libvirt"}]}]
+        return MockResponse({"name": box_name, "versions": versions})
+
+
+# -----------------------------------------------------------------------------
+# Test Class
+# -----------------------------------------------------------------------------
+class VagrancyClientGetBoxesTest(TestCase):
+    """Test the :meth:`vagrancy.client.Vagrancy.get_boxes` method."""
+
+    def _get_boxes(self, concurrency):
+        """Get all boxes using the given concurrency and return the recorder."""
+        recorder = ConcurrencyRecorder()
+        with mock.patch('vagrancy.session.requests.Session.get', side_effect=recorder):
+            vagrancy_client = client.Vagrancy("http://mock.vagrancy.net",
+                                              concurrency = concurrency)
+            boxes = vagrancy_client.get_boxes("user/box*")
+
+        expected_names = [name for name in BOX_NAMES if not name.endswith("3")]
+        self.assertEqual([box.box_name for box in boxes], expected_names)
+        return recorder
+
+    def test_serial(self):
+        """Vagrancy.get_boxes(): Serial retrieval of the box data."""
+        recorder = self._get_boxes(1)
+        self.assertEqual(recorder.max_active, 1)
+
+    def test_concurrent(self):
+        """Vagrancy.get_boxes(): Bounded concurrent retrieval keeps the order."""
+        recorder = self._get_boxes(4)
+        self.assertGreater(recorder.max_active, 1)
+        self.assertLessEqual(recorder.max_active, 4)
+
+    def test_iter_boxes_prefetch(self):
+        """Vagrancy.iter_boxes(): Boxes are yielded before all data is retrieved."""
+        recorder = ConcurrencyRecorder()
+        with mock.patch('vagrancy.session.requests.Session.get', side_effect=recorder):
+            vagrancy_client = client.Vagrancy("http://mock.vagrancy.net", concurrency = 4)
+            boxes = vagrancy_client.iter_boxes("user/box*", prefetch = 6)
+
+            self.assertEqual(next(boxes).box_name, BOX_NAMES[0])
+            self.assertLessEqual(recorder.requested, 7)
+
+            remaining_names = [box.box_name for box in boxes]
+
+        expected_names = [name for name in BOX_NAMES[1:] if not name.endswith("3")]
+        self.assertEqual(remaining_names, expected_names)
+        self.assertEqual(recorder.requested, len(BOX_NAMES))
+
+    def test_iter_boxes_close(self):
+        """Vagrancy.iter_boxes(): Pending requests are cancelled if the iteration stops."""
+        recorder = ConcurrencyRecorder()
+        with mock.patch('vagrancy.session.requests.Session.get', side_effect=recorder):
+            vagrancy_client = client.Vagrancy("http://mock.vagrancy.net", concurrency = 2)
+            boxes = vagrancy_client.iter_boxes("user/box*", prefetch = 4)
+            self.assertEqual(next(boxes).box_name, BOX_NAMES[0])
+            boxes.close()
+
+        self.assertLessEqual(recorder.requested, 5)
+
+    def test_exact_box_name(self):
+        """Vagrancy.get_boxes(): An exact box name skips the inventory."""
+        recorder = ConcurrencyRecorder()
+        with mock.patch('vagrancy.session.requests.Session.get', side_effect=recorder):
+            vagrancy_client = client.Vagrancy("http://mock.vagrancy.net", concurrency = 4)
+            self.assertEqual([box.box_name for box in vagrancy_client.get_boxes("user/box01")],
+                             ["user/box01"])
+            self.assertEqual(vagrancy_client.get_boxes("user/box03"), [])
+            self.assertEqual(vagrancy_client.get_box_names("user/box01"), ["user/box01"])
+            self.assertEqual(vagrancy_client.get_box_names("user/box03"), [])
+
+        self.assertNotIn("http://mock.vagrancy.net/inventory", recorder.urls)
+
+    def test_get_box_names(self):
+        """Vagrancy.get_box_names(): Names of a pattern are taken from the inventory only."""
+        recorder = ConcurrencyRecorder()
+        with mock.patch('vagrancy.session.requests.Session.get', side_effect=recorder):
+            vagrancy_client = client.Vagrancy("http://mock.vagrancy.net", concurrency = 4)
+            self.assertEqual(vagrancy_client.get_box_names("user/box1*"), BOX_NAMES[10:])
+
+        self.assertEqual(recorder.urls, ["http://mock.vagrancy.net/inventory"])
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
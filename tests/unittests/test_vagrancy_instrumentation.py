@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Unit tests of the vagrancy.instrumentation and vagrancy.timing_report modules."""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import os
+from unittest import TestCase
+
+from testfixtures import TempDirectory
+
+from vagrancy import instrumentation
+from vagrancy.client import Vagrancy
+from vagrancy.timing_report import TimingReport, get_busy_time, get_percentile
+
+from vagrancy_server import VagrancyServer  # pylint: disable=C0411
+
+
+# -----------------------------------------------------------------------------
+# Test Class
+# -----------------------------------------------------------------------------
+class VagrancyInstrumentationTest(TestCase):
+    """Test the hook layer of :mod:`vagrancy.instrumentation`."""
+
+    def _add_report(self):
+        """Register a TimingReport that is removed at the end of the test."""
+        report = TimingReport()
+        instrumentation.add_hook(report)
+        self.addCleanup(instrumentation.remove_hook, report)
+        return report
+
+    def test_classify_url(self):
+        """classify_url(): Endpoint classes of the URLs."""
+        self.assertEqual(instrumentation.classify_url("http://host:8099/inventory"), "inventory")
+        self.assertEqual(instrumentation.classify_url("http://host/user/test"), "box")
+        self.assertEqual(instrumentation.classify_url("http://host/user/test/1.0.0/libvirt"),
+                         "box_file")
+        self.assertEqual(instrumentation.classify_url("http://host/"), "other")
+
+    def test_records(self):
+        """Session: Records of metadata, streamed and failed requests."""
+        payload = os.urandom(300000)
+        with VagrancyServer() as server, Vagrancy(server.url) as vagrancy, \
+                TempDirectory() as tmp_dir:
+            server.add_box_file("user/test", "1.0.0", "libvirt", payload)
+            report = self._add_report()
+
+            vagrancy.get_boxes()
+            box_file = vagrancy.get_box_file("user/test", "1.0.0", "libvirt")
+            self.assertTrue(box_file.download(os.path.join(tmp_dir.path, "test.box"),
+                                              chunk_size = 4096))
+            self.assertFalse(vagrancy.get_box_file("user/test", "9.0.0", "libvirt").delete())
+            self.assertTrue(box_file.upload_data(payload))
+
+        records = {(record.url_class, record.method): record for record in report.records}
+        self.assertEqual(sorted(records), [("box", "GET"), ("box_file", "DELETE"),
+                                           ("box_file", "GET"), ("box_file", "PUT"),
+                                           ("inventory", "GET")])
+        self.assertEqual(records[("box_file", "GET")].num_bytes, len(payload))
+        self.assertEqual(records[("box_file", "GET")].status, 200)
+        self.assertEqual(records[("box_file", "PUT")].num_bytes, len(payload))
+        self.assertEqual(records[("box_file", "DELETE")].status, 404)
+        for record in report.records:
+            self.assertLessEqual(record.ttfb, record.duration)
+
+    def test_no_hooks(self):
+        """Session: Removed hooks are not called anymore."""
+        with VagrancyServer() as server, Vagrancy(server.url) as vagrancy:
+            report = TimingReport()
+            instrumentation.add_hook(report)
+            instrumentation.remove_hook(report)
+            self.assertFalse(instrumentation.is_enabled())
+            vagrancy.inventory()
+        self.assertEqual(report.records, [])
+        self.assertEqual(report.format(), "Timings: No HTTP requests.\n")
+
+    def test_report(self):
+        """TimingReport: Percentiles, busy time and the formatted report."""
+        self.assertEqual(get_percentile([1, 2, 3, 4], 50), 2)
+        self.assertEqual(get_percentile([1, 2, 3, 4], 95), 4)
+        self.assertEqual(get_percentile([], 50), 0.0)
+
+        report = TimingReport()
+        for start, duration, status in ((0.0, 2.0, 200), (1.0, 2.0, 200), (5.0, 1.0, None)):
+            report(instrumentation.RequestRecord("GET", "http://host/user/test/1.0.0/libvirt",
+                                                 "box_file", status, 1000000, start, 0.5,
+                                                 duration))
+        report(instrumentation.EventRecord("retry", "http://host/user/test/1.0.0/libvirt",
+                                           "box_file"))
+        self.assertEqual(len(report.records), 3)
+        self.assertEqual(get_busy_time(report.records), 4.0)
+
+        lines = report.format().splitlines()
+        self.assertEqual(lines[0], "Timings: 3 HTTP requests in 6.000 s (times in ms)")
+        self.assertEqual(lines[2].split(), ["box_file", "GET", "3", "1", "500.0", "500.0",
+                                            "2000.0", "2000.0", "3.0", "0.8"])
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -16,17 +16,19 @@ from unittest import TestCase, mock
 
 import requests
 
+import requests_mock
+
 from vagrancy import client
 
 
 # -----------------------------------------------------------------------------
-# Mock of requests.get
+# Mock of requests.Session.get
 # -----------------------------------------------------------------------------
 def mocked_requests_get(*args, **_):
-    """Mock function for requests.get()."""
+    """Mock function for requests.Session.get()."""
     # pylint: disable=R0903
     class MockResponse:
-        """Mock response of a requests.get() call."""
+        """Mock response of a requests.Session.get() call."""
 
         def __init__(self, json_data, status_code):
             self.json_data = json_data
@@ -54,7 +56,7 @@ class VagrancyClientInventoryTest(TestCase):
         with self.assertRaises(requests.exceptions.ConnectionError):
             vagrancy_client.inventory()
 
-    @mock.patch('vagrancy.client.requests.get', side_effect=mocked_requests_get)
+    @mock.patch('vagrancy.session.requests.Session.get', side_effect=mocked_requests_get)
     def test_inventory_old_vagrancy(self, mock_get):
         """Vagrancy.inventory(): Test with an old vagrancy server."""
         vagrancy_client = client.Vagrancy("http://mock.oldvagrancy.net")
@@ -62,7 +64,7 @@ class VagrancyClientInventoryTest(TestCase):
             vagrancy_client.inventory()
         self.assertEqual(len(mock_get.call_args_list), 1)
 
-    @mock.patch('vagrancy.client.requests.get', side_effect=mocked_requests_get)
+    @mock.patch('vagrancy.session.requests.Session.get', side_effect=mocked_requests_get)
     def test_inventory_empty(self, mock_get):
         """Vagrancy.inventory(): Test with an empty response."""
         vagrancy_client = client.Vagrancy("http://mock.vagrancy.net")
@@ -70,6 +72,17 @@ class VagrancyClientInventoryTest(TestCase):
         self.assertEqual(len(boxes), 0)
         self.assertEqual(len(mock_get.call_args_list), 1)
 
+    @requests_mock.mock()
+    def test_inventory_server_error(self, mock_get):
+        """Vagrancy.inventory(): Server errors are raised instead of an empty inventory."""
+        vagrancy_client = client.Vagrancy("http://mock.vagrancy.net")
+        for status_code in (500, 503):
+            mock_get.get("http://mock.vagrancy.net/inventory", status_code = status_code)
+            with self.assertRaises(requests.exceptions.HTTPError):
+                vagrancy_client.inventory()
+            with self.assertRaises(requests.exceptions.HTTPError):
+                vagrancy_client.get_boxes()
+
 
 # -----------------------------------------------------------------------------
 # EOF
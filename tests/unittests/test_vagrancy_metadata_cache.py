@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Unit tests of the vagrancy.metadata_cache module."""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import json
+import os
+from unittest import TestCase
+
+import requests
+
+import requests_mock
+
+from testfixtures import TempDirectory
+
+from vagrancy.client import Vagrancy
+from vagrancy.metadata_cache import MetadataCache
+
+
+# -----------------------------------------------------------------------------
+# Test Infos
+# -----------------------------------------------------------------------------
+BASE_URL = "http://mock.vagrancy.net"
+BOX_DATA = {'versions': [{'version': '1.0.0', 'providers': [{'name': 'virtualbox'}]}]}
+
+
+# pylint: disable=R0903
+class MetadataServer:
+    """Response callback of a JSON document supporting conditional requests."""
+
+    def __init__(self, document, etag):
+        """Create a new callback object."""
+        self.document = document
+        self.etag = etag
+        self.conditions = []
+
+    def __call__(self, request, context):
+        """Return the document or 304 if the client has the current one."""
+        self.conditions.append(request.headers.get('If-None-Match'))
+        context.headers['ETag'] = self.etag
+        if request.headers.get('If-None-Match') == self.etag:
+            context.status_code = 304
+            return ''
+        return json.dumps(self.document)
+
+
+# -----------------------------------------------------------------------------
+# Test Class
+# -----------------------------------------------------------------------------
+class VagrancyMetadataCacheTest(TestCase):
+    """Test the :class:`vagrancy.metadata_cache.MetadataCache` class."""
+
+    def setUp(self):
+        """Create the temporary directory."""
+        self.tmp_dir = TempDirectory()
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.tmp_dir.cleanup()
+
+    def test_ttl_hit(self):
+        """Vagrancy.inventory(): Use the cached inventory within the TTL."""
+        server = MetadataServer({'boxes': ['user/test']}, '"i1"')
+        vagrancy = Vagrancy(BASE_URL, metadata_cache = MetadataCache(ttl = 60))
+        with requests_mock.Mocker() as mocker:
+            mocker.get("%s/inventory" % BASE_URL, text = server)
+            self.assertEqual(vagrancy.inventory(), ['user/test'])
+            self.assertEqual(vagrancy.inventory(), ['user/test'])
+        self.assertEqual(server.conditions, [None])
+
+    def test_revalidation(self):
+        """Box.retrieve_box_data(): Revalidate the expired box data."""
+        server = MetadataServer(BOX_DATA, '"b1"')
+        vagrancy = Vagrancy(BASE_URL, metadata_cache = MetadataCache(ttl = 0))
+        with requests_mock.Mocker() as mocker:
+            mocker.get("%s/user/test" % BASE_URL, text = server)
+            self.assertEqual(vagrancy.get_box("user/test").provider_latest_versions,
+                             {'virtualbox': '1.0.0'})
+            self.assertEqual(vagrancy.get_box("user/test").provider_latest_versions,
+                             {'virtualbox': '1.0.0'})
+        self.assertEqual(server.conditions, [None, '"b1"'])
+
+    def test_invalidation(self):
+        """BoxFile.delete(): Invalidate the cached inventory and box data."""
+        inventory_server = MetadataServer({'boxes': ['user/test']}, '"i1"')
+        box_server = MetadataServer(BOX_DATA, '"b1"')
+        vagrancy = Vagrancy(BASE_URL, metadata_cache = MetadataCache(ttl = 60))
+        with requests_mock.Mocker() as mocker:
+            mocker.get("%s/inventory" % BASE_URL, text = inventory_server)
+            mocker.get("%s/user/test" % BASE_URL, text = box_server)
+            mocker.delete("%s/user/test/1.0.0/virtualbox" % BASE_URL)
+            vagrancy.inventory()
+            box = vagrancy.get_box("user/test")
+            self.assertTrue(box.get_filtered_box_files()[0].delete())
+
+            inventory_server.document = {'boxes': []}
+            box_server.document = {'versions': []}
+            self.assertEqual(vagrancy.inventory(), [])
+            self.assertTrue(vagrancy.get_box("user/test").is_empty())
+        self.assertEqual(inventory_server.conditions, [None, None])
+        self.assertEqual(box_server.conditions, [None, None])
+
+    def test_server_error(self):
+        """MetadataCache: Server errors are raised and do not drop the cached documents."""
+        vagrancy = Vagrancy(BASE_URL, metadata_cache = MetadataCache(ttl = 0))
+        with requests_mock.Mocker() as mocker:
+            mocker.get("%s/inventory" % BASE_URL, json = {'boxes': ['user/test']})
+            mocker.get("%s/user/test" % BASE_URL, json = BOX_DATA)
+            self.assertEqual(len(vagrancy.get_boxes()), 1)
+
+            for status_code in (500, 503):
+                mocker.get("%s/inventory" % BASE_URL, status_code = status_code)
+                mocker.get("%s/user/test" % BASE_URL, status_code = status_code)
+                with self.assertRaises(requests.exceptions.HTTPError):
+                    vagrancy.inventory()
+                with self.assertRaises(requests.exceptions.HTTPError):
+                    vagrancy.get_box("user/test")
+
+            mocker.get("%s/inventory" % BASE_URL, status_code = 304)
+            mocker.get("%s/user/test" % BASE_URL, status_code = 304)
+            self.assertEqual(len(vagrancy.get_boxes()), 1)
+
+    def test_persistence(self):
+        """MetadataCache: Use the documents stored on disk by a former cache."""
+        server = MetadataServer({'boxes': ['user/test']}, '"i1"')
+        with requests_mock.Mocker() as mocker:
+            mocker.get("%s/inventory" % BASE_URL, text = server)
+            for _ in range(2):
+                cache = MetadataCache(self.tmp_dir.path, ttl = 60)
+                self.assertEqual(Vagrancy(BASE_URL, metadata_cache = cache).inventory(),
+                                 ['user/test'])
+        self.assertEqual(server.conditions, [None])
+        self.assertEqual(len(os.listdir(os.path.join(self.tmp_dir.path, 'metadata'))), 1)
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
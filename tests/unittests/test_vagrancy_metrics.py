@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Unit tests of the vagrancy.metrics module."""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import os
+from unittest import TestCase
+
+from testfixtures import TempDirectory
+
+from vagrancy import instrumentation
+from vagrancy.client import Vagrancy
+from vagrancy.download_cache import DownloadCache
+from vagrancy.metadata_cache import MetadataCache
+from vagrancy.metrics import PrometheusMetrics
+
+from vagrancy_server import VagrancyServer  # pylint: disable=C0411
+
+
+# -----------------------------------------------------------------------------
+# Test Class
+# -----------------------------------------------------------------------------
+class VagrancyMetricsTest(TestCase):
+    """Test the :class:`vagrancy.metrics.PrometheusMetrics` class."""
+
+    @staticmethod
+    def _get_samples(text):
+        """Get the samples of the metrics text as a dictionary."""
+        return dict(line.rsplit(' ', 1) for line in text.splitlines()
+                    if not line.startswith('#'))
+
+    def test_transfers(self):
+        """PrometheusMetrics: Transfers, requests and cache hits of a run."""
+        payload = os.urandom(100000)
+        with TempDirectory() as tmp_dir, VagrancyServer() as server, \
+                Vagrancy(server.url,
+                         download_cache = DownloadCache(os.path.join(tmp_dir.path, "cache")),
+                         metadata_cache = MetadataCache(None, ttl = 60)) as vagrancy:
+            server.add_box_file("user/test", "1.0.0", "libvirt", payload)
+            metrics = PrometheusMetrics("download")
+            instrumentation.add_hook(metrics)
+            self.addCleanup(instrumentation.remove_hook, metrics)
+
+            for _ in range(2):
+                box_file = vagrancy.get_box("user/test").get_filtered_box_files()[0]
+                self.assertTrue(box_file.download(os.path.join(tmp_dir.path, "test.box")))
+            instrumentation.notify_event('retry', box_file.get_url())
+
+            metrics_file = os.path.join(tmp_dir.path, "vagrancy.prom")
+            metrics.write(metrics_file, exit_code = 0)
+            self.assertEqual([name for name in os.listdir(tmp_dir.path)
+                              if name.startswith("vagrancy.prom")], ["vagrancy.prom"])
+            with open(metrics_file, 'r', encoding = 'utf-8') as handle:
+                text = handle.read()
+
+        samples = self._get_samples(text)
+        labels = 'box="user/test",command="download",direction="download"'
+        self.assertEqual(samples['vagrancy_transfer_bytes_total{%s}' % labels], "100000")
+        self.assertIn('vagrancy_transfer_duration_seconds_total{%s}' % labels, samples)
+        self.assertEqual(samples['vagrancy_requests_total{command="download",endpoint="box",'
+                                 'method="GET",status="200"}'], "1")
+        self.assertEqual(samples['vagrancy_requests_total{command="download",'
+                                 'endpoint="box_file",method="HEAD",status="304"}'], "1")
+        self.assertEqual(samples['vagrancy_request_duration_seconds_count{command="download",'
+                                 'endpoint="box_file",method="GET"}'], "1")
+        self.assertEqual(samples['vagrancy_request_duration_seconds_bucket{command="download",'
+                                 'endpoint="box_file",method="GET",le="+Inf"}'], "1")
+        self.assertEqual(samples['vagrancy_cache_requests_total{cache="download",'
+                                 'command="download",result="hit"}'], "1")
+        self.assertEqual(samples['vagrancy_cache_requests_total{cache="download",'
+                                 'command="download",result="miss"}'], "1")
+        self.assertEqual(samples['vagrancy_cache_requests_total{cache="metadata",'
+                                 'command="download",result="hit"}'], "1")
+        self.assertEqual(samples['vagrancy_retries_total{box="user/test",command="download",'
+                                 'endpoint="box_file"}'], "1")
+        self.assertEqual(samples['vagrancy_run_exit_code{command="download"}'], "0")
+        self.assertIn("# TYPE vagrancy_request_duration_seconds histogram\n", text)
+
+    def test_failed_request(self):
+        """PrometheusMetrics: Failed requests and escaped labels."""
+        metrics = PrometheusMetrics('print "all"')
+        metrics(instrumentation.RequestRecord("GET", "http://host/inventory", "inventory",
+                                              None, 0, 0.0, 1.0, 1.0))
+        samples = self._get_samples(metrics.format(exit_code = 1))
+        self.assertEqual(samples['vagrancy_requests_total{command="print \\"all\\"",'
+                                 'endpoint="inventory",method="GET",status="error"}'], "1")
+        self.assertEqual(samples['vagrancy_run_exit_code{command="print \\"all\\""}'], "1")
+        self.assertNotIn('vagrancy_transfer_bytes_total', "\n".join(samples))
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Unit tests of the vagrancy.mirror module."""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import os
+from unittest import TestCase
+
+import requests
+
+import requests_mock
+
+from testfixtures import TempDirectory
+
+from vagrancy.client import Vagrancy
+from vagrancy.mirror import Mirror
+
+
+# -----------------------------------------------------------------------------
+# Test Infos
+# -----------------------------------------------------------------------------
+BASE_URL = "http://mock.vagrancy.net"
+
+
+# -----------------------------------------------------------------------------
+# Test Class
+# -----------------------------------------------------------------------------
+class VagrancyMirrorTest(TestCase):
+    """Test the :class:`vagrancy.mirror.Mirror` class."""
+
+    def setUp(self):
+        """Create the temporary directory, the client and the mirror."""
+        self.tmp_dir = TempDirectory()
+        self.vagrancy = Vagrancy(BASE_URL, concurrency = 2)
+        self.mirror = Mirror(self.vagrancy, self.tmp_dir.path)
+        self.contents = {}
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.tmp_dir.cleanup()
+
+    def _sync(self, versions, delete = False, box_name = "user/test", **patterns):
+        """Synchronize the mirror with the given versions of a box.
+
+        Returns:
+            tuple: The summary and the methods of the performed requests.
+        """
+        box_files = [self.vagrancy.get_box_file(box_name, version, "libvirt")
+                     for version in versions]
+        with requests_mock.Mocker() as mocker:
+            for box_file in box_files:
+                content, etag = self.contents[box_file.version]
+                headers = {'ETag': etag, 'Content-Length': str(len(content))}
+                mocker.head(box_file.get_url(), headers = headers)
+                mocker.get(box_file.get_url(), content = content, headers = headers)
+            summary = self.mirror.sync(box_files, delete, **patterns)
+            methods = sorted(request.method for request in mocker.request_history)
+        return summary, methods
+
+    def test_incremental_sync(self):
+        """Mirror.sync(): Only download new and changed box files."""
+        self.contents = {"1.0.0": (b"one", '"a"'), "1.0.1": (b"two", '"b"')}
+        summary, methods = self._sync(["1.0.0", "1.0.1"])
+        self.assertEqual(len(summary['downloaded']), 2)
+        self.assertEqual(methods, ['GET', 'GET', 'HEAD', 'HEAD'])
+
+        summary, methods = self._sync(["1.0.0", "1.0.1"])
+        self.assertEqual(len(summary['unchanged']), 2)
+        self.assertEqual(methods, ['HEAD', 'HEAD'])
+
+        self.contents["1.0.1"] = (b"changed", '"c"')
+        summary, methods = self._sync(["1.0.0", "1.0.1"])
+        self.assertEqual(summary['downloaded'], [os.path.join("user", "test", "1.0.1",
+                                                              "libvirt.box")])
+        with open(os.path.join(self.tmp_dir.path, summary['downloaded'][0]), 'rb') as handle:
+            self.assertEqual(handle.read(), b"changed")
+
+    def test_delete(self):
+        """Mirror.sync(): Delete box files removed on the server only with delete."""
+        self.contents = {"1.0.0": (b"one", '"a"'), "1.0.1": (b"two", '"b"')}
+        self._sync(["1.0.0", "1.0.1"])
+
+        summary, _ = self._sync(["1.0.1"])
+        self.assertEqual(summary['deleted'], [])
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir.path, "user", "test", "1.0.0")))
+
+        summary, _ = self._sync(["1.0.1"], delete = True)
+        self.assertEqual(summary['deleted'], [os.path.join("user", "test", "1.0.0",
+                                                           "libvirt.box")])
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir.path, "user", "test", "1.0.0")))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir.path, "user", "test", "1.0.1",
+                                                    "libvirt.box")))
+
+    def test_delete_subset(self):
+        """Mirror.sync(): Deleting with a pattern keeps the box files of other boxes."""
+        self.contents = {"1.0.0": (b"one", '"a"'), "1.0.1": (b"two", '"b"')}
+        self._sync(["1.0.0", "1.0.1"])
+        self._sync(["1.0.0", "1.0.1"], box_name = "base/foo")
+        self._sync(["1.0.0"], box_name = "base/bar")
+
+        summary, _ = self._sync(["1.0.1"], delete = True, box_name = "base/foo",
+                                box_pattern = "base/foo")
+        self.assertEqual(summary['deleted'], [os.path.join("base", "foo", "1.0.0",
+                                                           "libvirt.box")])
+        self.assertEqual(sorted(self.mirror.load_state()),
+                         [os.path.join("base", "bar", "1.0.0", "libvirt.box"),
+                          os.path.join("base", "foo", "1.0.1", "libvirt.box"),
+                          os.path.join("user", "test", "1.0.0", "libvirt.box"),
+                          os.path.join("user", "test", "1.0.1", "libvirt.box")])
+        for rel_path in self.mirror.load_state():
+            self.assertTrue(os.path.exists(os.path.join(self.tmp_dir.path, rel_path)))
+
+        summary, _ = self._sync(["1.0.1"], delete = True, box_pattern = "user/test",
+                                version_pattern = "1.0.1")
+        self.assertEqual(summary['deleted'], [])
+
+        summary, _ = self._sync(["1.0.1"], delete = True, box_pattern = "user/*",
+                                version_pattern = "+1", provider_pattern = "libvirt")
+        self.assertEqual(summary['deleted'], [os.path.join("user", "test", "1.0.0",
+                                                           "libvirt.box")])
+        self.assertIn(os.path.join("base", "bar", "1.0.0", "libvirt.box"),
+                      self.mirror.load_state())
+
+    def test_delete_server_error(self):
+        """Mirror.sync(): Nothing is deleted if the server reports errors."""
+        self.contents = {"1.0.0": (b"one", '"a"'), "1.0.1": (b"two", '"b"')}
+        self._sync(["1.0.0", "1.0.1"])
+        mirrored = sorted(self.mirror.load_state())
+
+        with requests_mock.Mocker() as mocker:
+            mocker.get("%s/inventory" % BASE_URL, status_code = 503)
+            mocker.get("%s/user/test" % BASE_URL, status_code = 500)
+            with self.assertRaises(requests.exceptions.HTTPError):
+                self.vagrancy.get_boxes()
+            with self.assertRaises(requests.exceptions.HTTPError):
+                self.vagrancy.get_boxes("user/test")
+
+            box_file = self.vagrancy.get_box_file("user/test", "1.0.1", "libvirt")
+            mocker.head(box_file.get_url(), status_code = 503)
+            mocker.get(box_file.get_url(), status_code = 503)
+            summary = self.mirror.sync([box_file], delete = True, retries = 0)
+
+        self.assertEqual(summary['failed'], [os.path.join("user", "test", "1.0.1",
+                                                          "libvirt.box")])
+        self.assertEqual(summary['deleted'], [])
+        self.assertEqual(sorted(self.mirror.load_state()), mirrored)
+        for rel_path in mirrored:
+            self.assertTrue(os.path.exists(os.path.join(self.tmp_dir.path, rel_path)))
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Unit tests of the vagrancy.profiler module."""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import contextlib
+import io
+import os
+import pstats
+import sys
+import tracemalloc
+from unittest import TestCase
+
+from testfixtures import TempDirectory
+
+from vagrancy.profiler import Profiler
+
+
+# -----------------------------------------------------------------------------
+# Internal Functions
+# -----------------------------------------------------------------------------
+def _allocate():
+    """Allocate some memory to profile."""
+    return [bytearray(1000) for _ in range(100)]
+
+
+# -----------------------------------------------------------------------------
+# Test Class
+# -----------------------------------------------------------------------------
+class VagrancyProfilerTest(TestCase):
+    """Test the :class:`vagrancy.profiler.Profiler` class."""
+
+    def test_system_exit(self):
+        """Profiler: The results are written if the block calls sys.exit()."""
+        with TempDirectory() as tmp_dir:
+            cpu_file = os.path.join(tmp_dir.path, "cpu.pstats")
+            mem_file = os.path.join(tmp_dir.path, "mem.snapshot")
+            stderr = io.StringIO()
+
+            with self.assertRaises(SystemExit), contextlib.redirect_stderr(stderr):
+                with Profiler(cpu_file, mem_file, top = 3):
+                    _allocate()
+                    sys.exit(0)
+
+            functions = [function for _, _, function in pstats.Stats(cpu_file).stats]
+            self.assertIn("_allocate", functions)
+            self.assertGreater(len(tracemalloc.Snapshot.load(mem_file).traces), 0)
+            self.assertIn("Ordered by: cumulative time", stderr.getvalue())
+            self.assertIn("Top 3 allocation sites:", stderr.getvalue())
+            self.assertFalse(tracemalloc.is_tracing())
+
+    def test_top_only(self):
+        """Profiler: Only the CPU time is profiled for a summary without files."""
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            with Profiler(top = 2) as profiler:
+                self.assertIsNone(profiler._tracemalloc)  # pylint: disable=W0212
+        self.assertIn("due to restriction <2>", stderr.getvalue())
+        self.assertNotIn("allocation sites", stderr.getvalue())
+
+    def test_disabled(self):
+        """Profiler: Nothing is profiled or printed without options."""
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr), Profiler() as profiler:
+            # pylint: disable=W0212
+            self.assertIsNone(profiler._profile)
+            self.assertIsNone(profiler._tracemalloc)
+        self.assertEqual(stderr.getvalue(), "")
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Unit tests of the replication of box files and the vagrancy.pipe module."""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import io
+import os
+import threading
+from unittest import TestCase
+
+from vagrancy.client import Vagrancy
+from vagrancy.pipe import Pipe
+
+from vagrancy_server import VagrancyServer  # pylint: disable=C0411
+
+
+# -----------------------------------------------------------------------------
+# Test Infos
+# -----------------------------------------------------------------------------
+class CountingReader(io.BytesIO):
+    """Reader that records the number of bytes read."""
+
+    def __init__(self, data):
+        """Create a new reader."""
+        super().__init__(data)
+        self.num_read = 0
+
+    def read(self, size = -1):
+        """Read the data and count the bytes."""
+        data = super().read(size)
+        self.num_read += len(data)
+        return data
+
+
+# -----------------------------------------------------------------------------
+# Test Class
+# -----------------------------------------------------------------------------
+class VagrancyReplicateTest(TestCase):
+    """Test :meth:`vagrancy.client.Vagrancy.replicate_box_files` and the Pipe class."""
+
+    def _start_server(self):
+        """Start a server that is stopped at the end of the test."""
+        server = VagrancyServer()
+        server.start()
+        self.addCleanup(server.stop)
+        return server
+
+    def test_replicate(self):
+        """Vagrancy.replicate_box_files(): Copy box files to another server."""
+        source_server = self._start_server()
+        target_server = self._start_server()
+        payloads = {"1.0.%d" % i: os.urandom(300000 + i) for i in range(3)}
+        for version, payload in payloads.items():
+            source_server.add_box_file("user/box", version, "libvirt", payload)
+
+        with Vagrancy(source_server.url, concurrency = 2) as source, \
+                Vagrancy(target_server.url) as target:
+            box_files = [source.get_box_file("user/box", "1.0.%d" % i, "libvirt")
+                         for i in range(4)]
+            results = source.replicate_box_files(box_files, target, chunk_size = 65536,
+                                                 buffer_size = 131072)
+
+        self.assertEqual([result[:2] for result in results],
+                         [(True, 300000), (True, 300001), (True, 300002), (False, 0)])
+        for version, payload in payloads.items():
+            self.assertEqual(target_server.get_box_file("user/box", version, "libvirt"),
+                             payload)
+        self.assertIsNone(target_server.get_box_file("user/box", "1.0.3", "libvirt"))
+        self.assertEqual(sorted(method for method, _ in target_server.request_log),
+                         ['PUT', 'PUT', 'PUT'])
+
+    def test_pipe_is_bounded(self):
+        """Pipe: Read ahead at most the buffer size."""
+        reader = CountingReader(b"x" * 100000)
+        pipe = Pipe(reader, 100000, chunk_size = 1000, buffer_size = 5000)
+
+        chunks = iter(pipe)
+        self.assertEqual(next(chunks), b"x" * 1000)
+        threading.Event().wait(0.1)
+        # The consumed chunk, the queued chunks and the chunk waiting to be queued
+        self.assertLessEqual(reader.num_read, 7000)
+
+        self.assertEqual(sum(len(chunk) for chunk in chunks), 99000)
+        pipe.close()
+
+    def test_pipe_short_read(self):
+        """Pipe: Raise an error if the reader ends too early."""
+        pipe = Pipe(io.BytesIO(b"x" * 10), 20, chunk_size = 4)
+        with self.assertRaises(IOError):
+            list(pipe)
+        pipe.close()
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
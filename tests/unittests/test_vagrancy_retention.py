@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Unit tests of the vagrancy.retention module."""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import email.utils
+from unittest import TestCase
+
+import requests_mock
+
+from vagrancy.box import Box
+from vagrancy.client import Vagrancy
+from vagrancy.retention import RetentionPolicy
+
+
+# -----------------------------------------------------------------------------
+# Test Infos
+# -----------------------------------------------------------------------------
+BASE_URL = "http://mock.vagrancy.net"
+NOW = 1600000000.0
+VERSIONS = ["1.0.9", "1.0.10", "1.0.2", "1.0.1"]
+
+
+def get_box_data(versions, providers = ("libvirt", "virtualbox")):
+    """Get the JSON data of a box with the given versions and providers."""
+    return {'versions': [{'version': version,
+                          'providers': [{'name': provider} for provider in providers]}
+                         for version in versions]}
+
+
+# -----------------------------------------------------------------------------
+# Test Class
+# -----------------------------------------------------------------------------
+class VagrancyRetentionPolicyTest(TestCase):
+    """Test the :class:`vagrancy.retention.RetentionPolicy` class."""
+
+    def setUp(self):
+        """Create the client and the boxes."""
+        self.vagrancy = Vagrancy(BASE_URL)
+        self.boxes = [Box(BASE_URL, "user/a", box_data = get_box_data(VERSIONS)),
+                      Box(BASE_URL, "user/b", box_data = get_box_data(["2.0.0"]))]
+
+    def test_no_rule(self):
+        """RetentionPolicy(): Refuse a policy without rules."""
+        with self.assertRaises(ValueError):
+            RetentionPolicy()
+
+    def test_invalid_rules(self):
+        """RetentionPolicy(): Refuse rules that would prune every box file."""
+        for keep_last in (0, -1):
+            with self.assertRaises(ValueError):
+                RetentionPolicy(keep_last = keep_last)
+            with self.assertRaises(ValueError):
+                RetentionPolicy(keep_last = keep_last, keep_newer_than = 14)
+        with self.assertRaises(ValueError):
+            RetentionPolicy(keep_newer_than = -1)
+
+    def test_keep_last(self):
+        """RetentionPolicy.evaluate(): Keep the latest versions per box and provider."""
+        keep, prune = RetentionPolicy(keep_last = 2).evaluate(self.vagrancy, self.boxes)
+        self.assertEqual(sorted((f.box_name, f.provider, f.version) for f in prune),
+                         [("user/a", "libvirt", "1.0.1"), ("user/a", "libvirt", "1.0.2"),
+                          ("user/a", "virtualbox", "1.0.1"), ("user/a", "virtualbox", "1.0.2")])
+        self.assertEqual(len(keep), 6)
+
+        keep, prune = RetentionPolicy(keep_last = 1).evaluate(self.vagrancy, self.boxes,
+                                                              "virtualbox")
+        self.assertEqual(sorted(f.version for f in keep), ["1.0.10", "2.0.0"])
+        self.assertEqual(len(prune), 3)
+
+    def test_keep_newer_than(self):
+        """RetentionPolicy.evaluate(): Keep recently modified box files."""
+        ages = {"1.0.9": 20, "1.0.2": 5, "1.0.1": 30}
+        policy = RetentionPolicy(keep_last = 1, keep_newer_than = 14)
+
+        with requests_mock.Mocker() as mocker:
+            for version, age in ages.items():
+                last_modified = email.utils.formatdate(NOW - age * 86400, usegmt = True)
+                mocker.head("%s/user/a/%s/libvirt" % (BASE_URL, version),
+                            headers = {'Last-Modified': last_modified})
+            keep, prune = policy.evaluate(self.vagrancy, self.boxes, "libvirt", now = NOW)
+            num_requests = mocker.call_count
+
+        self.assertEqual(sorted(f.version for f in keep), ["1.0.10", "1.0.2", "2.0.0"])
+        self.assertEqual(sorted(f.version for f in prune), ["1.0.1", "1.0.9"])
+        self.assertEqual(num_requests, 3)
+
+    def test_keep_latest_version(self):
+        """RetentionPolicy.evaluate(): The latest version is kept even if it is stale."""
+        policy = RetentionPolicy(keep_newer_than = 14)
+        last_modified = email.utils.formatdate(NOW - 30 * 86400, usegmt = True)
+
+        with requests_mock.Mocker() as mocker:
+            mocker.head(requests_mock.ANY, headers = {'Last-Modified': last_modified})
+            keep, prune = policy.evaluate(self.vagrancy, self.boxes, "libvirt", now = NOW)
+            num_requests = mocker.call_count
+
+        self.assertEqual(sorted((f.box_name, f.version) for f in keep),
+                         [("user/a", "1.0.10"), ("user/b", "2.0.0")])
+        self.assertEqual(sorted(f.version for f in prune), ["1.0.1", "1.0.2", "1.0.9"])
+        self.assertEqual(num_requests, 3)
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
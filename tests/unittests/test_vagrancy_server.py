@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Unit tests of the stand-in vagrancy server of the unit tests."""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import os
+import time
+from unittest import TestCase
+
+from testfixtures import TempDirectory
+
+from vagrancy.client import Vagrancy
+
+from vagrancy_server import VagrancyServer  # pylint: disable=C0411
+
+
+# -----------------------------------------------------------------------------
+# Test Class
+# -----------------------------------------------------------------------------
+class VagrancyServerTest(TestCase):
+    """Test the :class:`VagrancyServer` class."""
+
+    def _start_server(self, **kwargs):
+        """Start a server that is stopped at the end of the test."""
+        server = VagrancyServer(**kwargs)
+        server.start()
+        self.addCleanup(server.stop)
+        return server
+
+    def test_round_trip(self):
+        """VagrancyServer: Upload, list, download and delete box files."""
+        server = self._start_server()
+        payload = os.urandom(100000)
+
+        with TempDirectory() as tmp_dir, Vagrancy(server.url) as vagrancy:
+            box_file = vagrancy.get_box_file("user/test", "1.0.0", "libvirt")
+            self.assertTrue(box_file.upload_data(payload))
+            self.assertEqual(server.get_box_file("user/test", "1.0.0", "libvirt"), payload)
+
+            self.assertEqual(vagrancy.inventory(), ["user/test"])
+            box = vagrancy.get_box("user/test")
+            self.assertEqual(box.provider_latest_versions["libvirt"], "1.0.0")
+            self.assertEqual(box_file.stat()['size'], 100000)
+
+            target = os.path.join(tmp_dir.path, "test.box")
+            self.assertTrue(box_file.download(target, chunk_size = 4096, segments = 4))
+            with open(target, 'rb') as handle:
+                self.assertEqual(handle.read(), payload)
+
+            self.assertTrue(box_file.delete())
+            self.assertFalse(box_file.delete())
+            self.assertEqual(vagrancy.inventory(), [])
+            self.assertTrue(vagrancy.get_box("user/test").is_empty())
+
+    def test_range_and_conditional_requests(self):
+        """VagrancyServer: Byte ranges and validators."""
+        server = self._start_server()
+        server.add_box_file("user/test", "1.0.0", "libvirt", bytes(range(100)))
+        url = server.url + "/user/test/1.0.0/libvirt"
+
+        with Vagrancy(server.url) as vagrancy:
+            # pylint: disable=W0212
+            session = vagrancy._session
+            response = session.get(url, headers = {'Range': 'bytes=10-19'})
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(response.content, bytes(range(10, 20)))
+            self.assertEqual(response.headers['content-range'], 'bytes 10-19/100')
+
+            response = session.get(url, headers = {'Range': 'bytes=200-'})
+            self.assertEqual(response.status_code, 416)
+
+            etag = response.headers['etag']
+            response = session.get(url, headers = {'Range': 'bytes=90-', 'If-Range': '"old"'})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.content), 100)
+
+            response = session.get(url, headers = {'If-None-Match': etag})
+            self.assertEqual(response.status_code, 304)
+
+            box_etag = session.get(server.url + "/user/test").headers['etag']
+            server.add_box_file("user/test", "1.0.1", "libvirt", b"")
+            response = session.get(server.url + "/user/test",
+                                   headers = {'If-None-Match': box_etag})
+            self.assertEqual(response.status_code, 200)
+
+    def test_latency_and_bandwidth(self):
+        """VagrancyServer: Injected latency and bandwidth limit."""
+        server = self._start_server(latency = 0.2, bandwidth = 500000)
+        server.add_box_file("user/test", "1.0.0", "libvirt", b"x" * 250000)
+
+        with Vagrancy(server.url) as vagrancy:
+            start = time.monotonic()
+            vagrancy.inventory()
+            self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+            server.latency = 0.0
+            start = time.monotonic()
+            # pylint: disable=W0212
+            response = vagrancy._session.get(server.url + "/user/test/1.0.0/libvirt")
+            self.assertEqual(len(response.content), 250000)
+            self.assertGreaterEqual(time.monotonic() - start, 0.45)
+
+    def test_synthetic_inventory(self):
+        """VagrancyServer: Synthetic inventory of many boxes."""
+        server = self._start_server()
+        box_names = server.add_synthetic_inventory(2000, num_versions = 3,
+                                                   providers = ('libvirt', 'virtualbox'),
+                                                   size = 1000)
+
+        with Vagrancy(server.url, concurrency = 8) as vagrancy:
+            self.assertEqual(vagrancy.get_box_names(), box_names)
+            boxes = list(vagrancy.iter_boxes("synthetic/box1??"))
+            self.assertEqual(len(boxes), 100)
+            self.assertEqual(boxes[0].provider_latest_versions["virtualbox"], "1.0.2")
+
+        self.assertEqual(len(server.get_box_file("synthetic/box0", "1.0.0", "libvirt")), 1000)
+        self.assertEqual(server.request_log[0], ('GET', '/inventory'))
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
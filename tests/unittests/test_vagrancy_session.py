@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Unit tests of the vagrancy.session module."""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import json
+from unittest import TestCase
+
+import requests_mock
+
+from vagrancy import client
+from vagrancy import session
+
+
+# -----------------------------------------------------------------------------
+# Test Class
+# -----------------------------------------------------------------------------
+class VagrancySessionTest(TestCase):
+    """Test the :func:`vagrancy.session.create_session` function."""
+
+    def test_adapter_settings(self):
+        """create_session(): Pool size and retries of the adapter."""
+        http_session = session.create_session(pool_size = 4, max_retries = 2)
+        adapter = http_session.get_adapter("http://mock.vagrancy.net")
+        # pylint: disable=W0212
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertEqual(adapter.max_retries.total, 2)
+        self.assertNotIn("PUT", adapter.max_retries.allowed_methods)
+        self.assertNotEqual(http_session.headers.get("Connection"), "close")
+
+    def test_no_keep_alive(self):
+        """create_session(): Disabled keep-alive."""
+        http_session = session.create_session(keep_alive = False)
+        self.assertEqual(http_session.headers["Connection"], "close")
+
+    @requests_mock.mock()
+    def test_shared_session(self, mock_get):
+        """Vagrancy.get_boxes(): Boxes and box files share the session."""
+        mock_get.get("http://mock.vagrancy.net/inventory",
+                     text=json.dumps({"boxes": ["user/test"]}))
+        mock_get.get("http://mock.vagrancy.net/user/test",
+                     text=json.dumps({"name": "user/test",
+                                      "versions": [{"version": "1.0.0",
+                                                    "providers": [{"name": "libvirt"}]}]}))
+
+        with client.Vagrancy("http://mock.vagrancy.net") as vagrancy_client:
+            boxes = vagrancy_client.get_boxes()
+            box_file = boxes[0].get_filtered_box_files()[0]
+            # pylint: disable=W0212
+            self.assertIs(boxes[0]._session, vagrancy_client._session)
+            self.assertIs(box_file._session, vagrancy_client._session)
+            self.assertIs(vagrancy_client.get_box_file("user/test", "1.0.1", "libvirt")._session,
+                          vagrancy_client._session)
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Unit tests of the vagrancy.tracer module."""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from testfixtures import TempDirectory
+
+from vagrancy import instrumentation
+from vagrancy import tracer
+from vagrancy.client import Vagrancy
+
+from vagrancy_server import VagrancyServer  # pylint: disable=C0411
+
+
+# -----------------------------------------------------------------------------
+# Test Class
+# -----------------------------------------------------------------------------
+class VagrancyTracerTest(TestCase):
+    """Test the :class:`vagrancy.tracer.Tracer` class."""
+
+    def _start_tracing(self):
+        """Start a tracer that is stopped at the end of the test."""
+        active_tracer = tracer.Tracer()
+        tracer.start_tracing(active_tracer)
+        self.addCleanup(tracer.stop_tracing)
+        return active_tracer
+
+    @staticmethod
+    def _get_paths(active_tracer):
+        """Get the names of the spans and their ancestors."""
+        spans = {event['args']['span_id']: event for event in active_tracer.events
+                 if event['ph'] == 'X'}
+        paths = []
+        for event in spans.values():
+            path = []
+            while event is not None:
+                path.insert(0, event['name'])
+                event = spans.get(event['args']['parent_id'])
+            paths.append('/'.join(path))
+        return sorted(paths)
+
+    def test_disabled(self):
+        """span(), propagate(): No-op objects without an active tracer."""
+        function = len
+        self.assertIs(tracer.propagate(function), function)
+        with tracer.span("test") as first, tracer.span("other") as second:
+            self.assertIs(first, second)
+        self.assertIsNone(tracer.stop_tracing())
+
+    def test_nesting(self):
+        """span(): Spans of thread pools are children of the submitting span."""
+        active_tracer = self._start_tracing()
+
+        def work(index):
+            with tracer.span("work", index = index):
+                pass
+
+        with tracer.span("command"):
+            with ThreadPoolExecutor(max_workers = 2) as executor:
+                list(executor.map(tracer.propagate(work), range(3)))
+            with tracer.span("sequential"):
+                pass
+
+        self.assertEqual(self._get_paths(active_tracer),
+                         ["command", "command/sequential", "command/work",
+                          "command/work", "command/work"])
+        flows = [event for event in active_tracer.events if event['ph'] in ('s', 'f')]
+        self.assertEqual(len(flows), 6)
+
+    def test_errors(self):
+        """span(): Exceptions are recorded except for a successful exit."""
+        active_tracer = self._start_tracing()
+        for index, exception in enumerate((SystemExit(0), SystemExit(None), SystemExit(1),
+                                           ValueError())):
+            with self.assertRaises(type(exception)):
+                with tracer.span("command", index = index):
+                    raise exception
+
+        errors = [event['args'].get('error') for event in active_tracer.events
+                  if event['ph'] == 'X']
+        self.assertEqual(errors, [None, None, 'SystemExit', 'ValueError'])
+
+    def test_requests(self):
+        """Tracer: HTTP requests are added as children of the library spans."""
+        with VagrancyServer() as server, Vagrancy(server.url, concurrency = 2) as vagrancy, \
+                TempDirectory() as tmp_dir:
+            server.add_synthetic_inventory(2, providers = ('libvirt',))
+            active_tracer = self._start_tracing()
+            boxes = vagrancy.get_boxes()
+            vagrancy.delete_box_files(boxes[0].get_filtered_box_files())
+
+            trace_file = os.path.join(tmp_dir.path, "trace.json")
+            self.assertIs(tracer.stop_tracing(), active_tracer)
+            self.assertFalse(instrumentation.is_enabled())
+            active_tracer.write(trace_file)
+            with open(trace_file, 'r', encoding = 'utf-8') as handle:
+                trace = json.load(handle)
+
+        self.assertEqual(self._get_paths(active_tracer),
+                         ["delete_box_files", "delete_box_files/delete",
+                          "delete_box_files/delete/DELETE box_file",
+                          "get_boxes", "get_boxes/inventory",
+                          "get_boxes/inventory/GET inventory",
+                          "get_boxes/retrieve_box", "get_boxes/retrieve_box",
+                          "get_boxes/retrieve_box/GET box", "get_boxes/retrieve_box/GET box"])
+        self.assertIn({'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(),
+                       'tid': threading.get_ident(),
+                       'args': {'name': 'MainThread'}}, trace['traceEvents'])
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
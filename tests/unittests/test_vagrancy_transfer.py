@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Unit tests of the vagrancy.transfer module."""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import io
+import json
+import os
+import socket
+from unittest import TestCase, mock
+
+import requests_mock
+
+from testfixtures import TempDirectory
+
+from vagrancy import transfer
+from vagrancy.session import create_session
+
+
+# -----------------------------------------------------------------------------
+# Test Infos
+# -----------------------------------------------------------------------------
+BOX_URL  = "http://mock.vagrancy.net/user/test/1.0.0/virtualbox"
+BOX_DATA = bytes(range(256)) * 40
+
+
+# pylint: disable=R0903
+class RangeServer:
+    """Response callback of a box file download supporting range requests.
+
+    Attributes:
+        support_ranges (bool): If False, range requests are ignored.
+        truncate (list):       The number of bytes to send for the subsequent
+                               requests. None sends the complete response.
+        ranges (list):         The range headers of all requests.
+    """
+
+    def __init__(self, support_ranges = True, truncate = None):
+        """Create a new callback object."""
+        self.support_ranges = support_ranges
+        self.truncate = truncate or []
+        self.ranges = []
+
+    def __call__(self, request, context):
+        """Return the requested part of the box data."""
+        self.ranges.append(request.headers.get('Range'))
+        start, end = 0, len(BOX_DATA) - 1
+        if self.support_ranges and request.headers.get('Range'):
+            first, last = request.headers['Range'][len('bytes='):].split('-')
+            start, end = int(first), int(last or end)
+            context.status_code = 206
+            context.headers['Content-Range'] = 'bytes %d-%d/%d' % (start, end, len(BOX_DATA))
+        context.headers['Content-Length'] = str(end + 1 - start)
+        context.headers['ETag'] = '"box-etag"'
+
+        body = BOX_DATA[start:end + 1]
+        if self.truncate:
+            length = self.truncate.pop(0)
+            if length is not None:
+                body = body[:length]
+        return body
+
+
+class StalledBody(io.BytesIO):
+    """Response body whose connection times out after the given number of bytes."""
+
+    def __init__(self, data, length):
+        """Create a new body object."""
+        super().__init__(data)
+        self.length = length
+
+    def read(self, size = -1):
+        """Read up to the given number of bytes or time out at the stall length."""
+        remaining = self.length - self.tell()
+        if remaining <= 0:
+            raise socket.timeout("timed out")
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        return super().read(size)
+
+
+# -----------------------------------------------------------------------------
+# Test Class
+# -----------------------------------------------------------------------------
+class VagrancyTransferTest(TestCase):
+    """Test the functions of the :mod:`vagrancy.transfer` module."""
+
+    def test_write_all_short_writes(self):
+        """write_all(): Short writes are continued."""
+        written = []
+
+        def short_write(_, data):
+            written.append(bytes(data[:3]))
+            return len(written[-1])
+
+        with mock.patch('vagrancy.transfer.os.write', side_effect=short_write):
+            transfer.write_all(1, memoryview(b"0123456789"))
+
+        self.assertEqual(written, [b"012", b"345", b"678", b"9"])
+
+    def test_copy_stream(self):
+        """copy_stream(): All data is copied using a small buffer."""
+        data = bytes(range(256)) * 100
+        written = io.BytesIO()
+
+        with mock.patch('vagrancy.transfer.os.write',
+                        side_effect=lambda _, view: written.write(view)) as mock_write:
+            num_copied = transfer.copy_stream(io.BytesIO(data), 1, chunk_size = 1000)
+
+        self.assertEqual(num_copied, len(data))
+        self.assertEqual(written.getvalue(), data)
+        self.assertEqual(mock_write.call_count, 26)
+
+    def test_get_body_reader(self):
+        """get_body_reader(): Use the decoding urllib3 response."""
+        response = mock.Mock()
+        response.headers = {'content-encoding': 'gzip'}
+        self.assertIs(transfer.get_body_reader(response), response.raw)
+        self.assertTrue(response.raw.decode_content)
+
+
+class VagrancyResumableDownloadTest(TestCase):
+    """Test the :func:`vagrancy.transfer.download_file` function."""
+
+    def setUp(self):
+        """Create the temporary directory."""
+        self.tmp_dir = TempDirectory()
+        self.target = os.path.join(self.tmp_dir.path, 'box')
+        self.part_file = self.target + transfer.PART_SUFFIX
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.tmp_dir.cleanup()
+
+    def _download(self, server, retries = 3, segments = 1):
+        """Download the box file from the given server callback."""
+        with requests_mock.Mocker() as mocker, \
+                mock.patch('vagrancy.transfer.MIN_SEGMENT_SIZE', 1000):
+            mocker.get(BOX_URL, content = server)
+            if segments > 1:
+                return transfer.download_file_segmented(create_session(), BOX_URL, self.target,
+                                                        segments, chunk_size = 1000,
+                                                        retries = retries)
+            return transfer.download_file(create_session(), BOX_URL, self.target,
+                                          chunk_size = 1000, retries = retries)
+
+    def _write_part(self, length, url = BOX_URL):
+        """Write the first bytes of the box data into the part file."""
+        with open(self.part_file, 'wb') as handle:
+            handle.write(BOX_DATA[:length])
+        with open(self.part_file + '.json', 'w', encoding = 'utf-8') as handle:
+            json.dump({'url': url, 'validator': '"box-etag"'}, handle)
+
+    def _assert_complete(self):
+        """Check that the target file is complete and no part file is left."""
+        with open(self.target, 'rb') as handle:
+            self.assertEqual(handle.read(), BOX_DATA)
+        self.assertFalse(os.path.exists(self.part_file))
+        self.assertFalse(os.path.exists(self.part_file + '.json'))
+
+    def test_full_download(self):
+        """download_file(): Download without a part file."""
+        server = RangeServer()
+        self.assertTrue(self._download(server))
+        self.assertEqual(server.ranges, [None])
+        self._assert_complete()
+
+    def test_resume_part_file(self):
+        """download_file(): Continue an existing part file."""
+        self._write_part(1234)
+        server = RangeServer()
+        self.assertTrue(self._download(server))
+        self.assertEqual(server.ranges, ['bytes=1234-'])
+        self._assert_complete()
+
+    def test_ignored_range(self):
+        """download_file(): Fall back to a full download if ranges are ignored."""
+        self._write_part(1234)
+        server = RangeServer(support_ranges = False)
+        self.assertTrue(self._download(server))
+        self.assertEqual(server.ranges, ['bytes=1234-'])
+        self._assert_complete()
+
+    def test_other_url(self):
+        """download_file(): Part files of other URLs are not continued."""
+        self._write_part(1234, url = "http://mock.vagrancy.net/user/test/0.9.0/virtualbox")
+        server = RangeServer()
+        self.assertTrue(self._download(server))
+        self.assertEqual(server.ranges, [None])
+        self._assert_complete()
+
+    def test_interrupted_download(self):
+        """download_file(): An interrupted download is continued by the retries."""
+        server = RangeServer(truncate = [3000, 4000])
+        self.assertTrue(self._download(server))
+        self.assertEqual(server.ranges, [None, 'bytes=3000-', 'bytes=7000-'])
+        self._assert_complete()
+
+    def test_read_timeout(self):
+        """download_file(): A download interrupted by a read timeout is continued."""
+        server = RangeServer()
+        stalls = [3000]
+
+        def stalled_body(request, context):
+            body = server(request, context)
+            return StalledBody(body, stalls.pop(0)) if stalls else io.BytesIO(body)
+
+        with requests_mock.Mocker() as mocker:
+            mocker.get(BOX_URL, body = stalled_body)
+            self.assertTrue(transfer.download_file(create_session(), BOX_URL, self.target,
+                                                   chunk_size = 1000))
+        self.assertEqual(server.ranges, [None, 'bytes=3000-'])
+        self._assert_complete()
+
+    def test_incomplete_download(self):
+        """download_file(): The part file is kept if all retries fail."""
+        server = RangeServer(truncate = [3000, 4000])
+        self.assertFalse(self._download(server, retries = 1))
+        self.assertFalse(os.path.exists(self.target))
+        self.assertEqual(os.path.getsize(self.part_file), 7000)
+
+        self.assertTrue(self._download(server))
+        self.assertEqual(server.ranges[-1], 'bytes=7000-')
+        self._assert_complete()
+
+    def test_segmented_download(self):
+        """download_file_segmented(): Download using concurrent byte ranges."""
+        server = RangeServer()
+        self.assertTrue(self._download(server, segments = 4))
+        self.assertEqual(sorted(server.ranges),
+                         sorted(['bytes=0-0', 'bytes=0-2559', 'bytes=2560-5119',
+                                 'bytes=5120-7679', 'bytes=7680-10239']))
+        self._assert_complete()
+
+    def test_segmented_download_small_file(self):
+        """download_file_segmented(): Limit the number of segments by the file size."""
+        server = RangeServer()
+        self.assertTrue(self._download(server, segments = 100))
+        self.assertEqual(len(server.ranges), 1 + len(BOX_DATA) // 1000)
+        self._assert_complete()
+
+    def test_segmented_download_interrupted(self):
+        """download_file_segmented(): Interrupted segments are retried."""
+        server = RangeServer(truncate = [None, 1000])
+        self.assertTrue(self._download(server, segments = 2))
+        self.assertEqual(len(server.ranges), 4)
+        self._assert_complete()
+
+    def test_segmented_download_no_ranges(self):
+        """download_file_segmented(): Fall back to a single stream without range support."""
+        server = RangeServer(support_ranges = False)
+        self.assertTrue(self._download(server, segments = 4))
+        self.assertEqual(server.ranges, ['bytes=0-0', None])
+        self._assert_complete()
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
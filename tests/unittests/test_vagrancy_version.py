@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Unit tests of the vagrancy.version module."""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+from unittest import TestCase
+
+from vagrancy.box import Box
+from vagrancy.version import Version, sort_versions
+
+
+# -----------------------------------------------------------------------------
+# Test Class
+# -----------------------------------------------------------------------------
+class VagrancyVersionTest(TestCase):
+    """Test the :class:`vagrancy.version.Version` class."""
+
+    def test_order(self):
+        """Version: Order following the semantic versioning rules."""
+        ordered = ["bionic", "focal", "1.0.0-alpha", "1.0.0-alpha.1", "1.0.0-alpha.beta",
+                   "1.0.0-beta", "1.0.0-beta.2", "1.0.0-beta.11", "1.0.0-rc.1", "1.0.0",
+                   "1.0.2", "1.0.10", "1.10.0", "2.0.0"]
+        self.assertEqual(sort_versions(reversed(ordered)), ordered)
+        self.assertEqual(sorted(Version(text) for text in reversed(ordered)),
+                         [Version(text) for text in ordered])
+        self.assertEqual(Version("1.0.0+build.1"), Version("1.0.0"))
+        self.assertLess(Version("1.0.0-rc.1"), Version("1.0.0+build.1"))
+
+    def test_next(self):
+        """Version.next(): Get the next release version."""
+        self.assertEqual(str(Version("1.2.3").next()), "1.2.4")
+        self.assertEqual(str(Version("1.2.9+build.7").next()), "1.2.10")
+        self.assertEqual(str(Version("1.2.0-rc1").next()), "1.2.0")
+        self.assertIsNone(Version("bionic").next())
+
+    def test_date_versions(self):
+        """Version: A hyphen after a date does not start a prerelease."""
+        self.assertFalse(Version("2020-01-01").is_prerelease())
+        self.assertGreater(Version("2020-01-02"), Version("2020-01-01"))
+        self.assertNotEqual(Version("2020-01-01"), Version("2020"))
+        self.assertIsNone(Version("2020-01-01").next())
+        self.assertTrue(Version("1.2.3-2020-01-01").is_prerelease())
+        self.assertEqual(sort_versions(["2020-01-02", "2020-01-01-rc.1", "2020-01-01"]),
+                         ["2020-01-01", "2020-01-01-rc.1", "2020-01-02"])
+
+    def test_slots(self):
+        """Version: Do not allow additional attributes."""
+        with self.assertRaises(AttributeError):
+            Version("1.0.0").extra = 1  # pylint: disable=E0237
+
+    def test_box_with_prerelease(self):
+        """Box: A prerelease does not break the order of the other versions."""
+        box_data = {'versions': [{'version': version, 'providers': [{'name': 'libvirt'}]}
+                                 for version in ["1.2.0-rc1", "1.10.0", "1.9.0"]]}
+        box = Box("http://mock.vagrancy.net", "user/test", box_data = box_data)
+        self.assertEqual(box.provider_latest_versions['libvirt'], "1.10.0")
+        self.assertEqual(box.provider_next_versions['libvirt'], "1.10.1")
+        self.assertEqual(sorted(box_file.version
+                                for box_file in box.get_filtered_box_files("-1")),
+                         ["1.2.0-rc1", "1.9.0"])
+
+        box_data['versions'] = box_data['versions'][:1]
+        box.set_box_data(box_data)
+        self.assertEqual(box.provider_next_versions['libvirt'], "1.2.0")
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,517 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""
+In-process stand-in of a vagrancy server for the unit tests and benchmarks.
+
+This module specifies the class :class:`VagrancyServer` that implements the
+HTTP API of vagrancy in a background thread, so that tests and benchmarks can
+exercise real HTTP transfers without Docker. It is not part of the installed
+package. The unit tests import it as ``vagrancy_server``, the benchmarks as
+``tests.unittests.vagrancy_server``:
+
+- ``GET /inventory`` lists the names of all boxes.
+- ``GET /<username>/<name>`` returns the versions and providers of a box.
+- ``GET``, ``HEAD``, ``PUT`` and ``DELETE`` of ``/<username>/<name>/<version>/<provider>``
+  download, inspect, upload and delete a box file.
+
+In contrast to vagrancy, the box files are kept in memory. Downloads support
+single byte ``Range`` requests, the ``If-Range`` header and conditional requests
+using ``If-None-Match`` and ``If-Modified-Since``. A latency added before each
+response and a bandwidth limit of each transfer can be configured to simulate
+a remote server.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import email.utils
+import http.server
+import json
+import threading
+import time
+
+
+# -----------------------------------------------------------------------------
+# Module Variables
+# -----------------------------------------------------------------------------
+# The size of the blocks written or read between two checks of the bandwidth
+_BLOCK_SIZE = 64 * 1024
+
+
+# -----------------------------------------------------------------------------
+# Class Definitions
+# -----------------------------------------------------------------------------
+class VagrancyServer:
+    """Threaded in-memory HTTP server implementing the vagrancy API.
+
+    The server can be used as a context manager that starts and stops it::
+
+        with VagrancyServer(latency = 0.01) as server:
+            server.add_synthetic_inventory(1000)
+            vagrancy = Vagrancy(server.url)
+
+    Attributes:
+        latency (float):   The delay in seconds before each response is sent.
+        bandwidth (float): The maximum throughput of each transfer in bytes per
+                           second or None for an unlimited throughput.
+        request_log (list): The method and path of each received request.
+    """
+
+    def __init__(self, latency = 0.0, bandwidth = None, host = '127.0.0.1', port = 0):
+        """Create a new VagrancyServer object without starting it.
+
+        Args:
+            latency (float):   The delay in seconds before each response is sent.
+            bandwidth (float): The maximum throughput of each transfer in bytes per
+                               second. If None, the throughput is not limited.
+            host (str):        The address to listen on.
+            port (int):        The port to listen on. If 0, a free port is chosen.
+        """
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.request_log = []
+        self._address = (host, port)
+        self._boxes = {}
+        self._revision = 0
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    def __enter__(self):
+        """Start the server.
+
+        Returns:
+            VagrancyServer: This object.
+        """
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        """Stop the server."""
+        self.stop()
+
+    @property
+    def url(self):
+        """str: The base URL of the running server."""
+        host, port = self._httpd.server_address[:2]
+        return "http://%s:%d" % (host, port)
+
+    def start(self):
+        """Start serving requests in a background thread."""
+        self._httpd = http.server.ThreadingHTTPServer(self._address, _RequestHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.vagrancy_server = self
+        self._thread = threading.Thread(target = self._httpd.serve_forever, daemon = True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the server and close its socket."""
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._thread.join()
+            self._httpd = None
+
+    def add_box_file(self, box_name, version, provider, payload):
+        """Store a box file as if it was uploaded.
+
+        Args:
+            box_name (str):  The box name confirming to ``<username>/<name>``.
+            version (str):   The version of the box file.
+            provider (str):  The provider of the box file.
+            payload (bytes): The contents of the box file.
+        """
+        with self._lock:
+            self._revision += 1
+            box = self._boxes.setdefault(box_name, {'revision': 0, 'versions': {}})
+            box['revision'] = self._revision
+            box['versions'].setdefault(version, {})[provider] = {
+                'payload':       payload,
+                'etag':          '"%d"' % self._revision,
+                'last_modified': time.time()}
+
+    def get_box_file(self, box_name, version, provider):
+        """Get the contents of a stored box file.
+
+        Args:
+            box_name (str): The box name confirming to ``<username>/<name>``.
+            version (str):  The version of the box file.
+            provider (str): The provider of the box file.
+
+        Returns:
+            bytes: The contents of the box file or None if it does not exist.
+        """
+        entry = self.get_box_file_info(box_name, version, provider)
+        return entry['payload'] if entry is not None else None
+
+    def delete_box_file(self, box_name, version, provider):
+        """Delete a stored box file. Boxes and versions without box files are removed.
+
+        Args:
+            box_name (str): The box name confirming to ``<username>/<name>``.
+            version (str):  The version of the box file.
+            provider (str): The provider of the box file.
+
+        Returns:
+            bool: True if the box file existed.
+        """
+        with self._lock:
+            box = self._boxes.get(box_name)
+            providers = box['versions'].get(version, {}) if box is not None else {}
+            if provider not in providers:
+                return False
+
+            self._revision += 1
+            box['revision'] = self._revision
+            del providers[provider]
+            if not providers:
+                del box['versions'][version]
+            if not box['versions']:
+                del self._boxes[box_name]
+            return True
+
+    # pylint: disable=R0913
+    def add_synthetic_inventory(self, num_boxes, num_versions = 1,
+                                providers = ('virtualbox',), size = 0, prefix = 'synthetic'):
+        """Add boxes with generated versions and box files.
+
+        All box files share the same payload, so that large inventories only
+        need the memory of their metadata.
+
+        Args:
+            num_boxes (int):    The number of boxes named ``<prefix>/box<index>``.
+            num_versions (int): The number of versions ``1.0.<index>`` of each box.
+            providers (tuple):  The providers of each version.
+            size (int):         The size of each box file in bytes.
+            prefix (str):       The user name of the boxes.
+
+        Returns:
+            list: The names of the added boxes.
+        """
+        payload = bytes(range(256)) * (size // 256) + bytes(range(size % 256))
+        box_names = ["%s/box%d" % (prefix, index) for index in range(num_boxes)]
+        for box_name in box_names:
+            for version_index in range(num_versions):
+                for provider in providers:
+                    self.add_box_file(box_name, "1.0.%d" % version_index, provider, payload)
+        return box_names
+
+    def clear_request_log(self):
+        """Clear the log of the received requests."""
+        with self._lock:
+            del self.request_log[:]
+
+    def log_request(self, method, path):
+        """Record a received request.
+
+        Args:
+            method (str): The HTTP method of the request.
+            path (str):   The requested path.
+        """
+        with self._lock:
+            self.request_log.append((method, path))
+
+    def get_box_file_info(self, box_name, version, provider):
+        """Get the stored contents and validators of a box file.
+
+        Args:
+            box_name (str): The box name confirming to ``<username>/<name>``.
+            version (str):  The version of the box file.
+            provider (str): The provider of the box file.
+
+        Returns:
+            dict: The ``payload``, the ``etag`` and the ``last_modified`` timestamp
+            of the box file or None if it does not exist.
+        """
+        with self._lock:
+            box = self._boxes.get(box_name)
+            if box is None:
+                return None
+            return box['versions'].get(version, {}).get(provider)
+
+    def get_inventory_document(self):
+        """Get the inventory document.
+
+        Returns:
+            tuple: The document, its ETag and its modification time, that is None.
+        """
+        with self._lock:
+            document = {'boxes': list(self._boxes)}
+            return document, '"inventory-%d"' % self._revision, None
+
+    def get_box_document(self, box_name, base_url):
+        """Get the document of a box listing its versions and providers.
+
+        Args:
+            box_name (str): The box name confirming to ``<username>/<name>``.
+            base_url (str): The base URL used for the URLs of the box files.
+
+        Returns:
+            tuple: The document, its ETag and its modification time or None if
+            the box does not exist.
+        """
+        with self._lock:
+            box = self._boxes.get(box_name)
+            if box is None:
+                return None
+
+            versions = []
+            last_modified = 0.0
+            for version, providers in box['versions'].items():
+                entries = []
+                for provider, entry in providers.items():
+                    entries.append({'name': provider,
+                                    'url':  "%s/%s/%s/%s" % (base_url, box_name,
+                                                             version, provider)})
+                    last_modified = max(last_modified, entry['last_modified'])
+                versions.append({'version': version, 'providers': entries})
+
+            document = {'name': box_name, 'versions': versions}
+            return document, '"box-%d"' % box['revision'], last_modified
+
+
+# pylint: disable=C0103
+class _RequestHandler(http.server.BaseHTTPRequestHandler):
+    """Request handler of the :class:`VagrancyServer`."""
+
+    protocol_version = 'HTTP/1.1'
+
+    # The headers and the body are sent separately, so that Nagle's algorithm
+    # would delay each response until the client acknowledges the headers.
+    disable_nagle_algorithm = True
+
+    @property
+    def vagrancy_server(self):
+        """VagrancyServer: The server object holding the box files."""
+        return self.server.vagrancy_server
+
+    def do_GET(self):  # noqa: N802
+        """Serve the inventory, the data of a box or a box file."""
+        self._handle_get(send_body = True)
+
+    def do_HEAD(self):  # noqa: N802
+        """Serve the headers of the inventory, the data of a box or a box file."""
+        self._handle_get(send_body = False)
+
+    def do_PUT(self):  # noqa: N802
+        """Store an uploaded box file."""
+        self.vagrancy_server.log_request('PUT', self.path)
+        payload = self._read_body()
+        parts = self._get_box_file_parts()
+        self._delay()
+        if parts is None:
+            self._send_status(405)
+            return
+
+        self.vagrancy_server.add_box_file(*parts, payload)
+        self._send_status(201)
+
+    def do_DELETE(self):  # noqa: N802
+        """Delete a box file."""
+        self.vagrancy_server.log_request('DELETE', self.path)
+        parts = self._get_box_file_parts()
+        self._delay()
+        if parts is None:
+            self._send_status(405)
+            return
+
+        self._send_status(200 if self.vagrancy_server.delete_box_file(*parts) else 404)
+
+    def log_message(self, *_):
+        """Suppress the logging."""
+
+    def _handle_get(self, send_body):
+        """Serve a GET or HEAD request."""
+        server = self.vagrancy_server
+        server.log_request(self.command, self.path)
+        self._delay()
+
+        parts = self.path.strip('/').split('/')
+        if self.path == '/inventory':
+            self._send_document(*server.get_inventory_document(), send_body)
+        elif len(parts) == 2:
+            host = self.headers.get('Host', "%s:%d" % self.server.server_address[:2])
+            base_url = "http://%s" % host
+            result = server.get_box_document('/'.join(parts), base_url)
+            if result is None:
+                self._send_status(404)
+            else:
+                self._send_document(*result, send_body)
+        elif len(parts) == 4:
+            entry = server.get_box_file_info('/'.join(parts[:2]), parts[2], parts[3])
+            if entry is None:
+                self._send_status(404)
+            else:
+                self._send_box_file(entry, send_body)
+        else:
+            self._send_status(404)
+
+    def _send_document(self, document, etag, last_modified, send_body):
+        """Send a JSON document unless the client already has it."""
+        if self._is_not_modified(etag, last_modified):
+            self._send_status(304, {'ETag': etag})
+            return
+
+        body = json.dumps(document).encode('utf-8')
+        headers = {'Content-Type': 'application/json', 'ETag': etag}
+        if last_modified:
+            headers['Last-Modified'] = email.utils.formatdate(last_modified, usegmt = True)
+        self._send(200, headers, body, len(body), send_body)
+
+    def _send_box_file(self, entry, send_body):
+        """Send a box file or the requested byte range of it."""
+        payload = entry['payload']
+        headers = {'Content-Type':  'application/octet-stream',
+                   'Accept-Ranges': 'bytes',
+                   'ETag':          entry['etag'],
+                   'Last-Modified': email.utils.formatdate(entry['last_modified'],
+                                                           usegmt = True)}
+        if self._is_not_modified(entry['etag'], entry['last_modified']):
+            self._send_status(304, {'ETag': entry['etag']})
+            return
+
+        byte_range = self._get_byte_range(len(payload), entry['etag'])
+        if byte_range is None:
+            self._send(200, headers, memoryview(payload), len(payload), send_body)
+        elif byte_range is False:
+            headers['Content-Range'] = 'bytes */%d' % len(payload)
+            self._send(416, headers, b'', 0, send_body)
+        else:
+            start, end = byte_range
+            headers['Content-Range'] = 'bytes %d-%d/%d' % (start, end - 1, len(payload))
+            self._send(206, headers, memoryview(payload)[start:end], end - start, send_body)
+
+    def _get_byte_range(self, size, etag):
+        """Get the requested byte range.
+
+        Returns:
+            The tuple of the start and the end offset, None if the whole box file
+            is requested or False if the range can't be satisfied.
+        """
+        value = self.headers.get('Range')
+        if not value or not value.startswith('bytes=') or ',' in value:
+            return None
+        if self.headers.get('If-Range') not in (None, etag):
+            return None
+
+        first, _, last = value[len('bytes='):].partition('-')
+        try:
+            if first:
+                start = int(first)
+                end = min(int(last) + 1, size) if last else size
+            else:
+                start = max(0, size - int(last))
+                end = size
+        except ValueError:
+            return None
+
+        if start >= size or start >= end:
+            return False
+        return start, end
+
+    def _is_not_modified(self, etag, last_modified):
+        """Check the conditional request headers."""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match == '*'
+
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since and last_modified:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(last_modified) <= since
+        return False
+
+    def _send_status(self, status_code, headers = None):
+        """Send a response without a body."""
+        self._send(status_code, headers or {}, b'', 0, send_body = False)
+
+    # pylint: disable=R0913
+    def _send(self, status_code, headers, body, length, send_body):
+        """Send a response limited to the bandwidth of the server."""
+        self.send_response(status_code)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(length))
+        self.end_headers()
+
+        if send_body and length:
+            self._throttle(length,
+                           lambda offset, size: self.wfile.write(body[offset:offset + size]))
+
+    def _read_body(self):
+        """Read the request body sent with a Content-Length or a chunked encoding."""
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b''.join(chunks)
+
+        length = int(self.headers.get('Content-Length', 0))
+        body = bytearray(length)
+        view = memoryview(body)
+        self._throttle(length, lambda offset, size: self._read_into(view[offset:offset + size]))
+        return body
+
+    def _read_into(self, view):
+        """Read the request body into the whole given buffer.
+
+        Raises:
+            IOError: If the client closed the connection too early.
+        """
+        position = 0
+        while position < len(view):
+            num_read = self.rfile.readinto(view[position:])
+            if not num_read:
+                raise IOError("Connection closed after %d of %d bytes!" % (position, len(view)))
+            position += num_read
+
+    def _throttle(self, length, transfer):
+        """Transfer the given number of bytes in blocks limited to the bandwidth.
+
+        Args:
+            length (int):        The number of bytes to transfer.
+            transfer (callable): The function called with the offset and the size
+                                 of each block.
+        """
+        bandwidth = self.vagrancy_server.bandwidth
+        block_size = length if not bandwidth else _BLOCK_SIZE
+        start = time.monotonic()
+        for offset in range(0, length, block_size):
+            size = min(block_size, length - offset)
+            if bandwidth:
+                delay = (offset + size) / bandwidth - (time.monotonic() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            transfer(offset, size)
+
+    def _get_box_file_parts(self):
+        """Get the box name, version and provider of the path or None."""
+        parts = self.path.strip('/').split('/')
+        if len(parts) != 4:
+            return None
+        return '/'.join(parts[:2]), parts[2], parts[3]
+
+    def _delay(self):
+        """Wait for the latency of the server."""
+        if self.vagrancy_server.latency > 0:
+            time.sleep(self.vagrancy_server.latency)
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+Asynchronous interface to a vagrancy instance.
+
+This package provides the asyncio based counterparts of the classes of the
+:mod:`vagrancy` package:
+
+  - :class:`vagrancy.aio.client.AsyncVagrancy` for :class:`vagrancy.client.Vagrancy`,
+  - :class:`vagrancy.aio.box.AsyncBox` for :class:`vagrancy.box.Box` and
+  - :class:`vagrancy.aio.box_file.AsyncBoxFile` for :class:`vagrancy.box_file.BoxFile`.
+
+The classes use the aiohttp_ package that is installed by the ``aio`` extra of
+the vagrancyCtrl distribution, e.g., ``pip install vagrancyCtrl[aio]``. They
+take the URL, version and pattern logic from the synchronous classes, so
+importing this package also imports requests and urllib3, that are required
+by vagrancyCtrl in any case. No requests are sent using them. All
+objects created by a single :class:`AsyncVagrancy` object share one
+:class:`aiohttp.ClientSession`, so that connections are reused.
+
+Copyright:
+    2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+
+    All rights reserved.
+
+    This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+    and is released under the "BSD 3-Clause License". Please see the ``LICENSE`` file
+    that is included as part of this package.
+
+.. _aiohttp: https://docs.aiohttp.org
+"""
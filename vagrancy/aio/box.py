@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""
+Asynchronous representation of a vagrant box stored on a vagrancy server.
+
+This module specifies the class :class:`AsyncBox` that is the asyncio
+counterpart of :class:`vagrancy.box.Box`.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+from .box_file import AsyncBoxFile
+from ..box     import Box
+
+
+# -----------------------------------------------------------------------------
+# Class Definitions
+# -----------------------------------------------------------------------------
+class AsyncBox:
+    """Asynchronous representation of a vagrant box.
+
+    The version and pattern logic is taken from a :class:`vagrancy.box.Box`
+    object that only holds the box data and is never used for requests. In
+    contrast to the synchronous class, the box data is not retrieved by the
+    constructor. Use the coroutine :meth:`create` to get a new box with its
+    data retrieved from the server.
+
+    Attributes:
+        box_name (str): The box name confirming to ``<username>/<name>``.
+    """
+
+    __slots__ = ('_session', '_box', 'box_name')
+
+    # pylint: disable=R0913
+    def __init__(self, server_url, box_name, box_data, provider_pattern = "*", session = None):
+        """Create a new AsyncBox object from already retrieved box data.
+
+        Args:
+            server_url (str):                The base URL of the vagrancy server.
+            box_name (str):                  The box name confirming to ``<username>/<name>``.
+            box_data (dict):                 The JSON data of the box.
+            provider_pattern (str):          A pattern to select matching providers.
+            session (aiohttp.ClientSession): The session to use.
+
+        Raises:
+            ValueError: If the `box_name` does not confirm to ``<username>/<name>``.
+        """
+        self._session = session
+        self._box = _BoxIndex(server_url, box_name, provider_pattern, session = session,
+                              box_data = box_data)
+        self.box_name = box_name
+
+    @classmethod
+    async def create(cls, server_url, box_name, session, provider_pattern = "*"):
+        """Create a new AsyncBox object and retrieve its data from the server.
+
+        Args:
+            server_url (str):                The base URL of the vagrancy server.
+            box_name (str):                  The box name confirming to ``<username>/<name>``.
+            session (aiohttp.ClientSession): The session to use.
+            provider_pattern (str):          A pattern to select matching providers.
+
+        Returns:
+            AsyncBox: The new box object.
+
+        Raises:
+            ValueError: If the `box_name` does not confirm to ``<username>/<name>``.
+            aiohttp.ClientResponseError: Raised if the server responds with an
+                error other than 404.
+        """
+        box = cls(server_url, box_name, {'versions': []}, provider_pattern, session)
+        await box.retrieve_box_data(provider_pattern)
+        return box
+
+    def get_url(self):
+        """Get the URL of the box data.
+
+        Returns:
+            str: The URL of the box data.
+        """
+        return self._box.get_url()
+
+    async def retrieve_box_data(self, provider_pattern = "*"):
+        """Retrieve the versions and providers of the box from the server.
+
+        If the box does not exist on the server, the box is empty.
+
+        Raises:
+            aiohttp.ClientResponseError: Raised if the server responds with an
+                error other than 404.
+        """
+        async with self._session.get(self.get_url()) as response:
+            if response.status == 404:
+                response_data = {'versions': []}
+            else:
+                response.raise_for_status()
+                response_data = await response.json(content_type = None)
+        self.set_box_data(response_data, provider_pattern)
+
+    def set_box_data(self, response_data, provider_pattern = "*"):
+        """Set the versions and providers of the box from the retrieved JSON data.
+
+        Args:
+            response_data (dict):   The JSON data of the box as returned by the server.
+            provider_pattern (str): A pattern to select matching providers.
+        """
+        self._box.set_box_data(response_data, provider_pattern)
+
+    @property
+    def version_provider_map(self):
+        """map: The AsyncBoxFile objects indexed by version and provider."""
+        return self._box.version_provider_map
+
+    @property
+    def provider_version_map(self):
+        """map: The AsyncBoxFile objects indexed by provider and version."""
+        return self._box.provider_version_map
+
+    @property
+    def provider_latest_versions(self):
+        """map: The latest version of each provider."""
+        return self._box.provider_latest_versions
+
+    @property
+    def provider_next_versions(self):
+        """map: The next version of each provider or None if it can't be determined."""
+        return self._box.provider_next_versions
+
+    @property
+    def provider_sorted_versions(self):
+        """map: The versions of each provider sorted from the latest to the oldest version."""
+        return self._box.provider_sorted_versions
+
+    def get_filtered_box_files(self, version_pattern = "*", provider_pattern = "*"):
+        """Get a list of filtered AsyncBoxFile objects.
+
+        See :meth:`vagrancy.box.Box.get_filtered_box_files` for the patterns.
+
+        Returns:
+            list: A list of matching AsyncBoxFile objects.
+        """
+        return self._box.get_filtered_box_files(version_pattern, provider_pattern)
+
+    def to_dict(self):
+        """Get the versions, providers and URLs of the box as a JSON serializable dict.
+
+        See :meth:`vagrancy.box.Box.to_dict` for the format.
+
+        Returns:
+            dict: The ``name`` of the box and the list of its ``providers``.
+        """
+        return self._box.to_dict()
+
+    def is_empty(self):
+        """Check if the list of boxes is empty.
+
+        Returns:
+            bool: True if the list of boxes is empty.
+        """
+        return self._box.is_empty()
+
+
+class _BoxIndex(Box):
+    """Box data of an :class:`AsyncBox` creating AsyncBoxFile objects."""
+
+    __slots__ = ()
+
+    def _create_box_file(self, version, provider):
+        """Create a new box file object of this box.
+
+        Args:
+            version (str):  The version of the box file.
+            provider (str): The provider of the box file.
+
+        Returns:
+            AsyncBoxFile: The new box file object sharing the session of this box.
+        """
+        return AsyncBoxFile(self._server_url, self.box_name, version, provider, self._session)
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""
+Asynchronous representation of a specific box file.
+
+This module specifies the class :class:`AsyncBoxFile` that is the asyncio
+counterpart of :class:`vagrancy.box_file.BoxFile`.
+
+Attributes:
+    DOWNLOAD_CHUNK_SIZE (int): The size of the chunks read from the download stream.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import asyncio
+import os
+import sys
+
+from ..box_file import BoxFile
+from ..transfer import PART_SUFFIX, write_all
+
+
+# -----------------------------------------------------------------------------
+# Module Variables
+# -----------------------------------------------------------------------------
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+# -----------------------------------------------------------------------------
+# Class Definitions
+# -----------------------------------------------------------------------------
+class AsyncBoxFile:
+    """Asynchronous representation of a specific box.
+
+    The methods :meth:`upload`, :meth:`download` and :meth:`delete` are
+    coroutines. The URL and path logic is taken from a
+    :class:`vagrancy.box_file.BoxFile` object that is never used for requests,
+    so none of its blocking methods are available on this class.
+
+    Attributes:
+        box_name (str): The box name confirming to ``<username>/<name>``.
+        version (str):  The version of the box.
+        provider (str): The provider, e.g., ``virtualbox``.
+    """
+
+    __slots__ = ('_session', '_box_file', 'box_name', 'version', 'provider')
+
+    # pylint: disable=R0913
+    def __init__(self, server_url, box_name, version, provider, session):
+        """Create a new AsyncBoxFile object.
+
+        Args:
+            server_url (str):              The base URL of the vagrancy server.
+            box_name (str):                The box name confirming to ``<username>/<name>``.
+            version (str):                 The version of the box.
+            provider (str):                The provider, e.g., ``virtualbox``.
+            session (aiohttp.ClientSession): The session to use.
+
+        Raises:
+            ValueError: If the `box_name` does not confirm to ``<username>/<name>``.
+        """
+        self._session = session
+        self._box_file = BoxFile(server_url, box_name, version, provider, session = session)
+        self.box_name = box_name
+        self.version = version
+        self.provider = provider
+
+    def __eq__(self, other):
+        """Check if both objects represent the same box file on the same server."""
+        if not isinstance(other, AsyncBoxFile):
+            return NotImplemented
+        return self._box_file == other._box_file
+
+    def __hash__(self):
+        """Get the hash value of the server URL, box name, version and provider."""
+        return hash(self._box_file)
+
+    def __repr__(self):
+        """Get the representation of the object."""
+        return "AsyncBoxFile(%r)" % self.get_url()
+
+    def get_url(self):
+        """Get the URL of the box.
+
+        Returns:
+            str: The URL of the box.
+        """
+        return self._box_file.get_url()
+
+    def get_local_path(self, directory):
+        """Get the path of the box file in a local directory tree.
+
+        The box files are organized as ``<directory>/<username>/<name>/<version>/<provider>.box``.
+
+        Args:
+            directory (str): The base directory.
+
+        Returns:
+            str: The path of the box file.
+        """
+        return self._box_file.get_local_path(directory)
+
+    async def upload(self, box_file):
+        """Upload a box file.
+
+        Args:
+            box_file (str):   The path to the box file to upload.
+
+        Returns:
+            bool: Returns True on success, otherwise False.
+
+        Raises:
+            aiohttp.ClientConnectionError: Raised if the base URL can not be reached.
+        """
+        headers = {'content-type': 'application/x-www-form-urlencoded'}
+
+        with open(box_file, 'rb') as payload:
+            async with self._session.put(self.get_url(), data=payload,
+                                         headers=headers) as response:
+                return response.status == 201
+
+    async def download(self, box_file):
+        """Download a box file.
+
+        The chunks are written by the default executor of the event loop, so
+        slow disks or pipes do not block the event loop. A box file is written
+        to a ``.part`` file first, that is renamed to the target file once the
+        download is complete. If the download fails or is cancelled, the
+        ``.part`` file is removed.
+
+        Args:
+            box_file (str):   The path to the box file to download to or '-' to
+                              write it to stdout.
+
+        Returns:
+            bool: Returns True on success, otherwise False.
+
+        Raises:
+            aiohttp.ClientConnectionError: Raised if the base URL can not be reached.
+        """
+        loop = asyncio.get_event_loop()
+
+        async with self._session.get(self.get_url()) as response:
+            if response.status != 200:
+                return False
+
+            if box_file == '-':
+                await self._write_chunks(loop, response, sys.stdout.fileno())
+                return True
+
+            part_file = box_file + PART_SUFFIX
+            file_descriptor = await loop.run_in_executor(
+                None, os.open, part_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+            try:
+                try:
+                    await self._write_chunks(loop, response, file_descriptor)
+                finally:
+                    os.close(file_descriptor)
+            except BaseException:
+                os.remove(part_file)
+                raise
+
+        await loop.run_in_executor(None, os.replace, part_file, box_file)
+        return True
+
+    @staticmethod
+    async def _write_chunks(loop, response, file_descriptor):
+        """Write the body of the response to the file descriptor using the executor.
+
+        Args:
+            loop (asyncio.AbstractEventLoop): The running event loop.
+            response (aiohttp.ClientResponse): The response of the download.
+            file_descriptor (int):            The file descriptor to write to.
+        """
+        async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+            await loop.run_in_executor(None, write_all, file_descriptor, memoryview(chunk))
+
+    async def delete(self):
+        """Delete the box.
+
+        Returns:
+            bool: Returns True on success, otherwise False.
+
+        Raises:
+            aiohttp.ClientConnectionError: Raised if the base URL can not be reached.
+        """
+        async with self._session.delete(self.get_url()) as response:
+            return response.status == 200
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
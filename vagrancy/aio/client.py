@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""
+Asynchronous client for accessing a vagrancy server.
+
+This module specifies the client class :class:`AsyncVagrancy` that is the
+asyncio counterpart of :class:`vagrancy.client.Vagrancy`.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import asyncio
+import fnmatch
+
+import aiohttp
+
+from .box       import AsyncBox
+from .box_file  import AsyncBoxFile
+from ..defaults import DEFAULT_CONCURRENCY, DEFAULT_POOL_SIZE
+
+
+# -----------------------------------------------------------------------------
+# Class Definitions
+# -----------------------------------------------------------------------------
+class AsyncVagrancy:
+    """This class represents an asynchronous interface to a Vagrancy server.
+
+    The object owns an :class:`aiohttp.ClientSession` that is passed down to
+    all :class:`AsyncBox` and :class:`AsyncBoxFile` objects created by it. The
+    session is created on first use, so the object can be created outside of
+    a running event loop. Use the object as an asynchronous context manager or
+    call :meth:`close` to release the connections.
+    """
+
+    def __init__(self, server_url, session = None,
+                 pool_size = DEFAULT_POOL_SIZE,
+                 keep_alive = True,
+                 concurrency = DEFAULT_CONCURRENCY):
+        """Create a new AsyncVagrancy object using the specified base URL.
+
+        Args:
+            server_url (str):                The base URL of the vagrancy.
+            session (aiohttp.ClientSession): The session to use. If not specified, a
+                                             new session is created using the
+                                             following settings.
+            pool_size (int):                 The maximum number of pooled connections.
+            keep_alive (bool):               If False, connections are not reused.
+            concurrency (int):               The maximum number of box data requests
+                                             performed concurrently.
+        """
+        self._server_url = server_url
+        self._session = session
+        self._owns_session = session is None
+        self._pool_size = pool_size
+        self._keep_alive = keep_alive
+        self._concurrency = max(1, concurrency)
+
+    async def __aenter__(self):
+        """Enter the context of this object.
+
+        Returns:
+            AsyncVagrancy: This object.
+        """
+        return self
+
+    async def __aexit__(self, *_):
+        """Leave the context of this object and close the session."""
+        await self.close()
+
+    def _get_session(self):
+        """Get the session and create it if required.
+
+        Returns:
+            aiohttp.ClientSession: The session object.
+        """
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit = max(self._pool_size, self._concurrency),
+                                             force_close = not self._keep_alive)
+            self._session = aiohttp.ClientSession(connector = connector)
+        return self._session
+
+    async def close(self):
+        """Close the session if it is owned by this object."""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def get_box(self, box_name, provider_pattern = '*'):
+        """Get a single box sharing the session of this object.
+
+        Args:
+            box_name (str):         The box name confirming to ``<username>/<name>``.
+            provider_pattern (str): A pattern to select matching providers.
+
+        Returns:
+            AsyncBox: The box object.
+        """
+        return await AsyncBox.create(self._server_url, box_name, self._get_session(),
+                                     provider_pattern)
+
+    def get_box_file(self, box_name, version, provider):
+        """Get a single box file sharing the session of this object.
+
+        Args:
+            box_name (str): The box name confirming to ``<username>/<name>``.
+            version (str):  The version of the box.
+            provider (str): The provider, e.g., ``virtualbox``.
+
+        Returns:
+            AsyncBoxFile: The box file object.
+        """
+        return AsyncBoxFile(self._server_url, box_name, version, provider, self._get_session())
+
+    async def get_boxes(self, pattern = '*', provider_pattern = '*'):
+        """Get a list of all available boxes.
+
+        The data of the boxes is retrieved concurrently using up to `concurrency`
+        requests at a time. The returned list keeps the order of the inventory.
+
+        Args:
+            pattern (str): A file name pattern to limit the boxes to
+            return.
+            provider_pattern (str): A pattern to limit the boxes to
+            return to include only the matching providers.
+
+        Returns:
+            list: A list of all available boxes as AsyncBox objects.
+
+        Raises:
+            ConnectionRefusedError: Raised if the remote URL has no
+                ``/inventory`` API hook.
+            aiohttp.ClientConnectionError: Raised if the base URL can
+                not be reached.
+            aiohttp.ClientResponseError: Raised if the server responds with an
+                error other than 404.
+        """
+        filtered_box_names = fnmatch.filter(await self.inventory(), pattern)
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        async def get_box_limited(box_name):
+            async with semaphore:
+                return await self.get_box(box_name, provider_pattern)
+
+        boxes = await asyncio.gather(*[get_box_limited(box_name)
+                                       for box_name in filtered_box_names])
+        return [box for box in boxes if not box.is_empty()]
+
+    async def inventory(self):
+        """Get a list of all available boxes.
+
+        Returns:
+            list: A list of all available boxes.
+
+        Raises:
+            ConnectionRefusedError: Raised if the remote URL has no
+                ``/inventory`` API hook.
+            aiohttp.ClientConnectionError: Raised if the base URL can
+                not be reached.
+            aiohttp.ClientResponseError: Raised if the server responds with an
+                error other than 404.
+        """
+        async with self._get_session().get("%s/inventory" % self._server_url) as response:
+            if response.status == 404:
+                raise ConnectionRefusedError("Vagrancy server at %s does not support "
+                                             "the /inventory API hook!" % self._server_url)
+            response.raise_for_status()
+
+            response_data = await response.json(content_type = None)
+
+        if 'boxes' not in response_data:
+            return []
+
+        return response_data['boxes']
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
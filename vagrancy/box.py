@@ -20,9 +20,12 @@ providers.
 # -----------------------------------------------------------------------------
 import fnmatch
 
-import requests
-
-from .box_file import BoxFile
+from .box_file       import BoxFile
+from .lazy_map       import LazyMap
+from .metadata_cache import get_json
+from .session        import create_session
+from .tracer         import span
+from .version        import Version, sort_versions
 
 
 # -----------------------------------------------------------------------------
@@ -34,47 +37,104 @@ class Box:
     This class represents a specific box identified by a name, with a specific
     version and a specific provider.
 
+    The box data is kept as a compact index of the versions of each provider.
+    The BoxFile objects and the derived maps are only created when they are
+    accessed, so listing the names of many boxes does not create any BoxFile.
+
     Attributes:
-        _server_url (str):          The vagrancy server base URL.
-        box_name (str):             The box name confirming to ``<username>/<name>``.
-        version_provider_map (map): A map with BoxFile entries. The indexing scheme
-                                    is version_provider_map[version][provider].
-        provider_version_map (map): A map with BoxFile entries. The indexing scheme
-                                    provider_version_map[provider][version].
+        _server_url (str):               The vagrancy server base URL.
+        _session (requests.Session):     The HTTP session used for all requests.
+        _download_cache (DownloadCache): The optional cache of downloaded box files.
+        _metadata_cache (MetadataCache): The optional cache of the box metadata.
+        _index (dict):                   The tuple of versions of each provider in the
+                                         order of the box data.
+        _box_files (dict):               The already created BoxFile objects indexed
+                                         by version and provider.
+        box_name (str):                  The box name confirming to ``<username>/<name>``.
+        version_provider_map (map):      A map with BoxFile entries. The indexing scheme
+                                         is version_provider_map[version][provider].
+        provider_version_map (map):      A map with BoxFile entries. The indexing scheme
+                                         provider_version_map[provider][version].
+        provider_latest_versions (map):  A map with the latest version of each provider.
+        provider_next_versions (map):    A map with the next version of each provider or
+                                         None if it can't be determined.
+        provider_sorted_versions (map):  A map with the versions of each provider sorted
+                                         from the latest to the oldest version.
     """
 
-    def __init__(self, server_url, box_name, provider_pattern = "*"):
+    __slots__ = ('_server_url', '_session', '_download_cache', '_metadata_cache', '_index',
+                 '_box_files', '_version_provider_map', '_provider_version_map',
+                 '_provider_latest_versions', '_provider_next_versions',
+                 '_provider_sorted_versions', 'box_name')
+
+    # pylint: disable=R0913
+    def __init__(self, server_url, box_name, provider_pattern = "*", session = None,
+                 box_data = None, download_cache = None, metadata_cache = None):
         """Create a new Box object.
 
         Args:
-            server_url (str):        The base URL of the vagrancy server.
-            box_name (str):          The box name confirming to ``<username>/<name>``.
-            provider_pattern (str):  A pattern to select matching providers.
+            server_url (str):               The base URL of the vagrancy server.
+            box_name (str):                 The box name confirming to ``<username>/<name>``.
+            provider_pattern (str):         A pattern to select matching providers.
+            session (requests.Session):     The session to use. If not specified, a new
+                                            session is created.
+            box_data (dict):                The already retrieved JSON data of the box. If
+                                            not specified, it is retrieved from the server.
+            download_cache (DownloadCache): The cache of downloaded box files used by the
+                                            box files. If not specified, downloads are
+                                            not cached.
+            metadata_cache (MetadataCache): The cache of the box metadata. If not
+                                            specified, the metadata is not cached.
 
         Raises:
             ValueError: If the `box_name` does not confirm to ``<username>/<name>``.
         """
         self._server_url = server_url
+        self._session = session if session is not None else create_session()
+        self._download_cache = download_cache
+        self._metadata_cache = metadata_cache
         self.box_name = box_name
-        self.version_provider_map = {}
-        self.provider_version_map = {}
-
-        self.provider_latest_versions = {}
-        self.provider_next_versions   = {}
+        self._set_index({})
 
         if self.box_name.count('/') != 1:
             raise ValueError("The argument box_name must contain exactly one '/'!")
 
-        self.retrieve_box_data(provider_pattern)
+        if box_data is None:
+            self.retrieve_box_data(provider_pattern)
+        else:
+            self.set_box_data(box_data, provider_pattern)
+
+    def get_url(self):
+        """Get the URL of the box data.
+
+        Returns:
+            str: The URL of the box data.
+        """
+        return "%s/%s" % (self._server_url, self.box_name)
 
     def retrieve_box_data(self, provider_pattern = "*"):
-        """Retrieve the versions and providers of the box from the server."""
-        response = requests.get("%s/%s" % (self._server_url, self.box_name))
-        response_data = response.json()
+        """Retrieve the versions and providers of the box from the server.
+
+        If the box does not exist on the server, the box is empty.
 
-        self.version_provider_map = {}
-        self.provider_version_map = {}
+        Raises:
+            requests.exceptions.HTTPError: Raised if the server responds with an
+                error other than 404.
+        """
+        with span("retrieve_box", box = self.box_name):
+            _, response_data = get_json(self._session, self.get_url(), self._metadata_cache)
+        if response_data is None:
+            response_data = {'versions': []}
+        self.set_box_data(response_data, provider_pattern)
+
+    def set_box_data(self, response_data, provider_pattern = "*"):
+        """Set the versions and providers of the box from the retrieved JSON data.
 
+        Args:
+            response_data (dict):   The JSON data of the box as returned by the server.
+            provider_pattern (str): A pattern to select matching providers.
+        """
+        index = {}
         for version_entry in response_data['versions']:
             version = version_entry['version']
 
@@ -82,32 +142,122 @@ class Box:
                 provider = provider_entry['name']
 
                 if fnmatch.fnmatch(provider, provider_pattern):
-                    box_file = BoxFile(self._server_url, self.box_name, version, provider)
+                    index.setdefault(provider, {}).setdefault(version, None)
+
+        self._set_index({provider: tuple(versions) for provider, versions in index.items()})
+
+    def _set_index(self, index):
+        """Set the index of the versions and reset all derived data.
+
+        Args:
+            index (dict): The tuple of versions of each provider.
+        """
+        self._index = index
+        self._box_files = {}
+        self._version_provider_map = None
+        self._provider_version_map = None
+        self._provider_latest_versions = None
+        self._provider_next_versions = None
+        self._provider_sorted_versions = None
+
+    @property
+    def version_provider_map(self):
+        """map: The BoxFile objects indexed by version and provider."""
+        if self._version_provider_map is None:
+            version_index = {}
+            for provider, versions in self._index.items():
+                for version in versions:
+                    version_index.setdefault(version, []).append(provider)
+
+            self._version_provider_map = LazyMap(
+                version_index,
+                lambda version: {provider: self._get_box_file(version, provider)
+                                 for provider in version_index[version]})
+        return self._version_provider_map
+
+    @property
+    def provider_version_map(self):
+        """map: The BoxFile objects indexed by provider and version."""
+        if self._provider_version_map is None:
+            self._provider_version_map = LazyMap(
+                self._index,
+                lambda provider: {version: self._get_box_file(version, provider)
+                                  for version in self._index[provider]})
+        return self._provider_version_map
+
+    @property
+    def provider_latest_versions(self):
+        """map: The latest version of each provider."""
+        if self._provider_latest_versions is None:
+            self._provider_latest_versions = LazyMap(
+                self._index,
+                lambda provider: self.provider_sorted_versions[provider][0])
+        return self._provider_latest_versions
+
+    @property
+    def provider_next_versions(self):
+        """map: The next version of each provider or None if it can't be determined."""
+        if self._provider_next_versions is None:
+            self._provider_next_versions = LazyMap(self._index, self._get_next_version)
+        return self._provider_next_versions
+
+    @property
+    def provider_sorted_versions(self):
+        """map: The versions of each provider sorted from the latest to the oldest version.
+
+        The versions of a provider are sorted once per box data, so the sort key
+        of each version is only computed once. The latest versions are taken from
+        this map as well.
+        """
+        if self._provider_sorted_versions is None:
+            self._provider_sorted_versions = LazyMap(
+                self._index,
+                lambda provider: sort_versions(self._index[provider], reverse = True))
+        return self._provider_sorted_versions
 
-                    self.version_provider_map.setdefault(version, {}).setdefault(provider, box_file)
-                    self.provider_version_map.setdefault(provider, {}).setdefault(version, box_file)
+    def _get_next_version(self, provider):
+        """Get the version following the latest version of the provider.
 
-        self.provider_latest_versions = {}
-        self.provider_next_versions   = {}
+        Args:
+            provider (str): The provider.
 
-        for provider in self.provider_version_map:
-            all_versions = list(self.provider_version_map[provider].keys())
+        Returns:
+            str: The next version or None if it can't be determined.
+        """
+        next_version = Version(self.provider_latest_versions[provider]).next()
+        return str(next_version) if next_version else None
+
+    def _get_box_file(self, version, provider):
+        """Get the box file object of a version and provider contained in the index.
+
+        The object is created on the first access only.
+
+        Args:
+            version (str):  The version of the box file.
+            provider (str): The provider of the box file.
 
-            # Sort all versions assuming they are integers separated by dots.
-            # If that does not work, use a lexical sort.
-            try:
-                all_versions.sort(reverse = True, key=lambda s: list(map(int, s.split('.'))))
+        Returns:
+            BoxFile: The box file object.
+        """
+        key = (version, provider)
+        box_file = self._box_files.get(key)
+        if box_file is None:
+            box_file = self._box_files[key] = self._create_box_file(version, provider)
+        return box_file
 
-                split_version                         = all_versions[0].split('.')
-                split_version[-1]                     = str(int(split_version[-1]) + 1)
-                self.provider_next_versions[provider] = '.'.join(split_version)
+    def _create_box_file(self, version, provider):
+        """Create a new box file object of this box.
 
-            # pylint: disable=W0702
-            except:
-                all_versions.sort(reverse = True)
-                self.provider_next_versions[provider] = None
+        Args:
+            version (str):  The version of the box file.
+            provider (str): The provider of the box file.
 
-            self.provider_latest_versions[provider] = all_versions[0]
+        Returns:
+            BoxFile: The new box file object sharing the session of this box.
+        """
+        return BoxFile(self._server_url, self.box_name, version, provider,
+                       session = self._session, download_cache = self._download_cache,
+                       metadata_cache = self._metadata_cache)
 
     def get_filtered_box_files(self, version_pattern = "*", provider_pattern = "*"):
         """Get a list of filtered BoxFile objects.
@@ -126,14 +276,14 @@ class Box:
             other string literals.
         """
         box_list = []
-        matching_providers = fnmatch.filter(self.provider_version_map.keys(), provider_pattern)
+        matching_providers = fnmatch.filter(self._index.keys(), provider_pattern)
 
         for provider in matching_providers:
-            all_versions = list(self.provider_version_map[provider].keys())
+            all_versions = self._index[provider]
 
             if version_pattern == '-1':
-                matching_versions = [i for i in all_versions
-                                     if i != self.provider_latest_versions[provider]]
+                latest_version = self.provider_latest_versions[provider]
+                matching_versions = [i for i in all_versions if i != latest_version]
             elif version_pattern == '+1':
                 matching_versions = [self.provider_latest_versions[provider]]
             else:
@@ -141,17 +291,49 @@ class Box:
                                                    version_pattern)
 
             for version in matching_versions:
-                box_list.append(self.provider_version_map[provider][version])
+                box_list.append(self._get_box_file(version, provider))
 
         return box_list
 
+    def to_dict(self):
+        """Get the versions, providers and URLs of the box as a JSON serializable dict.
+
+        Returns:
+            dict: The ``name`` of the box and the list of its ``providers``. Each
+            provider entry contains its ``name``, the ``latest_version``, the
+            ``next_version``, the ``download_url`` of the latest version, the
+            ``upload_url`` of the next version and the list of ``versions`` with
+            their ``version`` and ``url``, sorted from the latest to the oldest.
+            Unknown next versions and their upload URLs are None.
+        """
+        providers = []
+        for provider in sorted(self._index):
+            latest_version = self.provider_latest_versions[provider]
+            next_version = self.provider_next_versions[provider]
+            providers.append({
+                'name':           provider,
+                'latest_version': latest_version,
+                'next_version':   next_version,
+                'download_url':   self._get_box_file_url(latest_version, provider),
+                'upload_url':     (self._get_box_file_url(next_version, provider)
+                                   if next_version is not None else None),
+                'versions':       [{'version': version,
+                                    'url':     self._get_box_file_url(version, provider)}
+                                   for version in self.provider_sorted_versions[provider]]})
+
+        return {'name': self.box_name, 'providers': providers}
+
+    def _get_box_file_url(self, version, provider):
+        """Get the URL of a box file without creating the box file object."""
+        return "%s/%s/%s" % (self.get_url(), version, provider)
+
     def is_empty(self):
         """Check if the list of boxes is empty.
 
         Returns:
             bool: True if the list of boxes is empty.
         """
-        return len(self.provider_version_map) == 0
+        return len(self._index) == 0
 
 
 # -----------------------------------------------------------------------------
@@ -20,7 +20,13 @@ identified by a name, at a specific version and for a specific provider.
 import os
 import sys
 
-import requests
+from .         import instrumentation
+from .defaults import DEFAULT_BUFFER_SIZE, DEFAULT_CHUNK_SIZE, DEFAULT_RETRIES
+from .pipe     import Pipe
+from .session  import create_session
+from .tracer   import span
+from .transfer import copy_stream, download_file, download_file_segmented
+from .transfer import get_body_reader, get_total_size
 
 
 # -----------------------------------------------------------------------------
@@ -33,25 +39,42 @@ class BoxFile:
     version and a specific provider.
 
     Attributes:
-        _server_url (str): The vagrancy server base URL.
-        box_name (str):    The box name confirming to ``<username>/<name>``.
-        version (str):     The version of the box.
-        provider (str):    The provider, e.g., ``virtualbox``.
+        _server_url (str):               The vagrancy server base URL.
+        _session (requests.Session):     The HTTP session used for all requests.
+        _download_cache (DownloadCache): The optional cache of downloaded box files.
+        _metadata_cache (MetadataCache): The optional cache of the box metadata.
+        box_name (str):                  The box name confirming to ``<username>/<name>``.
+        version (str):                   The version of the box.
+        provider (str):                  The provider, e.g., ``virtualbox``.
     """
 
-    def __init__(self, server_url, box_name, version, provider):
+    __slots__ = ('_server_url', '_session', '_download_cache', '_metadata_cache', 'box_name',
+                 'version', 'provider')
+
+    # pylint: disable=R0913
+    def __init__(self, server_url, box_name, version, provider, session = None,
+                 download_cache = None, metadata_cache = None):
         """Create a new Box object.
 
         Args:
-            server_url (str): The base URL of the vagrancy server.
-            box_name (str):   The box name confirming to ``<username>/<name>``.
-            version (str):    The version of the box.
-            provider (str):   The provider, e.g., ``virtualbox``.
+            server_url (str):               The base URL of the vagrancy server.
+            box_name (str):                 The box name confirming to ``<username>/<name>``.
+            version (str):                  The version of the box.
+            provider (str):                 The provider, e.g., ``virtualbox``.
+            session (requests.Session):     The session to use. If not specified, a new
+                                            session is created.
+            download_cache (DownloadCache): The cache of downloaded box files. If not
+                                            specified, downloads are not cached.
+            metadata_cache (MetadataCache): The cache of the box metadata that is
+                                            invalidated by uploads and deletions.
 
         Raises:
             ValueError: If the `box_name` does not confirm to ``<username>/<name>``.
         """
         self._server_url = server_url
+        self._session = session if session is not None else create_session()
+        self._download_cache = download_cache
+        self._metadata_cache = metadata_cache
         self.box_name = box_name
         self.version = version
         self.provider = provider
@@ -59,6 +82,24 @@ class BoxFile:
         if self.box_name.count('/') != 1:
             raise ValueError("The argument box_name must contain exactly one '/'!")
 
+    def __eq__(self, other):
+        """Check if both objects represent the same box file on the same server."""
+        if not isinstance(other, BoxFile):
+            return NotImplemented
+        return self._get_identity() == other._get_identity()
+
+    def __hash__(self):
+        """Get the hash value of the server URL, box name, version and provider."""
+        return hash(self._get_identity())
+
+    def __repr__(self):
+        """Get the representation of the object."""
+        return "BoxFile(%r)" % self.get_url()
+
+    def _get_identity(self):
+        """Get the tuple of the values identifying the box file."""
+        return self._server_url, self.box_name, self.version, self.provider
+
     def get_url(self):
         """Get the URL of the box.
 
@@ -68,6 +109,41 @@ class BoxFile:
         url = "%s/%s/%s/%s" % (self._server_url, self.box_name, self.version, self.provider)
         return url
 
+    def get_local_path(self, directory):
+        """Get the path of the box file in a local directory tree.
+
+        The box files are organized as ``<directory>/<username>/<name>/<version>/<provider>.box``.
+
+        Args:
+            directory (str): The base directory.
+
+        Returns:
+            str: The path of the box file.
+        """
+        return os.path.join(directory, *self.box_name.split('/'), self.version,
+                            self.provider + '.box')
+
+    def stat(self):
+        """Get the size and the validators of the box file on the server.
+
+        Returns:
+            dict: The ``size``, ``etag`` and ``last_modified`` values of the box
+            file or None if it does not exist. Unknown values are None.
+
+        Raises:
+            requests.exceptions.ConnectionError: Raised if the base URL can
+                not be reached.
+        """
+        with self._span("stat"):
+            response = self._session.head(self.get_url())
+        if response.status_code != 200:
+            return None
+
+        size = response.headers.get('content-length', '')
+        return {'size':          int(size) if size.isdigit() else None,
+                'etag':          response.headers.get('etag'),
+                'last_modified': response.headers.get('last-modified')}
+
     def upload(self, box_file):
         """Upload a box file.
 
@@ -77,23 +153,96 @@ class BoxFile:
         Returns:
             bool: Returns True on success, otherwise False.
 
+        Raises:
+            requests.exceptions.ConnectionError: Raised if the base URL can
+                not be reached.
+        """
+        with open(box_file, 'rb') as payload:
+            return self.upload_data(payload)
+
+    def upload_data(self, payload):
+        """Upload the box file contents given as a file object or an iterable.
+
+        Args:
+            payload: The file object or an iterable of bytes objects with a length,
+                     e.g., a :class:`vagrancy.pipe.Pipe` object.
+
+        Returns:
+            bool: Returns True on success, otherwise False.
+
         Raises:
             requests.exceptions.ConnectionError: Raised if the base URL can
                 not be reached.
         """
         url = self.get_url()
         headers = {'content-type': 'application/x-www-form-urlencoded'}
+        with self._span("upload"):
+            response = self._session.put(url, data=payload, headers=headers)
 
-        with open(box_file, 'rb') as payload:
-            response = requests.put(url, data=payload, headers=headers)
-
+        self._invalidate_metadata()
         return response.status_code == 201
 
-    def download(self, box_file):
+    # pylint: disable=R0913
+    def replicate(self, target, chunk_size = DEFAULT_CHUNK_SIZE,
+                  buffer_size = DEFAULT_BUFFER_SIZE, rate_limiter = None):
+        """Copy this box file to another server without writing it to disk.
+
+        The download of this box file is streamed through a bounded in-memory
+        :class:`vagrancy.pipe.Pipe` into the upload of the target box file.
+
+        Args:
+            target (BoxFile):           The box file to upload to.
+            chunk_size (int):           The size of the transferred chunks in bytes.
+            buffer_size (int):          The maximum number of buffered bytes.
+            rate_limiter (RateLimiter): The optional limit of the throughput.
+
+        Returns:
+            tuple: The success flag and the size of the box file in bytes.
+
+        Raises:
+            requests.exceptions.ConnectionError: Raised if one of the servers can
+                not be reached.
+        """
+        with self._span("replicate"), \
+                self._session.get(self.get_url(), stream=True) as response:
+            size = get_total_size(response)
+            if response.status_code != 200 or size is None:
+                return False, 0
+
+            pipe = Pipe(get_body_reader(response), size, chunk_size, buffer_size, rate_limiter)
+            try:
+                success = target.upload_data(pipe)
+            finally:
+                pipe.close()
+
+        return success, size
+
+    # pylint: disable=R0913
+    def download(self, box_file, chunk_size = DEFAULT_CHUNK_SIZE, retries = DEFAULT_RETRIES,
+                 segments = 1, rate_limiter = None):
         """Download a box file.
 
+        The box file is written to a file with the suffix ``.part`` first and
+        renamed once it is complete. An interrupted download is continued by
+        the next retry or the next call with the same `box_file`.
+
+        If more than one segment is requested, the box file is split into byte
+        ranges that are downloaded concurrently. If the server does not support
+        range requests, the box file is downloaded as a single stream.
+
+        If a download cache is used, the box file is downloaded into the cache
+        first. A cached box file is only used if the server confirms that it is
+        still valid.
+
         Args:
-            box_file (str):   The path to the box file to upload.
+            box_file (str):             The path to the box file to download to or '-' to
+                                        write it to stdout.
+            chunk_size (int):           The size of the transfer buffer in bytes.
+            retries (int):              The number of retries of interrupted downloads.
+            segments (int):             The number of concurrently downloaded byte ranges.
+                                        Ignored when writing to stdout.
+            rate_limiter (RateLimiter): The optional limit of the throughput that
+                                        can be shared by several downloads.
 
         Returns:
             bool: Returns True on success, otherwise False.
@@ -102,18 +251,91 @@ class BoxFile:
             requests.exceptions.ConnectionError: Raised if the base URL can
                 not be reached.
         """
+        with self._span("download"):
+            url = self.get_url()
+            if box_file == '-':
+                with self._session.get(url, stream=True) as response:
+                    copy_stream(get_body_reader(response), sys.stdout.fileno(), chunk_size,
+                                rate_limiter = rate_limiter)
+                return response.status_code == 200
+
+            if self._download_cache is not None:
+                return self._download_cached(box_file, chunk_size, retries, segments,
+                                             rate_limiter)
+
+            return self._download_file(box_file, chunk_size, retries, segments, rate_limiter)
+
+    # pylint: disable=R0913
+    def _download_file(self, box_file, chunk_size, retries, segments, rate_limiter,
+                       header_callback = None):
+        """Download the box file into a file without using the cache.
+
+        Args:
+            box_file (str):             The path to the box file to download to.
+            chunk_size (int):           The size of the transfer buffer in bytes.
+            retries (int):              The number of retries of interrupted downloads.
+            segments (int):             The number of concurrently downloaded byte ranges.
+            rate_limiter (RateLimiter): The optional limit of the throughput.
+            header_callback (callable): An optional function called with the headers of
+                                        the responses describing the downloaded contents.
+
+        Returns:
+            bool: Returns True on success, otherwise False.
+        """
+        if segments > 1:
+            return download_file_segmented(self._session, self.get_url(), box_file, segments,
+                                           chunk_size, retries, rate_limiter, header_callback)
+        return download_file(self._session, self.get_url(), box_file, chunk_size, retries,
+                             rate_limiter, header_callback)
+
+    # pylint: disable=R0913
+    def _download_cached(self, box_file, chunk_size, retries, segments, rate_limiter):
+        """Download the box file into a file using the cache.
+
+        An existing entry is validated by a conditional ``HEAD`` request. The
+        box file is only downloaded if there is no entry or the server reports
+        a different box file. The entry then stores the validators of the
+        responses the cached contents were taken from.
+
+        Args:
+            box_file (str):             The path to the box file to download to.
+            chunk_size (int):           The size of the transfer buffer in bytes.
+            retries (int):              The number of retries of interrupted downloads.
+            segments (int):             The number of concurrently downloaded byte ranges.
+            rate_limiter (RateLimiter): The optional limit of the throughput.
+
+        Returns:
+            bool: Returns True on success, otherwise False.
+        """
         url = self.get_url()
-        response = requests.get(url, stream=True)
+        cache = self._download_cache
 
-        if box_file == '-':
-            for chunk in response:
-                os.write(sys.stdout.fileno(), chunk)
-        else:
-            with open(box_file, 'wb') as payload:
-                for chunk in response:
-                    payload.write(chunk)
+        with cache.lock(url):
+            headers = cache.get_conditional_headers(url)
+            status_code = 200
+            if headers:
+                status_code = self._session.head(url, headers=headers).status_code
 
-        return response.status_code == 200
+            if status_code == 304:
+                instrumentation.notify_event('download_cache_hit', url)
+                cache.copy_to(url, box_file)
+                return True
+
+            instrumentation.notify_event('download_cache_miss', url)
+
+            if status_code != 200:
+                return False
+
+            response_headers = [{}]
+            if not self._download_file(cache.get_path(url), chunk_size, retries, segments,
+                                       rate_limiter, response_headers.append):
+                return False
+
+            cache.store(url, response_headers[-1])
+            cache.evict(keep_url = url)
+            cache.copy_to(url, box_file)
+
+        return True
 
     def delete(self):
         """Delete the box.
@@ -126,9 +348,20 @@ class BoxFile:
                 not be reached.
         """
         url = self.get_url()
-        response = requests.delete(url)
+        with self._span("delete"):
+            response = self._session.delete(url)
+        self._invalidate_metadata()
         return response.status_code == 200
 
+    def _span(self, name):
+        """Get a span of the tracer describing an operation on this box file."""
+        return span(name, box = self.box_name, version = self.version, provider = self.provider)
+
+    def _invalidate_metadata(self):
+        """Invalidate the cached metadata after a modification of the box."""
+        if self._metadata_cache is not None:
+            self._metadata_cache.invalidate_box(self._server_url, self.box_name)
+
 
 # -----------------------------------------------------------------------------
 # EOF
@@ -12,15 +12,22 @@
 # -----------------------------------------------------------------------------
 # Module Import
 # -----------------------------------------------------------------------------
+import os
 import sys
 
-import argcomplete
-
-from .parser_cmd_delete   import get_subparser_delete
-from .parser_cmd_download import get_subparser_download
-from .parser_cmd_print    import get_subparser_print
-from .parser_cmd_upload   import get_subparser_upload
-from .parser_main         import get_main_parser
+from .parser_cmd_delete    import get_subparser_delete
+from .parser_cmd_download  import get_subparser_download
+from .parser_cmd_print     import get_subparser_print
+from .parser_cmd_prune     import get_subparser_prune
+from .parser_cmd_replicate import get_subparser_replicate
+from .parser_cmd_sync      import get_subparser_sync
+from .parser_cmd_upload    import get_subparser_upload
+from .parser_main          import get_main_parser
+from ..instrumentation     import add_hook, remove_hook
+from ..metrics             import PrometheusMetrics
+from ..profiler            import Profiler
+from ..timing_report       import TimingReport
+from ..tracer              import Tracer, span, start_tracing, stop_tracing
 
 
 # -----------------------------------------------------------------------------
@@ -34,10 +41,13 @@ def get_parser():
         argparse.ArgumentParser: A new ArgumentParser object of the parser.
     """
     parser = get_main_parser()
-    subparsers = parser.add_subparsers()
+    subparsers = parser.add_subparsers(dest = "command")
     get_subparser_delete(subparsers)
     get_subparser_download(subparsers)
     get_subparser_print(subparsers)
+    get_subparser_prune(subparsers)
+    get_subparser_replicate(subparsers)
+    get_subparser_sync(subparsers)
     get_subparser_upload(subparsers)
     return parser
 
@@ -45,14 +55,64 @@ def get_parser():
 def vagrancy_ctrl_main():
     """Handle the vagrancyCtrl actions."""
     parser = get_parser()
-    argcomplete.autocomplete(parser)
+
+    # The argcomplete module is only needed if the shell requests a completion.
+    if '_ARGCOMPLETE' in os.environ:
+        import argcomplete  # pylint: disable=C0415
+        argcomplete.autocomplete(parser)
+
     args = parser.parse_args()
-    if hasattr(args, 'func'):
-        args.func(args)
-    else:
+    if not hasattr(args, 'func'):
         parser.print_help(sys.stderr)
         sys.exit(1)
 
+    timing_report = None
+    if args.timings:
+        timing_report = TimingReport()
+        add_hook(timing_report)
+
+    tracer = None
+    if args.trace:
+        tracer = Tracer()
+        start_tracing(tracer)
+
+    metrics = None
+    if args.metrics_file:
+        metrics = PrometheusMetrics(args.command)
+        add_hook(metrics)
+
+    exit_code = 1
+    try:
+        with span("vagrancyCtrl %s" % args.command, base_url = args.base_url), \
+                Profiler(args.profile_cpu, args.profile_mem, args.profile_top):
+            args.func(args)
+        exit_code = 0
+    except SystemExit as exception:
+        exit_code = _get_exit_code(exception)
+        raise
+    finally:
+        if timing_report is not None:
+            remove_hook(timing_report)
+            sys.stderr.write(timing_report.format())
+        if tracer is not None:
+            stop_tracing()
+            tracer.write(args.trace)
+        if metrics is not None:
+            remove_hook(metrics)
+            metrics.write(args.metrics_file, exit_code)
+
+
+# -----------------------------------------------------------------------------
+# Internal Functions
+# -----------------------------------------------------------------------------
+def _get_exit_code(exception):
+    """Get the exit code of the process exited by the SystemExit exception."""
+    if exception.code is None:
+        return 0
+    if isinstance(exception.code, int):
+        return exception.code
+    return 1
+
 
 # -----------------------------------------------------------------------------
 # EOF
@@ -19,7 +19,7 @@ Attributes:
 import argparse
 import sys
 
-from ..client   import Vagrancy
+from .parser_main import create_vagrancy
 
 
 # -----------------------------------------------------------------------------
@@ -43,6 +43,11 @@ Please note that the deletion is only performed when you specify the '--force'
 option. Otherwise, only the matching URLs are printed. This is a precaution to
 avoid unintentional deletion.
 
+The box files are deleted concurrently (see the '--concurrency' option of the
+main command). A failed deletion does not stop the deletion of the other box
+files. A summary is printed at the end and the return code is 1 if any deletion
+failed.
+
 Return codes:
  0 - Communication was successfull.
  1 - Communication failed.
@@ -59,30 +64,60 @@ def exec_delete_cmd(args):
     Args:
         args: The arguments object.
     """
-    vagrancy = Vagrancy(args.base_url)
+    vagrancy = create_vagrancy(args)
 
     box_list = vagrancy.get_boxes(args.box_name, args.provider)
     if len(box_list) == 0:
         print("ERROR: Found no matching boxes!")
         sys.exit(1)
 
-    for box in box_list:
-        box_files = box.get_filtered_box_files(args.version, args.provider)
+    box_files = [box_file for box in box_list
+                 for box_file in box.get_filtered_box_files(args.version, args.provider)]
+
+    if not args.force:
         for box_file in box_files:
-            if args.force:
-                if not box_file.delete():
-                    print("ERROR: Delete of box %s (provider %s, version %s) failed!" %
-                          (box_file.box_name, box_file.provider, box_file.version))
-                    sys.exit(1)
-                print("INFO: Deleted box %s (provider %s, version %s)"  %
-                      (box_file.box_name, box_file.provider, box_file.version))
-            else:
-                print("INFO: Would delete box %s (provider %s, version %s)"  %
-                      (box_file.box_name, box_file.provider, box_file.version))
+            print("INFO: Would delete box %s (provider %s, version %s)"  %
+                  (box_file.box_name, box_file.provider, box_file.version))
+        sys.exit(0)
+
+    def report(box_file, success):
+        if success:
+            print("INFO: Deleted box %s (provider %s, version %s)"  %
+                  (box_file.box_name, box_file.provider, box_file.version))
+        else:
+            print("ERROR: Delete of box %s (provider %s, version %s) failed!" %
+                  (box_file.box_name, box_file.provider, box_file.version))
+
+    if not delete_box_files(vagrancy, box_files, report):
+        sys.exit(1)
 
     sys.exit(0)
 
 
+def delete_box_files(vagrancy, box_files, callback):
+    """Delete the box files concurrently and print a summary.
+
+    Args:
+        vagrancy (Vagrancy): The client object.
+        box_files (list):    The BoxFile objects to delete.
+        callback (callable): The function called with the BoxFile object and the
+                             success flag of each finished deletion.
+
+    Returns:
+        bool: Returns True if all box files were deleted, otherwise False.
+    """
+    results = vagrancy.delete_box_files(box_files, callback)
+    num_failed = results.count(False)
+
+    if num_failed:
+        print("ERROR: Deleted %d of %d box files, %d failed!" % (len(results) - num_failed,
+                                                                 len(results), num_failed))
+        return False
+
+    print("INFO: Deleted %d of %d box files." % (len(results), len(results)))
+    return True
+
+
 def get_subparser_delete(subparsers):
     """Return the subparser to configure and handle the delete command.
 
@@ -18,8 +18,11 @@ Attributes:
 # -----------------------------------------------------------------------------
 import argparse
 import sys
+import time
 
-from ..client import Vagrancy
+from .parser_main   import create_vagrancy, format_throughput, positive_int
+from ..defaults     import DEFAULT_CHUNK_SIZE
+from ..rate_limiter import RateLimiter
 
 
 # -----------------------------------------------------------------------------
@@ -31,6 +34,25 @@ file, the name of the vagrant box, the provider and the version of the box. If
 you specify the version as '-1', the latest version is automatically determined
 and downloaded.
 
+The box file is written to the target file name with the suffix '.part' first
+and renamed once it is complete. If the download is interrupted, it is
+continued using the remaining retries (see the general '--retries' option) or
+by calling the same download command again.
+
+To overcome the throughput limit of a single connection, the '--segments'
+option splits the box file into byte ranges that are downloaded concurrently.
+If the server does not support range requests, a single connection is used.
+
+With the '--all' option, all box files matching the box name, provider and
+version patterns are downloaded concurrently (see the '--concurrency' option of
+the main command) into the directory given as the output file argument, e.g.:
+ %(prog)s --all boxes 'base/*' libvirt
+downloads the latest libvirt version of all 'base/*' boxes to
+boxes/<username>/<name>/<version>/<provider>.box. A throughput report of each
+box file and of the whole download is printed at the end.
+
+The '--limit-rate' option limits the aggregate throughput of all downloads.
+
 
 Return codes:
  0 - Communication was successfull.
@@ -48,7 +70,11 @@ def exec_download_cmd(args):
     Args:
         args: The arguments object.
     """
-    vagrancy = Vagrancy(args.base_url)
+    vagrancy = create_vagrancy(args)
+    rate_limiter = RateLimiter(args.limit_rate * 1024) if args.limit_rate > 0 else None
+
+    if args.all:
+        _download_all(vagrancy, args, rate_limiter)
 
     box_list = vagrancy.get_boxes(args.box_name, args.provider)
     if len(box_list) == 0:
@@ -72,7 +98,8 @@ def exec_download_cmd(args):
         print("       Please use a unique name/pattern!")
         sys.exit(1)
 
-    if box_files[0].download(args.output_file):
+    if box_files[0].download(args.output_file, args.chunk_size, args.retries,
+                             args.segments, rate_limiter):
         if args.output_file != '-':
             print("Downloaded vagrant box %s (provider %s, version %s) "
                   "successfully." % (box_files[0].box_name,
@@ -86,6 +113,52 @@ def exec_download_cmd(args):
     sys.exit(1)
 
 
+def _download_all(vagrancy, args, rate_limiter):
+    """Download all matching box files into the output directory and exit.
+
+    Args:
+        vagrancy (Vagrancy):        The client object.
+        args:                       The arguments object.
+        rate_limiter (RateLimiter): The optional limit of the aggregate throughput.
+    """
+    if args.output_file == '-':
+        print("ERROR: Please specify a directory to download all box files to!")
+        sys.exit(1)
+
+    version_pattern = args.version
+    if version_pattern == "-1":
+        version_pattern = "+1"
+    box_files = [box_file for box in vagrancy.get_boxes(args.box_name, args.provider)
+                 for box_file in box.get_filtered_box_files(version_pattern, args.provider)]
+
+    if len(box_files) == 0:
+        print("ERROR: Found no matching box files!")
+        sys.exit(1)
+
+    print("INFO: Downloading %d box files..." % len(box_files))
+    start = time.perf_counter()
+
+    def report(box_file, result):
+        success, num_bytes, duration = result
+        if success:
+            print("INFO:  Downloaded box %s (provider %s, version %s): %s" %
+                  (box_file.box_name, box_file.provider, box_file.version,
+                   format_throughput(num_bytes, duration)))
+        else:
+            print("ERROR: Download of box %s (provider %s, version %s) failed!" %
+                  (box_file.box_name, box_file.provider, box_file.version))
+
+    results = vagrancy.download_box_files(box_files, args.output_file, args.chunk_size,
+                                          args.retries, args.segments, rate_limiter, report)
+    duration = time.perf_counter() - start
+    num_succeeded = sum(1 for success, _, _ in results if success)
+    num_bytes = sum(size for _, size, _ in results)
+
+    print("INFO: Downloaded %d of %d box files: %s" %
+          (num_succeeded, len(results), format_throughput(num_bytes, duration)))
+    sys.exit(0 if num_succeeded == len(results) else 1)
+
+
 def get_subparser_download(subparsers):
     """Return the subparser to configure and handle the download command.
 
@@ -99,18 +172,45 @@ def get_subparser_download(subparsers):
                                             help = "Download a vagrant box.",
                                             description = DESCRIPTION,
                                             formatter_class = argparse.RawTextHelpFormatter)
+    parser_download.add_argument("-a", "--all",
+                                 action = "store_true",
+                                 help = "Download all matching box files into the "
+                                 "directory specified as the output file.",
+                                 default = False)
+    parser_download.add_argument("--limit-rate",
+                                 action = "store",
+                                 type = int,
+                                 help = "Limit the aggregate throughput of the "
+                                 "downloads to the given number of KiB/s. Use 0 "
+                                 "for no limit. Default: %(default)s",
+                                 default = 0)
+    parser_download.add_argument("--chunk-size",
+                                 action = "store",
+                                 type = positive_int,
+                                 help = "Size of the transfer buffer in bytes. "
+                                 "Default: %(default)s",
+                                 default = DEFAULT_CHUNK_SIZE)
+    parser_download.add_argument("--segments",
+                                 action = "store",
+                                 type = positive_int,
+                                 help = "Split the box file into the given number "
+                                 "of byte ranges that are downloaded concurrently. "
+                                 "Default: %(default)s",
+                                 default = 1)
     parser_download.add_argument("output_file",
                                  action = "store",
                                  help = "The target file name of the vagrant "
                                  "box file. Specify '-' to write the file to "
-                                 "stdout.")
+                                 "stdout. With '--all', the target directory.")
     parser_download.add_argument("box_name",
                                  action = "store",
-                                 help = "The vagrant box name.")
+                                 help = "The vagrant box name. With '--all', a "
+                                 "pattern of the box names.")
     parser_download.add_argument("provider",
                                  action = "store",
                                  help = "The provider, e.g., libvirt or "
-                                 "virtualbox.")
+                                 "virtualbox. With '--all', a pattern of the "
+                                 "providers.")
     parser_download.add_argument("version",
                                  action = "store",
                                  help = "The version of the vagrant box. The "
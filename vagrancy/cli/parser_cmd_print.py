@@ -17,10 +17,11 @@ Attributes:
 # Module Import
 # -----------------------------------------------------------------------------
 import argparse
+import json
 import os
 import sys
 
-from ..client   import Vagrancy
+from .parser_main import create_vagrancy
 
 
 # -----------------------------------------------------------------------------
@@ -50,6 +51,11 @@ a comma separated list consisting of:
  - latest version
  - next version
 
+The '--json' option prints a JSON list of all boxes with all versions, providers
+and URLs. The '--ndjson' option prints the same records as one JSON object per
+line, as soon as the data of each box is retrieved:
+  %(prog)s --ndjson | jq -r '.providers[].latest_version'
+
 
 Return codes:
  0 - Communication was successfull.
@@ -67,11 +73,36 @@ def exec_print_cmd(args):
     Args:
         args: The arguments object.
     """
-    vagrancy = Vagrancy(args.base_url)
-    box_list = vagrancy.get_boxes(args.box_name, args.provider)
+    vagrancy = create_vagrancy(args)
+
+    # Without a provider filter, the names are printed without retrieving the
+    # data of each box.
+    if not (args.csv or args.verbose or args.json or args.ndjson) and args.provider == '*':
+        for box_name in vagrancy.get_box_names(args.box_name):
+            print("%s" % box_name)
+        sys.exit(0)
+
+    # The boxes are printed as their data arrives, so each box is flushed to
+    # show the progress even if the output is piped.
+    boxes = vagrancy.iter_boxes(args.box_name, args.provider)
+
+    if args.ndjson:
+        for box in boxes:
+            print(json.dumps(box.to_dict()))
+            sys.stdout.flush()
+        sys.exit(0)
+
+    if args.json:
+        separator = "[\n"
+        for box in boxes:
+            sys.stdout.write(separator + json.dumps(box.to_dict(), indent = 2))
+            sys.stdout.flush()
+            separator = ",\n"
+        print("[]" if separator == "[\n" else "\n]")
+        sys.exit(0)
 
     if args.csv:
-        for box in box_list:
+        for box in boxes:
             for provider in sorted(box.provider_version_map.keys()):
                 latest_version   = box.provider_latest_versions[provider]
                 next_version     = box.provider_next_versions[provider]
@@ -82,10 +113,11 @@ def exec_print_cmd(args):
                 print("%s,%s,%s,%s,%s" % (box.box_name, provider,
                                           os.path.join(box.box_name, latest_version, provider),
                                           latest_version, next_version))
+            sys.stdout.flush()
         sys.exit(0)
 
     if args.verbose:
-        for box in box_list:
+        for box in boxes:
             print("%s:" % box.box_name)
 
             for provider in sorted(box.provider_version_map.keys()):
@@ -108,11 +140,13 @@ def exec_print_cmd(args):
                                                                next_version,
                                                                provider))
                 print()
+            sys.stdout.flush()
 
         sys.exit(0)
 
-    for box in box_list:
+    for box in boxes:
         print("%s" % box.box_name)
+        sys.stdout.flush()
 
 
 def get_subparser_print(subparsers):
@@ -143,6 +177,16 @@ def get_subparser_print(subparsers):
                               action = "store_true",
                               help = "Print a csv list instead of only the names.",
                               default = False)
+    parser_print.add_argument("--json",
+                              action = "store_true",
+                              help = "Print a JSON list of the boxes with all versions, "
+                              "providers and URLs.",
+                              default = False)
+    parser_print.add_argument("--ndjson",
+                              action = "store_true",
+                              help = "Print the JSON record of each box on a separate "
+                              "line as soon as it is retrieved.",
+                              default = False)
     parser_print.add_argument("box_name",
                               action = "store",
                               help = "Print only names that match the given "
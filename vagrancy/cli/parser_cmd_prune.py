@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Parser of the prune command of vagrancyCtrl.
+
+Attributes:
+    DESCRIPTION (str): The usage description of the subparser for the prune command.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import argparse
+import sys
+
+from .parser_cmd_delete import delete_box_files
+from .parser_main       import create_vagrancy
+
+
+# -----------------------------------------------------------------------------
+# Module Variables
+# -----------------------------------------------------------------------------
+DESCRIPTION = """
+Delete old vagrant boxes on the vagrancy server according to a retention
+policy. The policy is evaluated for all boxes matching the box name pattern
+(all boxes by default) and all providers matching the '--provider' option.
+The latest version of each box and provider is always kept. Any other box
+file is kept if at least one of the following rules keeps it:
+ --keep-last N        : It is one of the latest N versions of its box and
+                        provider.
+ --keep-newer-than D  : It was modified less than D days ago.
+At least one rule must be given. For example, to keep the last 3 versions of
+each box and provider and anything newer than 14 days:
+ %(prog)s --keep-last 3 --keep-newer-than 14
+
+Like the delete command, the deletion is only performed when you specify the
+'--force' option. Otherwise, only the plan is printed. The box files are deleted
+concurrently (see the '--concurrency' option of the main command).
+
+Return codes:
+ 0 - Communication was successfull.
+ 1 - Communication failed.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Exported Functions
+# -----------------------------------------------------------------------------
+
+def exec_prune_cmd(args):
+    """Execute the prune command.
+
+    Args:
+        args: The arguments object.
+    """
+    from ..retention import RetentionPolicy  # pylint: disable=C0415
+
+    try:
+        policy = RetentionPolicy(args.keep_last, args.keep_newer_than)
+    except ValueError as exception:
+        print("ERROR: %s Please check the options --keep-last and --keep-newer-than." %
+              exception)
+        sys.exit(1)
+
+    vagrancy = create_vagrancy(args)
+    box_list = vagrancy.get_boxes(args.box_name, args.provider)
+    keep, prune = policy.evaluate(vagrancy, box_list, args.provider)
+
+    for box_file in prune:
+        print("INFO: %s box %s (provider %s, version %s)" %
+              ("Deleting" if args.force else "Would delete",
+               box_file.box_name, box_file.provider, box_file.version))
+    print("INFO: Plan: delete %d of %d box files of %d boxes, keep %d." %
+          (len(prune), len(keep) + len(prune), len(box_list), len(keep)))
+
+    if not args.force or not prune:
+        sys.exit(0)
+
+    def report(box_file, success):
+        if not success:
+            print("ERROR: Delete of box %s (provider %s, version %s) failed!" %
+                  (box_file.box_name, box_file.provider, box_file.version))
+
+    if not delete_box_files(vagrancy, prune, report):
+        sys.exit(1)
+
+    sys.exit(0)
+
+
+def get_subparser_prune(subparsers):
+    """Return the subparser to configure and handle the prune command.
+
+    Args:
+        subparsers: The subparsers object of the main argparse.ArgumentParser.
+
+    Returns:
+        argparse.ArgumentParser: The new subparser object.
+    """
+    parser_prune = subparsers.add_parser("prune",
+                                         help = "Delete old vagrant boxes according to "
+                                         "a retention policy.",
+                                         description = DESCRIPTION,
+                                         formatter_class = argparse.RawTextHelpFormatter)
+    parser_prune.add_argument("-f", "--force",
+                              action = "store_true",
+                              help = "Delete the box files selected by the policy. "
+                              "Otherwise only the plan is printed.",
+                              default = False)
+    parser_prune.add_argument("-p", "--provider",
+                              action = "store",
+                              help = "Only prune boxes that have the specified "
+                              "provider, e.g., libvirt or virtualbox.",
+                              default = "*")
+    parser_prune.add_argument("--keep-last",
+                              action = "store",
+                              type = int,
+                              metavar = "N",
+                              help = "Keep the latest N versions of each box and provider. "
+                              "N must be at least 1.",
+                              default = None)
+    parser_prune.add_argument("--keep-newer-than",
+                              action = "store",
+                              type = float,
+                              metavar = "DAYS",
+                              help = "Keep box files modified less than DAYS days ago.",
+                              default = None)
+    parser_prune.add_argument("box_name",
+                              action = "store",
+                              help = "The vagrant box name pattern. A box name must have "
+                              "a layout of <username>/<boxname>. Default: %(default)s",
+                              default = "*",
+                              nargs = "?")
+    parser_prune.set_defaults(func = exec_prune_cmd)
+    return parser_prune
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
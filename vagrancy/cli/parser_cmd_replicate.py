@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Parser of the replicate command of vagrancyCtrl.
+
+Attributes:
+    DESCRIPTION (str): The usage description of the subparser for the replicate command.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import argparse
+import sys
+import time
+
+from .parser_main   import create_vagrancy, format_throughput, positive_int
+from ..defaults     import DEFAULT_BUFFER_SIZE, DEFAULT_CHUNK_SIZE
+from ..rate_limiter import RateLimiter
+
+
+# -----------------------------------------------------------------------------
+# Module Variables
+# -----------------------------------------------------------------------------
+DESCRIPTION = """
+Copy matching vagrant boxes from the vagrancy server (see the '--base-url'
+option of the main command) to another vagrancy server. The box files are
+streamed from the source server directly into the upload to the target server
+through a bounded in-memory buffer, so no disk space is required, e.g.:
+ %(prog)s http://prod.example.com:8099 'base/*' -p libvirt
+
+The box name, the version and the provider are specified as patterns like for
+the delete command. The version defaults to '+1', i.e., the latest version. The
+box files are copied concurrently (see the '--concurrency' option of the main
+command). A throughput report of each box file and of the whole replication is
+printed.
+
+Return codes:
+ 0 - Communication was successfull.
+ 1 - Communication failed.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Exported Functions
+# -----------------------------------------------------------------------------
+
+def exec_replicate_cmd(args):
+    """Execute the replicate command.
+
+    Args:
+        args: The arguments object.
+    """
+    source = create_vagrancy(args)
+    target = create_vagrancy(args, args.target_url)
+    rate_limiter = RateLimiter(args.limit_rate * 1024) if args.limit_rate > 0 else None
+
+    box_files = [box_file for box in source.get_boxes(args.box_name, args.provider)
+                 for box_file in box.get_filtered_box_files(args.version, args.provider)]
+    if len(box_files) == 0:
+        print("ERROR: Found no matching box files!")
+        sys.exit(1)
+
+    print("INFO: Replicating %d box files to %s..." % (len(box_files), args.target_url))
+    start = time.perf_counter()
+
+    def report(box_file, result):
+        success, num_bytes, duration = result
+        if success:
+            print("INFO:  Replicated box %s (provider %s, version %s): %s" %
+                  (box_file.box_name, box_file.provider, box_file.version,
+                   format_throughput(num_bytes, duration)))
+        else:
+            print("ERROR: Replication of box %s (provider %s, version %s) failed!" %
+                  (box_file.box_name, box_file.provider, box_file.version))
+
+    results = source.replicate_box_files(box_files, target, args.chunk_size,
+                                         args.buffer_size * 1024 * 1024, rate_limiter, report)
+    duration = time.perf_counter() - start
+    num_succeeded = sum(1 for success, _, _ in results if success)
+    num_bytes = sum(size for _, size, _ in results)
+
+    print("INFO: Replicated %d of %d box files: %s" %
+          (num_succeeded, len(results), format_throughput(num_bytes, duration)))
+    sys.exit(0 if num_succeeded == len(results) else 1)
+
+
+def get_subparser_replicate(subparsers):
+    """Return the subparser to configure and handle the replicate command.
+
+    Args:
+        subparsers: The subparsers object of the main argparse.ArgumentParser.
+
+    Returns:
+        argparse.ArgumentParser: The new subparser object.
+    """
+    parser_replicate = subparsers.add_parser("replicate",
+                                             help = "Copy vagrant boxes to another "
+                                             "vagrancy server.",
+                                             description = DESCRIPTION,
+                                             formatter_class = argparse.RawTextHelpFormatter)
+    parser_replicate.add_argument("-p", "--provider",
+                                  action = "store",
+                                  help = "Only copy boxes that have the specified "
+                                  "provider, e.g., libvirt or virtualbox.",
+                                  default = "*")
+    parser_replicate.add_argument("--buffer-size",
+                                  action = "store",
+                                  type = int,
+                                  help = "Maximum size of the in-memory buffer of "
+                                  "each box file in MiB. Default: %(default)s",
+                                  default = DEFAULT_BUFFER_SIZE // (1024 * 1024))
+    parser_replicate.add_argument("--limit-rate",
+                                  action = "store",
+                                  type = int,
+                                  help = "Limit the aggregate throughput of the "
+                                  "copies to the given number of KiB/s. Use 0 "
+                                  "for no limit. Default: %(default)s",
+                                  default = 0)
+    parser_replicate.add_argument("--chunk-size",
+                                  action = "store",
+                                  type = positive_int,
+                                  help = "Size of the transferred chunks in bytes. "
+                                  "Default: %(default)s",
+                                  default = DEFAULT_CHUNK_SIZE)
+    parser_replicate.add_argument("target_url",
+                                  action = "store",
+                                  help = "The base URL of the target vagrancy server.")
+    parser_replicate.add_argument("box_name",
+                                  action = "store",
+                                  help = "The vagrant box name pattern. A box name must have "
+                                  "a layout of <username>/<boxname>.")
+    parser_replicate.add_argument("version",
+                                  action = "store",
+                                  help = "The version pattern of the box files to copy. "
+                                  "Default: %(default)s",
+                                  default = "+1",
+                                  nargs = "?")
+    parser_replicate.set_defaults(func = exec_replicate_cmd)
+    return parser_replicate
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""Parser of the sync command of vagrancyCtrl.
+
+Attributes:
+    DESCRIPTION (str): The usage description of the subparser for the sync command.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import argparse
+import sys
+
+from .parser_main   import create_vagrancy, positive_int
+from ..defaults     import DEFAULT_CHUNK_SIZE
+from ..mirror       import Mirror, STATE_FILE
+from ..rate_limiter import RateLimiter
+
+
+# -----------------------------------------------------------------------------
+# Module Variables
+# -----------------------------------------------------------------------------
+DESCRIPTION = """
+Mirror the vagrant boxes of the vagrancy server into a local directory. The
+box files are stored as <directory>/<username>/<name>/<version>/<provider>.box.
+To mirror only a subset, you can specify a box name pattern, a version pattern
+and the '--provider' option like for the delete command, e.g.:
+ %%(prog)s /srv/boxes 'base/*' -p libvirt
+
+Only box files that are new or changed on the server are downloaded. The state
+of the mirror is kept in the file %s in the directory, so that
+repeated runs against an unchanged server only check the box files using HEAD
+requests. The downloads and checks are performed concurrently (see the
+'--concurrency' option of the main command).
+
+With the '--delete' option, previously mirrored box files that match the
+patterns but are no longer on the server are deleted locally. Mirrored box
+files of other boxes, versions or providers are kept. Nothing is deleted if
+the server reports an error or any download failed.
+
+Return codes:
+ 0 - Communication was successfull.
+ 1 - Communication failed.
+""" % STATE_FILE
+
+
+# -----------------------------------------------------------------------------
+# Exported Functions
+# -----------------------------------------------------------------------------
+
+def exec_sync_cmd(args):
+    """Execute the sync command.
+
+    Args:
+        args: The arguments object.
+    """
+    vagrancy = create_vagrancy(args)
+    rate_limiter = RateLimiter(args.limit_rate * 1024) if args.limit_rate > 0 else None
+
+    box_files = [box_file for box in vagrancy.get_boxes(args.box_name, args.provider)
+                 for box_file in box.get_filtered_box_files(args.version, args.provider)]
+
+    def report(box_file, result):
+        if result[0]:
+            print("INFO: Downloaded box %s (provider %s, version %s)" %
+                  (box_file.box_name, box_file.provider, box_file.version))
+        else:
+            print("ERROR: Download of box %s (provider %s, version %s) failed!" %
+                  (box_file.box_name, box_file.provider, box_file.version))
+
+    mirror = Mirror(vagrancy, args.directory)
+    summary = mirror.sync(box_files, args.delete, args.chunk_size, args.retries,
+                          rate_limiter, report, args.box_name, args.version, args.provider)
+
+    for rel_path in summary['deleted']:
+        print("INFO: Deleted %s" % rel_path)
+    if args.delete and summary['failed']:
+        print("WARNING: Skipped the deletion of unselected box files due to the "
+              "failed downloads.")
+
+    print("INFO: Synchronized %d box files: %d downloaded, %d unchanged, %d deleted, "
+          "%d failed." % (len(box_files), len(summary['downloaded']),
+                          len(summary['unchanged']), len(summary['deleted']),
+                          len(summary['failed'])))
+    sys.exit(1 if summary['failed'] else 0)
+
+
+def get_subparser_sync(subparsers):
+    """Return the subparser to configure and handle the sync command.
+
+    Args:
+        subparsers: The subparsers object of the main argparse.ArgumentParser.
+
+    Returns:
+        argparse.ArgumentParser: The new subparser object.
+    """
+    parser_sync = subparsers.add_parser("sync",
+                                        help = "Mirror vagrant boxes into a local directory.",
+                                        description = DESCRIPTION,
+                                        formatter_class = argparse.RawTextHelpFormatter)
+    parser_sync.add_argument("-d", "--delete",
+                             action = "store_true",
+                             help = "Delete mirrored box files that match the "
+                             "patterns but were removed on the server.",
+                             default = False)
+    parser_sync.add_argument("-p", "--provider",
+                             action = "store",
+                             help = "Only mirror boxes that have the specified "
+                             "provider, e.g., libvirt or virtualbox.",
+                             default = "*")
+    parser_sync.add_argument("--limit-rate",
+                             action = "store",
+                             type = int,
+                             help = "Limit the aggregate throughput of the "
+                             "downloads to the given number of KiB/s. Use 0 "
+                             "for no limit. Default: %(default)s",
+                             default = 0)
+    parser_sync.add_argument("--chunk-size",
+                             action = "store",
+                             type = positive_int,
+                             help = "Size of the transfer buffer in bytes. "
+                             "Default: %(default)s",
+                             default = DEFAULT_CHUNK_SIZE)
+    parser_sync.add_argument("directory",
+                             action = "store",
+                             help = "The directory of the mirror.")
+    parser_sync.add_argument("box_name",
+                             action = "store",
+                             help = "The vagrant box name pattern. A box name must have "
+                             "a layout of <username>/<boxname>. Default: %(default)s",
+                             default = "*",
+                             nargs = "?")
+    parser_sync.add_argument("version",
+                             action = "store",
+                             help = "The version pattern of the box files to mirror. "
+                             "Use '+1' to mirror only the latest version. "
+                             "Default: %(default)s",
+                             default = "*",
+                             nargs = "?")
+    parser_sync.set_defaults(func = exec_sync_cmd)
+    return parser_sync
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
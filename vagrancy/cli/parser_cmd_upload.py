@@ -19,8 +19,8 @@ Attributes:
 import argparse
 import sys
 
-from ..box_file import BoxFile
-from ..client   import Vagrancy
+from .parser_cmd_delete import delete_box_files
+from .parser_main       import create_vagrancy
 
 
 # -----------------------------------------------------------------------------
@@ -34,7 +34,9 @@ use '-1' as the version specifier.
 
 In addition, you can automatically delete all other versions of the vagrant box
 on the vagrancy server. This is especially useful in combination with the
-automatic version number generation to upload a new 'latest' version.
+automatic version number generation to upload a new 'latest' version. The
+other versions are deleted concurrently and the return code is 1 if any of
+them could not be deleted.
 
 
 Return codes:
@@ -57,7 +59,7 @@ def exec_upload_cmd(args):
         print("ERROR: Please do not use a pattern for the provider!")
         sys.exit(1)
 
-    vagrancy = Vagrancy(args.base_url)
+    vagrancy = create_vagrancy(args)
 
     box_list = vagrancy.get_boxes(args.box_name, args.provider)
     if len(box_list) > 1:
@@ -69,7 +71,7 @@ def exec_upload_cmd(args):
         # The box file does not exist yet
         if args.version == '-1':
             args.version = '1.0.0'
-        box_file = BoxFile(args.base_url, args.box_name, args.version, args.provider)
+        box_file = vagrancy.get_box_file(args.box_name, args.version, args.provider)
         if not box_file.upload(args.input_file):
             print("ERROR: Upload of box %s (provider %s, version %s) failed!" % (box_file.box_name,
                                                                                  box_file.provider,
@@ -98,7 +100,7 @@ def exec_upload_cmd(args):
                                                                                args.version))
 
     # Upload the box
-    box_file = BoxFile(args.base_url, box_list[0].box_name, args.version, args.provider)
+    box_file = vagrancy.get_box_file(box_list[0].box_name, args.version, args.provider)
     if not box_file.upload(args.input_file):
         print("ERROR: Upload of box %s (provider %s, version %s) failed!" % (box_file.box_name,
                                                                              box_file.provider,
@@ -112,22 +114,20 @@ def exec_upload_cmd(args):
     if args.delete_other_versions:
         box_list[0].retrieve_box_data(args.provider)
         all_old_box_files = box_list[0].get_filtered_box_files(version_pattern='-1')
-        delete_success = True
+
+        def report(box_file, success):
+            if success:
+                print("INFO:  Deleted version %s successfully." % box_file.version)
+            else:
+                print("ERROR: Can't delete version %s!" % box_file.version)
 
         if all_old_box_files:
             print("INFO: Deleting %d old box files..." % len(all_old_box_files))
-            for box_file in all_old_box_files:
-                if box_file.delete():
-                    print("INFO:  Deleted version %s successfully." % box_file.version)
-                else:
-                    print("ERROR: Can't delete version %s!" % box_file.version)
-                    delete_success = False
+            if not delete_box_files(vagrancy, all_old_box_files, report):
+                sys.exit(1)
         else:
             print("INFO: No old box files to delete.")
 
-        if not delete_success:
-            sys.exit(1)
-
     sys.exit(0)
 
 
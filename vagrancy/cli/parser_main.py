@@ -19,6 +19,9 @@ Attributes:
 import argparse
 import os
 
+from ..defaults import DEFAULT_CACHE_DIR, DEFAULT_CONCURRENCY, DEFAULT_MAX_RETRIES
+from ..defaults import DEFAULT_MAX_SIZE, DEFAULT_POOL_SIZE, DEFAULT_TTL
+
 
 # -----------------------------------------------------------------------------
 # Module Variables
@@ -29,8 +32,11 @@ are available:
  - print    : To print the vagrant boxes on the vagrancy server, or to list all
               available versions of a certain box.
  - delete   : Delete vagrant boxes on the vagrancy server.
+ - prune    : Delete old vagrant boxes according to a retention policy.
  - upload   : Upload a vagrant box to the vagrancy server.
  - download : Download a vagrant box from the vagrancy server.
+ - sync     : Mirror vagrant boxes into a local directory.
+ - replicate: Copy vagrant boxes to another vagrancy server.
 
 Return codes:
  0 - Communication was successfull.
@@ -42,6 +48,27 @@ Return codes:
 # Exported Functions
 # -----------------------------------------------------------------------------
 
+def positive_int(value):
+    """Convert an argument to an integer that is at least 1.
+
+    Args:
+        value (str): The argument value.
+
+    Returns:
+        int: The integer value.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not an integer of at least 1.
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError("%r is not a positive integer" % value)
+    return number
+
+
 def get_main_parser():
     """Return the main parser.
 
@@ -57,9 +84,156 @@ def get_main_parser():
                         action = "store",
                         default = os.getenv('VAGRANCY_URL', 'http://127.0.0.1:8099'))
 
+    # Connection options
+    parser.add_argument("--pool-size",
+                        help = "Maximum number of pooled connections to the "
+                        "vagrancy server. Default: %(default)s",
+                        action = "store",
+                        type = int,
+                        default = DEFAULT_POOL_SIZE)
+    parser.add_argument("--retries",
+                        help = "Number of retries of failed requests. "
+                        "Default: %(default)s",
+                        action = "store",
+                        type = int,
+                        default = DEFAULT_MAX_RETRIES)
+    parser.add_argument("--no-keep-alive",
+                        help = "Close the connection after each request.",
+                        action = "store_false",
+                        dest = "keep_alive",
+                        default = True)
+    parser.add_argument("-j", "--concurrency",
+                        help = "Maximum number of concurrent requests used to "
+                        "retrieve the box information. Default: %(default)s",
+                        action = "store",
+                        type = int,
+                        default = DEFAULT_CONCURRENCY)
+
+    # Cache options
+    parser.add_argument("--cache",
+                        help = "Keep downloaded box files and the box metadata in "
+                        "a local cache and use them again as long as they are "
+                        "unchanged on the server.",
+                        action = "store_true",
+                        default = False)
+    parser.add_argument("--cache-dir",
+                        help = "Directory of the local cache. Default: "
+                        "$XDG_CACHE_HOME/vagrancyCtrl or ~/.cache/vagrancyCtrl",
+                        action = "store",
+                        default = DEFAULT_CACHE_DIR)
+    parser.add_argument("--cache-max-size",
+                        help = "Maximum size of the cached box files in MiB. The "
+                        "least recently used box files are removed if it is "
+                        "exceeded. Default: %(default)s",
+                        action = "store",
+                        type = int,
+                        default = DEFAULT_MAX_SIZE // (1024 * 1024))
+    parser.add_argument("--metadata-ttl",
+                        help = "Number of seconds the cached box metadata is used "
+                        "without asking the server. Default: %(default)s",
+                        action = "store",
+                        type = float,
+                        default = DEFAULT_TTL)
+
+    # Diagnostic options
+    parser.add_argument("--timings",
+                        help = "Print the number, the latency and the throughput "
+                        "of the HTTP requests per endpoint on stderr at exit.",
+                        action = "store_true",
+                        default = False)
+    parser.add_argument("--trace",
+                        help = "Write a trace of the command, its operations and "
+                        "HTTP requests as Chrome trace-event JSON to the given file.",
+                        action = "store",
+                        metavar = "TRACE_FILE",
+                        default = None)
+    parser.add_argument("--profile-cpu",
+                        help = "Profile the CPU time of the command and write the "
+                        "pstats output to the given file.",
+                        action = "store",
+                        metavar = "PSTATS_FILE",
+                        default = None)
+    parser.add_argument("--profile-mem",
+                        help = "Trace the memory allocations of the command and "
+                        "write a tracemalloc snapshot to the given file.",
+                        action = "store",
+                        metavar = "SNAPSHOT_FILE",
+                        default = None)
+    parser.add_argument("--profile-top",
+                        help = "Print the N functions with the highest cumulative "
+                        "time and the N largest allocation sites of the enabled "
+                        "profilers on stderr. Without --profile-cpu and "
+                        "--profile-mem, the CPU time is profiled.",
+                        action = "store",
+                        type = int,
+                        metavar = "N",
+                        default = None)
+    parser.add_argument("--metrics-file",
+                        help = "Write the request, transfer, retry and cache metrics "
+                        "of the run in the Prometheus text format to the given file, "
+                        "e.g., for the textfile collector of the node exporter.",
+                        action = "store",
+                        metavar = "METRICS_FILE",
+                        default = None)
+
     return parser
 
 
+def create_vagrancy(args, base_url = None):
+    """Create the Vagrancy client object configured by the general options.
+
+    The connection pool is enlarged to the number of segments of a segmented
+    download, so that each segment uses its own pooled connection. If all
+    matching box files are downloaded, the segments of all concurrent downloads
+    are taken into account.
+
+    Args:
+        args:           The arguments object.
+        base_url (str): The base URL of the vagrancy server. If not specified,
+                        the URL given by the '--base-url' option is used.
+
+    Returns:
+        Vagrancy: The new client object.
+    """
+    # The client and thereby requests are only imported if a command is executed.
+    # pylint: disable=C0415
+    from ..client         import Vagrancy
+    from ..download_cache import DownloadCache
+    from ..metadata_cache import MetadataCache
+
+    download_cache = None
+    metadata_cache = None
+    if args.cache:
+        download_cache = DownloadCache(args.cache_dir, args.cache_max_size * 1024 * 1024)
+        metadata_cache = MetadataCache(args.cache_dir, args.metadata_ttl)
+
+    segments = getattr(args, 'segments', 1)
+    if getattr(args, 'all', False):
+        segments *= args.concurrency
+
+    return Vagrancy(base_url or args.base_url,
+                    pool_size = max(args.pool_size, segments),
+                    max_retries = args.retries,
+                    keep_alive = args.keep_alive,
+                    concurrency = args.concurrency,
+                    download_cache = download_cache,
+                    metadata_cache = metadata_cache)
+
+
+def format_throughput(num_bytes, duration):
+    """Format the size and the throughput of a transfer.
+
+    Args:
+        num_bytes (int):  The number of transferred bytes.
+        duration (float): The duration of the transfer in seconds.
+
+    Returns:
+        str: The formatted string.
+    """
+    return "%.1f MB in %.1f s (%.1f MB/s)" % (num_bytes / 1e6, duration,
+                                              num_bytes / 1e6 / max(duration, 1e-6))
+
+
 # -----------------------------------------------------------------------------
 # EOF
 # -----------------------------------------------------------------------------
@@ -10,37 +10,137 @@
 Client for accessing a vagrancy server.
 
 This module specifies the client class :class:`Vagrancy` to access a vagrancy
-server.
+server. The default settings of the client are specified in
+:mod:`vagrancy.defaults`.
 """
 
 
 # -----------------------------------------------------------------------------
 # Module Import
 # -----------------------------------------------------------------------------
+import collections
 import fnmatch
+import itertools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import requests
 
-from .box import Box
+from .box            import Box
+from .box_file       import BoxFile
+from .defaults       import DEFAULT_BUFFER_SIZE, DEFAULT_CHUNK_SIZE, DEFAULT_CONCURRENCY
+from .defaults       import DEFAULT_MAX_RETRIES, DEFAULT_POOL_SIZE, DEFAULT_RETRIES
+from .metadata_cache import get_json
+from .session        import create_session
+from .tracer         import propagate, span
+from .transfer       import TRANSFER_ERRORS
+
+
+# -----------------------------------------------------------------------------
+# Module Variables
+# -----------------------------------------------------------------------------
+# The exceptions of a transfer of a single box file that are reported as a failure
+_BOX_FILE_ERRORS = TRANSFER_ERRORS + (OSError,)
 
 
 # -----------------------------------------------------------------------------
 # Class Definitions
 # -----------------------------------------------------------------------------
 class Vagrancy:
-    """This class represents an interface to a Vagrancy server."""
+    """This class represents an interface to a Vagrancy server.
 
-    def __init__(self, server_url):
+    The object owns a connection-pooled HTTP session that is passed down to all
+    :class:`Box` and :class:`BoxFile` objects created by it.
+    """
+
+    # pylint: disable=R0913
+    def __init__(self, server_url, session = None,
+                 pool_size = DEFAULT_POOL_SIZE,
+                 max_retries = DEFAULT_MAX_RETRIES,
+                 keep_alive = True,
+                 concurrency = DEFAULT_CONCURRENCY,
+                 download_cache = None,
+                 metadata_cache = None):
         """Create a new Vagrancy object using the specified base URL.
 
         Args:
-            server_url (str): The base URL of the vagrancy.
+            server_url (str):               The base URL of the vagrancy.
+            session (requests.Session):     The session to use. If not specified, a new
+                                            session is created using the following
+                                            settings.
+            pool_size (int):                The maximum number of pooled connections. It
+                                            is raised to `concurrency` if it is smaller.
+            max_retries (int):              The number of retries of failed requests.
+            keep_alive (bool):              If False, connections are not reused.
+            concurrency (int):              The maximum number of box data requests
+                                            performed concurrently.
+            download_cache (DownloadCache): The cache of downloaded box files used by all
+                                            box files. If not specified, downloads are
+                                            not cached.
+            metadata_cache (MetadataCache): The cache of the inventory and the box
+                                            metadata. If not specified, the metadata
+                                            is not cached.
         """
         self._server_url = server_url
+        self._concurrency = max(1, concurrency)
+        if session is None:
+            session = create_session(max(pool_size, self._concurrency), max_retries, keep_alive)
+        self._session = session
+        self._download_cache = download_cache
+        self._metadata_cache = metadata_cache
+
+    def __enter__(self):
+        """Enter the context of this object.
+
+        Returns:
+            Vagrancy: This object.
+        """
+        return self
+
+    def __exit__(self, *_):
+        """Leave the context of this object and close the session."""
+        self.close()
+
+    def close(self):
+        """Close the session and all its pooled connections."""
+        self._session.close()
+
+    def get_box(self, box_name, provider_pattern = '*'):
+        """Get a single box sharing the session of this object.
+
+        Args:
+            box_name (str):         The box name confirming to ``<username>/<name>``.
+            provider_pattern (str): A pattern to select matching providers.
+
+        Returns:
+            Box: The box object.
+        """
+        return Box(self._server_url, box_name, provider_pattern, session = self._session,
+                   download_cache = self._download_cache,
+                   metadata_cache = self._metadata_cache)
+
+    def get_box_file(self, box_name, version, provider):
+        """Get a single box file sharing the session of this object.
+
+        Args:
+            box_name (str): The box name confirming to ``<username>/<name>``.
+            version (str):  The version of the box.
+            provider (str): The provider, e.g., ``virtualbox``.
+
+        Returns:
+            BoxFile: The box file object.
+        """
+        return BoxFile(self._server_url, box_name, version, provider, session = self._session,
+                       download_cache = self._download_cache,
+                       metadata_cache = self._metadata_cache)
 
     def get_boxes(self, pattern = '*', provider_pattern = '*'):
         """Get a list of all available boxes.
 
+        The data of the boxes is retrieved concurrently using up to `concurrency`
+        requests at a time. The returned list keeps the order of the inventory.
+
         Args:
             pattern (str): A file name pattern to limit the boxes to
             return.
@@ -55,16 +155,208 @@ class Vagrancy:
                 ``/inventory`` API hook.
             requests.exceptions.ConnectionError: Raised if the base URL can
                 not be reached.
+            requests.exceptions.HTTPError: Raised if the server responds with an
+                error other than 404.
+        """
+        with span("get_boxes", pattern = pattern, provider_pattern = provider_pattern):
+            return list(self.iter_boxes(pattern, provider_pattern))
+
+    def iter_boxes(self, pattern = '*', provider_pattern = '*', prefetch = None):
+        """Iterate over all available boxes as their data arrives.
+
+        The data of up to `prefetch` boxes is requested ahead of the box that
+        is yielded next, using up to `concurrency` requests at a time. The boxes
+        are yielded in the order of the inventory, so at most `prefetch` boxes
+        are held in memory regardless of the size of the inventory.
+
+        If the `pattern` is an exact box name, only the data of that box is
+        requested and the inventory is not retrieved.
+
+        Args:
+            pattern (str):          A file name pattern to limit the boxes to return.
+            provider_pattern (str): A pattern to limit the boxes to return to include
+                                    only the matching providers.
+            prefetch (int):         The number of boxes requested ahead. If not
+                                    specified, twice the `concurrency` is used.
+
+        Yields:
+            Box: The next non-empty box.
+
+        Raises:
+            ConnectionRefusedError: Raised if the remote URL has no
+                ``/inventory`` API hook.
+            requests.exceptions.ConnectionError: Raised if the base URL can
+                not be reached.
+            requests.exceptions.HTTPError: Raised if the server responds with an
+                error other than 404.
+        """
+        filtered_box_names = self._filter_box_names(pattern)
+
+        if self._concurrency == 1 or len(filtered_box_names) <= 1:
+            for box_name in filtered_box_names:
+                box = self.get_box(box_name, provider_pattern)
+                if not box.is_empty():
+                    yield box
+            return
+
+        prefetch = max(1, prefetch if prefetch is not None else 2 * self._concurrency)
+        box_names = iter(filtered_box_names)
+        window = collections.deque()
+        get_box = propagate(self.get_box)
+        executor = ThreadPoolExecutor(max_workers = self._concurrency)
+        try:
+            for box_name in itertools.islice(box_names, prefetch):
+                window.append(executor.submit(get_box, box_name, provider_pattern))
+
+            while window:
+                box = window.popleft().result()
+                for box_name in itertools.islice(box_names, 1):
+                    window.append(executor.submit(get_box, box_name, provider_pattern))
+                if not box.is_empty():
+                    yield box
+        finally:
+            for future in window:
+                future.cancel()
+            executor.shutdown(wait = True)
+
+    def get_box_names(self, pattern = '*'):
+        """Get the names of all available boxes without retrieving their data.
+
+        The names are taken from the inventory. If the `pattern` is an exact box
+        name, only the data of that box is requested to check if it exists.
+
+        Args:
+            pattern (str): A file name pattern to limit the boxes to return.
+
+        Returns:
+            list: The names of the matching boxes in the order of the inventory.
+
+        Raises:
+            ConnectionRefusedError: Raised if the remote URL has no
+                ``/inventory`` API hook.
+            requests.exceptions.ConnectionError: Raised if the base URL can
+                not be reached.
+            requests.exceptions.HTTPError: Raised if the server responds with an
+                error other than 404.
+        """
+        if _is_exact_box_name(pattern):
+            return [] if self.get_box(pattern).is_empty() else [pattern]
+
+        return self._filter_box_names(pattern)
+
+    def delete_box_files(self, box_files, callback = None):
+        """Delete the given box files concurrently.
+
+        Up to `concurrency` box files are deleted at the same time. A failed
+        deletion does not stop the deletion of the other box files.
+
+        Args:
+            box_files (list):    The BoxFile objects to delete.
+            callback (callable): An optional function called with the BoxFile object
+                                 and the success flag of each finished deletion. It
+                                 is called in the thread of the caller.
+
+        Returns:
+            list: The success flags of the deletions in the order of `box_files`.
+        """
+        with span("delete_box_files", count = len(box_files)):
+            return self._map_concurrently(_delete_box_file, box_files, callback)
+
+    # pylint: disable=R0913
+    def download_box_files(self, box_files, directory, chunk_size = DEFAULT_CHUNK_SIZE,
+                           retries = DEFAULT_RETRIES, segments = 1, rate_limiter = None,
+                           callback = None):
+        """Download the given box files concurrently into a directory tree.
+
+        Up to `concurrency` box files are downloaded at the same time. Each box
+        file is written to the path returned by :meth:`BoxFile.get_local_path`.
+        A failed download does not stop the download of the other box files.
+
+        Args:
+            box_files (list):           The BoxFile objects to download.
+            directory (str):            The base directory of the downloaded box files.
+            chunk_size (int):           The size of the transfer buffer in bytes.
+            retries (int):              The number of retries of interrupted downloads.
+            segments (int):             The number of concurrently downloaded byte
+                                        ranges of each box file.
+            rate_limiter (RateLimiter): The optional limit of the aggregate throughput.
+            callback (callable):        An optional function called with the BoxFile
+                                        object and the result of each finished
+                                        download. It is called in the thread of the
+                                        caller.
+
+        Returns:
+            list: The results of the downloads in the order of `box_files`. Each
+            result is a tuple of the success flag, the size of the box file in bytes
+            and the duration of the download in seconds.
         """
-        boxes = []
-        filtered_box_names = fnmatch.filter(self.inventory(), pattern)
-        for box_name in filtered_box_names:
-            box = Box(self._server_url, box_name, provider_pattern)
+        def download(box_file):
+            target = box_file.get_local_path(directory)
+            start = time.perf_counter()
+            try:
+                os.makedirs(os.path.dirname(target), exist_ok = True)
+                success = box_file.download(target, chunk_size, retries, segments, rate_limiter)
+            except _BOX_FILE_ERRORS:
+                success = False
+            duration = time.perf_counter() - start
+            return success, os.path.getsize(target) if success else 0, duration
+
+        with span("download_box_files", count = len(box_files)):
+            return self._map_concurrently(download, box_files, callback)
+
+    # pylint: disable=R0913
+    def replicate_box_files(self, box_files, target, chunk_size = DEFAULT_CHUNK_SIZE,
+                            buffer_size = DEFAULT_BUFFER_SIZE, rate_limiter = None,
+                            callback = None):
+        """Copy the given box files concurrently to another vagrancy server.
+
+        Each box file is streamed from this server to the target server through
+        a bounded in-memory buffer (see :meth:`BoxFile.replicate`). Up to
+        `concurrency` box files are copied at the same time. A failed copy does
+        not stop the copies of the other box files.
+
+        Args:
+            box_files (list):           The BoxFile objects of this server to copy.
+            target (Vagrancy):          The client object of the target server.
+            chunk_size (int):           The size of the transferred chunks in bytes.
+            buffer_size (int):          The maximum number of buffered bytes of each
+                                        box file.
+            rate_limiter (RateLimiter): The optional limit of the aggregate throughput.
+            callback (callable):        An optional function called with the BoxFile
+                                        object and the result of each finished copy.
+                                        It is called in the thread of the caller.
+
+        Returns:
+            list: The results of the copies in the order of `box_files`. Each result
+            is a tuple of the success flag, the size of the box file in bytes and the
+            duration of the copy in seconds.
+        """
+        def replicate(box_file):
+            target_box_file = target.get_box_file(box_file.box_name, box_file.version,
+                                                  box_file.provider)
+            start = time.perf_counter()
+            try:
+                success, size = box_file.replicate(target_box_file, chunk_size, buffer_size,
+                                                   rate_limiter)
+            except _BOX_FILE_ERRORS:
+                success, size = False, 0
+            return success, size if success else 0, time.perf_counter() - start
+
+        with span("replicate_box_files", count = len(box_files)):
+            return self._map_concurrently(replicate, box_files, callback)
+
+    def stat_box_files(self, box_files):
+        """Get the size and the validators of the given box files concurrently.
 
-            if not box.is_empty():
-                boxes.append(box)
+        Args:
+            box_files (list): The BoxFile objects.
 
-        return boxes
+        Returns:
+            list: The results of :meth:`BoxFile.stat` in the order of `box_files`.
+            The result of a failed request is None.
+        """
+        with span("stat_box_files", count = len(box_files)):
+            return self._map_concurrently(_stat_box_file, box_files)
 
     def inventory(self):
         """Get a list of all available boxes.
@@ -77,18 +369,89 @@ class Vagrancy:
                 ``/inventory`` API hook.
             requests.exceptions.ConnectionError: Raised if the base URL can
                 not be reached.
+            requests.exceptions.HTTPError: Raised if the server responds with an
+                error other than 404.
         """
-        response = requests.get("%s/inventory" % self._server_url)
-        if response.status_code == 404:
+        with span("inventory"):
+            status_code, response_data = get_json(self._session,
+                                                  "%s/inventory" % self._server_url,
+                                                  self._metadata_cache)
+        if status_code == 404:
             raise ConnectionRefusedError("Vagrancy server at %s does not support "
                                          "the /inventory API hook!" % self._server_url)
 
-        response_data = response.json()
         if 'boxes' not in response_data:
             return []
 
         return response_data['boxes']
 
+    def _filter_box_names(self, pattern):
+        """Get the names of the boxes matching the pattern.
+
+        An exact box name is returned as it is, without retrieving the inventory.
+        A box that does not exist on the server is empty.
+
+        Args:
+            pattern (str): A file name pattern or an exact box name.
+
+        Returns:
+            list: The names of the matching boxes.
+        """
+        if _is_exact_box_name(pattern):
+            return [pattern]
+
+        return fnmatch.filter(self.inventory(), pattern)
+
+    def _map_concurrently(self, function, items, callback = None):
+        """Apply the function to all items using up to `concurrency` threads.
+
+        Args:
+            function (callable): The function called with each item.
+            items (list):        The items.
+            callback (callable): An optional function called with the item and the
+                                 result of each finished call. It is called in the
+                                 thread of the caller.
+
+        Returns:
+            list: The results in the order of `items`.
+        """
+        results = [None] * len(items)
+        function = propagate(function)
+        with ThreadPoolExecutor(max_workers = self._concurrency) as executor:
+            futures = {executor.submit(function, item): index
+                       for index, item in enumerate(items)}
+            for future in as_completed(futures):
+                index = futures[future]
+                results[index] = future.result()
+                if callback is not None:
+                    callback(items[index], results[index])
+
+        return results
+
+
+# -----------------------------------------------------------------------------
+# Internal Functions
+# -----------------------------------------------------------------------------
+def _is_exact_box_name(pattern):
+    """Check if the pattern is a valid box name without any wildcards."""
+    return pattern.count('/') == 1 and not any(char in pattern for char in '*?[')
+
+
+def _delete_box_file(box_file):
+    """Delete the box file and report a failed request as an unsuccessful deletion."""
+    try:
+        return box_file.delete()
+    except requests.exceptions.RequestException:
+        return False
+
+
+def _stat_box_file(box_file):
+    """Get the size and the validators of the box file or None if the request failed."""
+    try:
+        return box_file.stat()
+    except requests.exceptions.RequestException:
+        return None
+
 
 # -----------------------------------------------------------------------------
 # EOF
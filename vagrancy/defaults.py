@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""
+Default settings of the connections, transfers and caches.
+
+The defaults are kept in this module without any heavy imports, so that the
+command line parser can show them without importing :mod:`requests`. They are
+also available from the modules using them, e.g., :mod:`vagrancy.transfer`.
+
+Attributes:
+    DEFAULT_CONCURRENCY (int):      The default number of concurrent requests used to
+                                    retrieve the box data.
+    DEFAULT_POOL_SIZE (int):        The default number of pooled connections per host.
+    DEFAULT_MAX_RETRIES (int):      The default number of retries of failed requests.
+    DEFAULT_BACKOFF_FACTOR (float): The default backoff factor between retries.
+    DEFAULT_CHUNK_SIZE (int):       The default size of the transfer buffer in bytes.
+    DEFAULT_RETRIES (int):          The default number of retries of interrupted downloads.
+    DEFAULT_BUFFER_SIZE (int):      The default size of the buffer of a replication in bytes.
+    DEFAULT_CACHE_DIR (str):        The default directory of the cache.
+    DEFAULT_MAX_SIZE (int):         The default maximum size of the cached box files in bytes.
+    DEFAULT_TTL (float):            The default time to live of cached metadata in seconds.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import os
+
+
+# -----------------------------------------------------------------------------
+# Module Variables
+# -----------------------------------------------------------------------------
+DEFAULT_CONCURRENCY    = 8
+DEFAULT_POOL_SIZE      = 10
+DEFAULT_MAX_RETRIES    = 3
+DEFAULT_BACKOFF_FACTOR = 0.2
+DEFAULT_CHUNK_SIZE     = 1024 * 1024
+DEFAULT_RETRIES        = 3
+DEFAULT_BUFFER_SIZE    = 16 * 1024 * 1024
+DEFAULT_CACHE_DIR      = os.path.join(os.getenv('XDG_CACHE_HOME', os.path.expanduser('~/.cache')),
+                                      'vagrancyCtrl')
+DEFAULT_MAX_SIZE       = 20 * 1024 * 1024 * 1024
+DEFAULT_TTL            = 30.0
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""
+Local cache of downloaded box files.
+
+This module specifies the class :class:`DownloadCache` that keeps downloaded
+box files in a local directory. The entries are keyed by the URL of the box
+file, i.e., by the server, the box name, the version and the provider. Before a
+cached entry is used, it is validated using a conditional ``HEAD`` request with
+the ETag and Last-Modified values of the entry.
+
+Hits are served by a reflink (copy-on-write clone) of the cached file, by a
+hardlink if reflinks are not supported, or by a copy as the last resort. Note
+that a hardlinked target file shares its contents with the cache entry, so it
+must not be modified in place.
+
+The total size of the cache is limited. If it is exceeded, the least recently
+used entries are removed. The default directory and maximum size of the cache
+are specified in :mod:`vagrancy.defaults`.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from .defaults import DEFAULT_CACHE_DIR, DEFAULT_MAX_SIZE
+
+
+# -----------------------------------------------------------------------------
+# Module Variables
+# -----------------------------------------------------------------------------
+# The ioctl request code to clone a file on Linux (FICLONE)
+_FICLONE = 0x40049409
+
+
+# -----------------------------------------------------------------------------
+# Class Definitions
+# -----------------------------------------------------------------------------
+class DownloadCache:
+    """Local cache of downloaded box files.
+
+    Each entry consists of the box file ``<key>.box`` and the metadata file
+    ``<key>.json`` in the ``boxes`` subdirectory of the cache directory. The
+    modification time of the metadata file is the time of the last use.
+
+    Attributes:
+        directory (str): The directory of the cached box files.
+        max_size (int):  The maximum size of the cached box files in bytes.
+    """
+
+    def __init__(self, directory = DEFAULT_CACHE_DIR, max_size = DEFAULT_MAX_SIZE):
+        """Create a new DownloadCache object.
+
+        Args:
+            directory (str): The base directory of the cache.
+            max_size (int):  The maximum size of the cached box files in bytes.
+        """
+        self.directory = os.path.join(directory, 'boxes')
+        self.max_size = max_size
+
+    @staticmethod
+    def get_key(url):
+        """Get the key of the entry of the given URL.
+
+        Args:
+            url (str): The URL of the box file.
+
+        Returns:
+            str: The key of the entry.
+        """
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def get_path(self, url):
+        """Get the path of the cached box file of the given URL.
+
+        Args:
+            url (str): The URL of the box file.
+
+        Returns:
+            str: The path of the cached box file. It might not exist.
+        """
+        return os.path.join(self.directory, self.get_key(url) + '.box')
+
+    def get_metadata(self, url):
+        """Get the metadata of the entry of the given URL.
+
+        Args:
+            url (str): The URL of the box file.
+
+        Returns:
+            dict: The metadata of the entry or None if there is no valid entry.
+        """
+        meta_file = os.path.join(self.directory, self.get_key(url) + '.json')
+        try:
+            with open(meta_file, 'r', encoding = 'utf-8') as handle:
+                metadata = json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+        if metadata.get('url') != url or not os.path.exists(self.get_path(url)):
+            return None
+
+        return metadata
+
+    def get_conditional_headers(self, url):
+        """Get the headers of a conditional request validating the entry.
+
+        Args:
+            url (str): The URL of the box file.
+
+        Returns:
+            dict: The headers. The dictionary is empty if there is no entry.
+        """
+        metadata = self.get_metadata(url) or {}
+        headers = {}
+        if metadata.get('etag'):
+            headers['If-None-Match'] = metadata['etag']
+        if metadata.get('last_modified'):
+            headers['If-Modified-Since'] = metadata['last_modified']
+        return headers
+
+    def lock(self, url):
+        """Lock the entry of the given URL against concurrent processes.
+
+        Args:
+            url (str): The URL of the box file.
+
+        Returns:
+            A context manager holding the lock.
+        """
+        return self._lock_key(self.get_key(url))
+
+    @contextlib.contextmanager
+    def _lock_key(self, key, blocking = True):
+        """Lock the entry of the given key against concurrent processes.
+
+        The lock files are never removed, so that all processes lock the same
+        file of an entry.
+
+        Args:
+            key (str):       The key of the entry.
+            blocking (bool): If False, the lock is not waited for.
+
+        Yields:
+            bool: True if the lock is held, False if the entry is locked by another
+            process and `blocking` is False.
+        """
+        os.makedirs(self.directory, exist_ok = True)
+        with open(os.path.join(self.directory, key + '.lock'), 'w', encoding = 'utf-8') as handle:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX if blocking else
+                                fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    yield False
+                    return
+            yield True
+
+    def store(self, url, headers):
+        """Store the metadata of a box file downloaded to :meth:`get_path`.
+
+        Args:
+            url (str):      The URL of the box file.
+            headers (dict): The response headers of the box file.
+        """
+        metadata = {'url':           url,
+                    'etag':          headers.get('etag'),
+                    'last_modified': headers.get('last-modified'),
+                    'size':          os.path.getsize(self.get_path(url))}
+        meta_file = os.path.join(self.directory, self.get_key(url) + '.json')
+        with open(meta_file + '.tmp', 'w', encoding = 'utf-8') as handle:
+            json.dump(metadata, handle)
+        os.replace(meta_file + '.tmp', meta_file)
+
+    def touch(self, url):
+        """Mark the entry of the given URL as recently used.
+
+        Args:
+            url (str): The URL of the box file.
+        """
+        os.utime(os.path.join(self.directory, self.get_key(url) + '.json'))
+
+    def copy_to(self, url, target):
+        """Provide the cached box file of the given URL as the target file.
+
+        The target file is replaced atomically by a reflink, a hardlink or a
+        copy of the cached box file.
+
+        Args:
+            url (str):    The URL of the box file.
+            target (str): The path of the target file.
+        """
+        source = self.get_path(url)
+        tmp_target = target + '.part'
+        if os.path.exists(tmp_target):
+            os.remove(tmp_target)
+
+        if not _reflink(source, tmp_target):
+            try:
+                os.link(source, tmp_target)
+            except OSError:
+                shutil.copyfile(source, tmp_target)
+
+        os.replace(tmp_target, target)
+        self.touch(url)
+
+    def evict(self, keep_url = None):
+        """Remove the least recently used entries until the size limit is met.
+
+        Entries locked by other processes, e.g., while they are copied, are
+        skipped. The entries are locked without waiting, so that two processes
+        holding the locks of their own entries do not wait for each other.
+
+        Args:
+            keep_url (str): The URL of an entry that must not be removed.
+        """
+        keep_key = self.get_key(keep_url) if keep_url else None
+        entries = []
+        total_size = 0
+
+        for file_name in os.listdir(self.directory):
+            key, extension = os.path.splitext(file_name)
+            if extension != '.json':
+                continue
+            meta_file = os.path.join(self.directory, file_name)
+            box_file = os.path.join(self.directory, key + '.box')
+            size = os.path.getsize(box_file) if os.path.exists(box_file) else 0
+            total_size += size
+            if key != keep_key:
+                entries.append((os.path.getmtime(meta_file), size, key))
+
+        for _, size, key in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            with self._lock_key(key, blocking = False) as locked:
+                if not locked:
+                    continue
+                for extension in ('.json', '.box'):
+                    path = os.path.join(self.directory, key + extension)
+                    if os.path.exists(path):
+                        os.remove(path)
+            total_size -= size
+
+
+# -----------------------------------------------------------------------------
+# Internal Functions
+# -----------------------------------------------------------------------------
+def _reflink(source, target):
+    """Clone the source file using a copy-on-write reflink.
+
+    Args:
+        source (str): The path of the source file.
+        target (str): The path of the new target file.
+
+    Returns:
+        bool: True if the clone was created, False if it is not supported.
+    """
+    if fcntl is None:
+        return False
+
+    with open(source, 'rb') as source_handle, open(target, 'wb') as target_handle:
+        try:
+            fcntl.ioctl(target_handle.fileno(), _FICLONE, source_handle.fileno())
+            return True
+        except OSError:
+            pass
+
+    os.remove(target)
+    return False
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
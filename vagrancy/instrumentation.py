@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""
+Hook layer around the HTTP requests.
+
+All sessions created by :func:`vagrancy.session.create_session`, i.e., the
+sessions of :class:`vagrancy.client.Vagrancy`, :class:`vagrancy.box.Box` and
+:class:`vagrancy.box_file.BoxFile` objects, describe each finished request by
+a :data:`RequestRecord` and pass it to all hooks registered using
+:func:`add_hook`. A request is finished when its response was read, or, for a
+streamed response, when the response is closed.
+
+Events that are not HTTP requests, i.e., the retries of interrupted downloads
+and the hits and misses of the caches, are passed to the same hooks as an
+:data:`EventRecord` by :func:`notify_event`.
+
+The hooks are called in the thread that performed the request, so they must be
+thread-safe. As long as no hook is registered, the requests are not measured
+at all.
+
+This module only uses the standard library, so it can be imported by the CLI
+without importing :mod:`requests`.
+
+Attributes:
+    RequestRecord (type): The description of a finished request consisting of
+                          the ``method``, the ``url``, the ``url_class`` given by
+                          :func:`classify_url`, the HTTP ``status`` (None if the
+                          request failed), the number of transferred body bytes
+                          ``num_bytes`` in both directions, the ``start`` time
+                          as a :func:`time.perf_counter` value, the time to the
+                          first byte ``ttfb``, the total ``duration`` in
+                          seconds and the number of ``retries`` performed by
+                          the connection pool.
+    EventRecord (type):   The description of an event consisting of its
+                          ``name``, i.e., ``retry``, ``metadata_cache_hit``,
+                          ``metadata_cache_miss``, ``download_cache_hit`` or
+                          ``download_cache_miss``, the ``url`` and the
+                          ``url_class`` of the affected resource.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import collections
+import threading
+from urllib.parse import urlsplit
+
+
+# -----------------------------------------------------------------------------
+# Module Variables
+# -----------------------------------------------------------------------------
+RequestRecord = collections.namedtuple('RequestRecord', ['method', 'url', 'url_class', 'status',
+                                                         'num_bytes', 'start', 'ttfb',
+                                                         'duration', 'retries'],
+                                       defaults = (0,))
+EventRecord = collections.namedtuple('EventRecord', ['name', 'url', 'url_class'])
+
+# The registered hooks. The tuple is replaced on each change, so that it can be
+# iterated without holding the lock.
+_HOOKS = ()
+_HOOKS_LOCK = threading.Lock()
+
+
+# -----------------------------------------------------------------------------
+# Exported Functions
+# -----------------------------------------------------------------------------
+def add_hook(hook):
+    """Register a hook called with the RequestRecord of each finished request.
+
+    The hook is also called with the EventRecord of each event.
+
+    Args:
+        hook (callable): The function or callable object to register.
+    """
+    global _HOOKS  # pylint: disable=W0603
+    with _HOOKS_LOCK:
+        _HOOKS = _HOOKS + (hook,)
+
+
+def remove_hook(hook):
+    """Remove a registered hook.
+
+    Args:
+        hook (callable): The hook to remove. Unknown hooks are ignored.
+    """
+    global _HOOKS  # pylint: disable=W0603
+    with _HOOKS_LOCK:
+        _HOOKS = tuple(registered for registered in _HOOKS if registered is not hook)
+
+
+def is_enabled():
+    """Check if the requests are measured.
+
+    Returns:
+        bool: True if at least one hook is registered.
+    """
+    return len(_HOOKS) > 0
+
+
+def notify(record):
+    """Pass the record of a finished request or an event to all registered hooks.
+
+    Args:
+        record (RequestRecord): The record of the request or an EventRecord.
+    """
+    for hook in _HOOKS:
+        hook(record)
+
+
+def notify_event(name, url):
+    """Pass an event to all registered hooks.
+
+    Args:
+        name (str): The name of the event, e.g., ``retry``.
+        url (str):  The URL of the affected resource.
+    """
+    if _HOOKS:
+        notify(EventRecord(name, url, classify_url(url)))
+
+
+def classify_url(url):
+    """Get the class of the endpoint addressed by an URL of a vagrancy server.
+
+    The class is derived from the path of the URL, so a vagrancy server behind
+    a path prefix is reported as ``other``.
+
+    Args:
+        url (str): The URL of the request.
+
+    Returns:
+        str: ``inventory`` for the inventory, ``box`` for the box metadata,
+        ``box_file`` for a box file or ``other``.
+    """
+    parts = [part for part in urlsplit(url).path.split('/') if part]
+    if parts == ['inventory']:
+        return 'inventory'
+    if len(parts) == 2:
+        return 'box'
+    if len(parts) == 4:
+        return 'box_file'
+    return 'other'
+
+
+def get_box_name(url):
+    """Get the name of the box addressed by an URL of a vagrancy server.
+
+    Args:
+        url (str): The URL of a box or a box file.
+
+    Returns:
+        str: The box name or an empty string if the URL does not address a box.
+    """
+    if classify_url(url) not in ('box', 'box_file'):
+        return ''
+    parts = [part for part in urlsplit(url).path.split('/') if part]
+    return '/'.join(parts[:2])
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
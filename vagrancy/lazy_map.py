@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""
+Read-only map with values computed on demand.
+
+This module specifies the class :class:`LazyMap` that is used by
+:class:`vagrancy.box.Box` to provide its derived maps, e.g., the latest
+version of each provider, without computing them for every box in advance.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+from collections.abc import Mapping
+
+
+# -----------------------------------------------------------------------------
+# Class Definitions
+# -----------------------------------------------------------------------------
+class LazyMap(Mapping):
+    """Read-only map computing the value of a key on its first access.
+
+    Checking for a key, iterating over the keys and getting the length does
+    not compute any value.
+    """
+
+    __slots__ = ('_keys', '_function', '_values')
+
+    def __init__(self, keys, function):
+        """Create a new LazyMap object.
+
+        Args:
+            keys (collection):   The keys of the map.
+            function (callable): The function computing the value of a key.
+        """
+        self._keys = keys
+        self._function = function
+        self._values = None
+
+    def __getitem__(self, key):
+        """Get the value of the key and compute it if it is accessed the first time.
+
+        Raises:
+            KeyError: If the key is not contained in the map.
+        """
+        if self._values is None:
+            self._values = {}
+        elif key in self._values:
+            return self._values[key]
+
+        if key not in self._keys:
+            raise KeyError(key)
+
+        value = self._values[key] = self._function(key)
+        return value
+
+    def __contains__(self, key):
+        """Check if the key is contained in the map."""
+        return key in self._keys
+
+    def __iter__(self):
+        """Iterate over the keys of the map."""
+        return iter(self._keys)
+
+    def __len__(self):
+        """Get the number of keys of the map."""
+        return len(self._keys)
+
+    def __repr__(self):
+        """Get the representation of the object."""
+        return "LazyMap(%r)" % list(self._keys)
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""
+Cache of the inventory and the box metadata.
+
+This module specifies the class :class:`MetadataCache` that keeps the JSON
+documents returned by the ``/inventory`` and ``/<box_name>`` requests in
+memory and optionally on disk. Within the time to live (TTL) a cached document
+is used without contacting the server. Afterwards, it is revalidated by a
+conditional request using the ETag and Last-Modified values of the document,
+if the server provided them.
+
+Operations that modify the server, i.e., uploads and deletions, invalidate the
+cached documents of the affected box and the inventory. The default time to
+live is specified in :mod:`vagrancy.defaults`.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+
+from . import instrumentation
+from .defaults import DEFAULT_TTL
+
+
+# -----------------------------------------------------------------------------
+# Class Definitions
+# -----------------------------------------------------------------------------
+class MetadataCache:
+    """Cache of the JSON documents of the inventory and the boxes.
+
+    Attributes:
+        directory (str): The directory of the cached documents or None to keep them
+                         only in memory.
+        ttl (float):     The time to live of cached documents in seconds.
+    """
+
+    def __init__(self, directory = None, ttl = DEFAULT_TTL):
+        """Create a new MetadataCache object.
+
+        Args:
+            directory (str): The base directory of the cache. If not specified, the
+                             documents are only kept in memory.
+            ttl (float):     The time to live of cached documents in seconds.
+        """
+        self.directory = os.path.join(directory, 'metadata') if directory else None
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _get_file(self, url):
+        """Get the path of the file of the cached document of the given URL."""
+        return os.path.join(self.directory, hashlib.sha256(url.encode('utf-8')).hexdigest() +
+                            '.json')
+
+    def _load(self, url):
+        """Load the entry of the given URL from memory or disk.
+
+        Returns:
+            dict: The entry or None if there is no entry.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+        if entry is not None or self.directory is None:
+            return entry
+
+        try:
+            with open(self._get_file(url), 'r', encoding = 'utf-8') as handle:
+                entry = json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get('url') != url:
+            return None
+
+        with self._lock:
+            self._entries[url] = entry
+        return entry
+
+    def _save(self, url, entry):
+        """Save the entry of the given URL in memory and on disk."""
+        with self._lock:
+            self._entries[url] = entry
+        if self.directory is None:
+            return
+
+        os.makedirs(self.directory, exist_ok = True)
+        cache_file = self._get_file(url)
+        tmp_file = '%s.%d.%d.tmp' % (cache_file, os.getpid(), threading.get_ident())
+        with open(tmp_file, 'w', encoding = 'utf-8') as handle:
+            json.dump(entry, handle)
+        os.replace(tmp_file, cache_file)
+
+    def get_json(self, session, url):
+        """Get the JSON document of the given URL.
+
+        Args:
+            session (requests.Session): The session to use.
+            url (str):                  The URL of the document.
+
+        Returns:
+            tuple: The HTTP status code and the JSON document. The document is None
+            if the status code is 404.
+
+        Raises:
+            requests.exceptions.HTTPError: Raised if the status code is neither 200
+                nor 404.
+        """
+        entry = self._load(url)
+        if entry is not None and time.time() - entry['fetched_at'] < self.ttl:
+            instrumentation.notify_event('metadata_cache_hit', url)
+            return 200, entry['data']
+
+        headers = {}
+        if entry is not None and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry is not None and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        response = session.get(url, headers = headers)
+        if response.status_code == 304 and entry is not None:
+            instrumentation.notify_event('metadata_cache_hit', url)
+            entry['fetched_at'] = time.time()
+            self._save(url, entry)
+            return 200, entry['data']
+
+        instrumentation.notify_event('metadata_cache_miss', url)
+
+        if response.status_code == 404:
+            self.invalidate(url)
+            return response.status_code, None
+        _check_status(response, url)
+
+        data = response.json()
+        self._save(url, {'url':           url,
+                         'data':          data,
+                         'etag':          response.headers.get('etag'),
+                         'last_modified': response.headers.get('last-modified'),
+                         'fetched_at':    time.time()})
+        return 200, data
+
+    def invalidate(self, url):
+        """Remove the cached document of the given URL.
+
+        Args:
+            url (str): The URL of the document.
+        """
+        with self._lock:
+            self._entries.pop(url, None)
+        if self.directory is not None and os.path.exists(self._get_file(url)):
+            os.remove(self._get_file(url))
+
+    def invalidate_box(self, server_url, box_name):
+        """Remove the cached documents affected by a modification of a box.
+
+        Args:
+            server_url (str): The base URL of the vagrancy server.
+            box_name (str):   The name of the modified box.
+        """
+        self.invalidate("%s/inventory" % server_url)
+        self.invalidate("%s/%s" % (server_url, box_name))
+
+
+# -----------------------------------------------------------------------------
+# Exported Functions
+# -----------------------------------------------------------------------------
+def get_json(session, url, metadata_cache = None):
+    """Get the JSON document of the given URL using the optional cache.
+
+    Args:
+        session (requests.Session):     The session to use.
+        url (str):                      The URL of the document.
+        metadata_cache (MetadataCache): The cache to use or None.
+
+    Returns:
+        tuple: The HTTP status code and the JSON document. The document is None
+        if the status code is 404.
+
+    Raises:
+        requests.exceptions.HTTPError: Raised if the status code is neither 200
+            nor 404.
+    """
+    if metadata_cache is not None:
+        return metadata_cache.get_json(session, url)
+
+    response = session.get(url)
+    if response.status_code == 404:
+        return response.status_code, None
+    _check_status(response, url)
+    return response.status_code, response.json()
+
+
+# -----------------------------------------------------------------------------
+# Internal Functions
+# -----------------------------------------------------------------------------
+def _check_status(response, url):
+    """Raise an HTTPError if the status code of the response of the URL is not 200."""
+    if response.status_code != 200:
+        raise requests.exceptions.HTTPError("Request of %s failed with status code %s!" %
+                                            (url, response.status_code),
+                                            response = response)
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""
+Metrics of a run in the Prometheus text format.
+
+This module specifies the class :class:`PrometheusMetrics` that is registered
+as a hook of :mod:`vagrancy.instrumentation` and aggregates the requests and
+events of a single run of vagrancyCtrl into counters and histograms. They are
+written by the ``--metrics-file`` option into a file read by the textfile
+collector of the Prometheus node exporter. The file is replaced atomically, so
+the collector never reads a partially written file.
+
+All metrics are labelled by the ``command``. The transfer and retry metrics
+are also labelled by the ``box``, while the request and cache metrics are not,
+so that the number of series stays small for commands over the whole
+inventory.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import collections
+import os
+import threading
+import time
+
+from .instrumentation import EventRecord, get_box_name
+
+
+# -----------------------------------------------------------------------------
+# Module Variables
+# -----------------------------------------------------------------------------
+# The upper bounds of the buckets of the request duration histogram in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+                    60.0, 300.0, 900.0)
+
+# The type and the help text of each metric in the order of the file
+_METRICS = collections.OrderedDict([
+    ('vagrancy_requests_total',
+     ('counter', "Number of HTTP requests by endpoint, method and status.")),
+    ('vagrancy_request_duration_seconds',
+     ('histogram', "Duration of the HTTP requests by endpoint and method.")),
+    ('vagrancy_transfer_bytes_total',
+     ('counter', "Number of transferred box file bytes by box and direction.")),
+    ('vagrancy_transfer_duration_seconds_total',
+     ('counter', "Duration of the box file transfers by box and direction.")),
+    ('vagrancy_retries_total',
+     ('counter', "Number of retried requests and interrupted downloads by box and endpoint.")),
+    ('vagrancy_cache_requests_total',
+     ('counter', "Number of lookups in the local caches by cache and result.")),
+    ('vagrancy_run_duration_seconds',
+     ('gauge', "Duration of the run.")),
+    ('vagrancy_run_exit_code',
+     ('gauge', "Exit code of the run.")),
+    ('vagrancy_run_timestamp_seconds',
+     ('gauge', "Start time of the run as a Unix timestamp.")),
+])
+
+
+# -----------------------------------------------------------------------------
+# Class Definitions
+# -----------------------------------------------------------------------------
+class PrometheusMetrics:
+    """Aggregation of the requests and events of a run into Prometheus metrics.
+
+    Attributes:
+        command (str): The value of the ``command`` label.
+    """
+
+    def __init__(self, command):
+        """Create a new PrometheusMetrics object.
+
+        Args:
+            command (str): The value of the ``command`` label of all metrics.
+        """
+        self.command = command
+        self._lock = threading.Lock()
+        self._counters = collections.defaultdict(float)
+        self._histograms = {}
+        self._start = time.perf_counter()
+        self._timestamp = time.time()
+
+    def __call__(self, record):
+        """Add the RequestRecord of a finished request or an EventRecord.
+
+        Args:
+            record (RequestRecord): The record of the request or an EventRecord.
+        """
+        with self._lock:
+            if isinstance(record, EventRecord):
+                self._add_event(record)
+            else:
+                self._add_request(record)
+
+    def _add_request(self, record):
+        """Add the RequestRecord of a finished request."""
+        status = str(record.status) if record.status is not None else 'error'
+        self._inc('vagrancy_requests_total', 1, endpoint = record.url_class,
+                  method = record.method, status = status)
+        self._observe('vagrancy_request_duration_seconds', record.duration,
+                      endpoint = record.url_class, method = record.method)
+
+        box = get_box_name(record.url)
+        if record.retries:
+            self._inc('vagrancy_retries_total', record.retries, box = box,
+                      endpoint = record.url_class)
+
+        if record.url_class == 'box_file' and record.method in ('GET', 'PUT'):
+            direction = 'download' if record.method == 'GET' else 'upload'
+            self._inc('vagrancy_transfer_bytes_total', record.num_bytes, box = box,
+                      direction = direction)
+            self._inc('vagrancy_transfer_duration_seconds_total', record.duration, box = box,
+                      direction = direction)
+
+    def _add_event(self, record):
+        """Add an EventRecord."""
+        if record.name == 'retry':
+            self._inc('vagrancy_retries_total', 1, box = get_box_name(record.url),
+                      endpoint = record.url_class)
+        else:
+            cache, _, result = record.name.rpartition('_cache_')
+            self._inc('vagrancy_cache_requests_total', 1, cache = cache, result = result)
+
+    def _get_key(self, name, labels):
+        """Get the key of a series consisting of the name and the sorted labels."""
+        return name, tuple(sorted(dict(labels, command = self.command).items()))
+
+    def _inc(self, name, value, **labels):
+        """Increment a counter."""
+        self._counters[self._get_key(name, labels)] += value
+
+    def _observe(self, name, value, **labels):
+        """Add an observation to a histogram."""
+        key = self._get_key(name, labels)
+        if key not in self._histograms:
+            self._histograms[key] = [[0] * len(DURATION_BUCKETS), 0.0, 0]
+        histogram = self._histograms[key]
+        for index, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                histogram[0][index] += 1
+        histogram[1] += value
+        histogram[2] += 1
+
+    # pylint: disable=R0914
+    def format(self, exit_code = 0):
+        """Format the metrics in the Prometheus text format.
+
+        Args:
+            exit_code (int): The exit code of the run.
+
+        Returns:
+            str: The metrics.
+        """
+        with self._lock:
+            samples = collections.defaultdict(list)
+            for (name, labels), value in sorted(self._counters.items()):
+                samples[name].append((name, labels, value))
+            for (name, labels), (buckets, total, count) in sorted(self._histograms.items()):
+                for bound, bucket_count in zip(DURATION_BUCKETS, buckets):
+                    samples[name].append((name + '_bucket', labels + (('le', repr(bound)),),
+                                          bucket_count))
+                samples[name].append((name + '_bucket', labels + (('le', '+Inf'),), count))
+                samples[name].append((name + '_sum', labels, total))
+                samples[name].append((name + '_count', labels, count))
+
+        run_labels = (('command', self.command),)
+        samples['vagrancy_run_duration_seconds'].append(
+            ('vagrancy_run_duration_seconds', run_labels, time.perf_counter() - self._start))
+        samples['vagrancy_run_exit_code'].append(
+            ('vagrancy_run_exit_code', run_labels, exit_code))
+        samples['vagrancy_run_timestamp_seconds'].append(
+            ('vagrancy_run_timestamp_seconds', run_labels, self._timestamp))
+
+        lines = []
+        for name, (metric_type, help_text) in _METRICS.items():
+            if not samples[name]:
+                continue
+            lines.append("# HELP %s %s" % (name, help_text))
+            lines.append("# TYPE %s %s" % (name, metric_type))
+            for sample_name, labels, value in samples[name]:
+                lines.append("%s{%s} %s" % (sample_name, _format_labels(labels),
+                                            _format_value(value)))
+        return "\n".join(lines) + "\n"
+
+    def write(self, metrics_file, exit_code = 0):
+        """Replace the metrics file atomically.
+
+        The metrics are written to a temporary file in the same directory that
+        is renamed to `metrics_file` afterwards.
+
+        Args:
+            metrics_file (str): The path of the metrics file, e.g., a ``.prom`` file
+                                in the directory of the textfile collector.
+            exit_code (int):    The exit code of the run.
+        """
+        tmp_file = '%s.%d.tmp' % (metrics_file, os.getpid())
+        try:
+            with open(tmp_file, 'w', encoding = 'utf-8') as handle:
+                handle.write(self.format(exit_code))
+            os.replace(tmp_file, metrics_file)
+        except BaseException:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            raise
+
+
+# -----------------------------------------------------------------------------
+# Internal Functions
+# -----------------------------------------------------------------------------
+def _format_labels(labels):
+    """Format the labels of a sample."""
+    return ",".join('%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"')
+                                 .replace('\n', '\\n'))
+                    for name, value in labels)
+
+
+def _format_value(value):
+    """Format the value of a sample."""
+    if float(value).is_integer():
+        return "%d" % value
+    return repr(float(value))
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
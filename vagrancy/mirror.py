@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""
+Local mirror of box files.
+
+This module specifies the class :class:`Mirror` that keeps a local directory
+in sync with a set of box files on a vagrancy server. The box files are stored
+as ``<directory>/<username>/<name>/<version>/<provider>.box``.
+
+The size, the ETag and the Last-Modified values of each mirrored box file are
+kept in the state file ``.vagrancy-sync.json`` in the directory. A box file is
+only downloaded if it is not mirrored yet, the local file has a different size
+or a ``HEAD`` request reports different values than the state file. Only box
+files recorded in the state file that match the patterns of the current
+selection are ever deleted, and only if all selected box files were
+synchronized successfully. So syncing a subset of the boxes never deletes the
+mirrored box files of other boxes.
+
+Attributes:
+    STATE_FILE (str): The name of the state file in the mirror directory.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import fnmatch
+import json
+import os
+
+from .defaults import DEFAULT_CHUNK_SIZE, DEFAULT_RETRIES
+
+
+# -----------------------------------------------------------------------------
+# Module Variables
+# -----------------------------------------------------------------------------
+STATE_FILE = '.vagrancy-sync.json'
+
+
+# -----------------------------------------------------------------------------
+# Class Definitions
+# -----------------------------------------------------------------------------
+class Mirror:
+    """Local mirror of box files of a vagrancy server.
+
+    Attributes:
+        directory (str): The directory of the mirror.
+    """
+
+    def __init__(self, vagrancy, directory):
+        """Create a new Mirror object.
+
+        Args:
+            vagrancy (Vagrancy): The client object used for all requests.
+            directory (str):     The directory of the mirror.
+        """
+        self._vagrancy = vagrancy
+        self.directory = directory
+
+    def load_state(self):
+        """Load the state of the mirror.
+
+        Returns:
+            dict: The state entries indexed by the relative path of the box files.
+        """
+        try:
+            with open(os.path.join(self.directory, STATE_FILE), 'r', encoding = 'utf-8') as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self, state):
+        """Save the state of the mirror atomically.
+
+        Args:
+            state (dict): The state entries indexed by the relative path of the box files.
+        """
+        os.makedirs(self.directory, exist_ok = True)
+        state_file = os.path.join(self.directory, STATE_FILE)
+        with open(state_file + '.tmp', 'w', encoding = 'utf-8') as handle:
+            json.dump(state, handle, indent = 1, sort_keys = True)
+        os.replace(state_file + '.tmp', state_file)
+
+    def get_relative_path(self, box_file):
+        """Get the path of the box file relative to the mirror directory.
+
+        Args:
+            box_file (BoxFile): The box file.
+
+        Returns:
+            str: The relative path.
+        """
+        return os.path.relpath(box_file.get_local_path(self.directory), self.directory)
+
+    # pylint: disable=R0913,R0914
+    def sync(self, box_files, delete = False, chunk_size = DEFAULT_CHUNK_SIZE,
+             retries = DEFAULT_RETRIES, rate_limiter = None, callback = None,
+             box_pattern = "*", version_pattern = "*", provider_pattern = "*"):
+        """Synchronize the mirror with the given box files.
+
+        Args:
+            box_files (list):           The BoxFile objects to mirror.
+            delete (bool):              If True, mirrored box files that match the
+                                        patterns but are not contained in `box_files`
+                                        are deleted. The deletion is skipped if any
+                                        box file failed.
+            chunk_size (int):           The size of the transfer buffer in bytes.
+            retries (int):              The number of retries of interrupted downloads.
+            rate_limiter (RateLimiter): The optional limit of the aggregate throughput.
+            callback (callable):        An optional function called with the BoxFile
+                                        object and the result of each finished
+                                        download (see
+                                        :meth:`vagrancy.client.Vagrancy.download_box_files`).
+            box_pattern (str):          The box name pattern `box_files` were selected by.
+            version_pattern (str):      The version pattern `box_files` were selected by.
+                                        The special patterns '+1' and '-1' match all
+                                        versions.
+            provider_pattern (str):     The provider pattern `box_files` were selected by.
+
+        Returns:
+            dict: The lists of the relative paths of the ``downloaded``, ``unchanged``,
+            ``deleted`` and ``failed`` box files.
+        """
+        state = self.load_state()
+        summary = {'downloaded': [], 'unchanged': [], 'deleted': [], 'failed': []}
+
+        infos = self._vagrancy.stat_box_files(box_files)
+        changed = []
+        for box_file, info in zip(box_files, infos):
+            rel_path = self.get_relative_path(box_file)
+            if self._is_unchanged(state.get(rel_path), info, rel_path):
+                summary['unchanged'].append(rel_path)
+            else:
+                changed.append((box_file, info))
+
+        results = self._vagrancy.download_box_files([box_file for box_file, _ in changed],
+                                                    self.directory, chunk_size, retries,
+                                                    rate_limiter = rate_limiter,
+                                                    callback = callback)
+        for (box_file, info), (success, size, _) in zip(changed, results):
+            rel_path = self.get_relative_path(box_file)
+            if success:
+                info = info or {'etag': None, 'last_modified': None}
+                state[rel_path] = {'url':           box_file.get_url(),
+                                   'size':          size,
+                                   'etag':          info['etag'],
+                                   'last_modified': info['last_modified']}
+                summary['downloaded'].append(rel_path)
+            else:
+                summary['failed'].append(rel_path)
+
+        # A failed box file indicates a transient error of the server, so
+        # nothing is deleted until a sync succeeded completely.
+        if delete and not summary['failed']:
+            wanted = {self.get_relative_path(box_file) for box_file in box_files}
+            for rel_path in sorted(set(state) - wanted):
+                if not _is_selected(rel_path, box_pattern, version_pattern, provider_pattern):
+                    continue
+                self._remove(rel_path)
+                del state[rel_path]
+                summary['deleted'].append(rel_path)
+
+        self.save_state(state)
+        return summary
+
+    def _is_unchanged(self, entry, info, rel_path):
+        """Check if the mirrored box file is the same as the one on the server.
+
+        Args:
+            entry (dict):   The state entry of the box file or None.
+            info (dict):    The result of :meth:`BoxFile.stat` or None.
+            rel_path (str): The relative path of the box file.
+
+        Returns:
+            bool: True if the box file does not need to be downloaded.
+        """
+        if entry is None or info is None:
+            return False
+
+        path = os.path.join(self.directory, rel_path)
+        if not os.path.exists(path) or os.path.getsize(path) != entry['size']:
+            return False
+
+        return (info['size'] in (None, entry['size']) and
+                info['etag'] == entry['etag'] and
+                info['last_modified'] == entry['last_modified'])
+
+    def _remove(self, rel_path):
+        """Remove a mirrored box file and its empty parent directories."""
+        path = os.path.join(self.directory, rel_path)
+        if os.path.exists(path):
+            os.remove(path)
+
+        parent = os.path.dirname(path)
+        while (os.path.abspath(parent) != os.path.abspath(self.directory) and
+               os.path.isdir(parent) and not os.listdir(parent)):
+            os.rmdir(parent)
+            parent = os.path.dirname(parent)
+
+
+# -----------------------------------------------------------------------------
+# Internal Functions
+# -----------------------------------------------------------------------------
+def _is_selected(rel_path, box_pattern, version_pattern, provider_pattern):
+    """Check if a mirrored box file matches the patterns of a selection.
+
+    Args:
+        rel_path (str):         The path of the box file relative to the mirror directory.
+        box_pattern (str):      The box name pattern.
+        version_pattern (str):  The version pattern. The special patterns '+1' and
+                                '-1' match all versions.
+        provider_pattern (str): The provider pattern.
+
+    Returns:
+        bool: True if the box file matches all patterns.
+    """
+    parts = rel_path.split(os.sep)
+    if len(parts) != 4 or not parts[3].endswith('.box'):
+        return False
+
+    username, name, version, file_name = parts
+    return (fnmatch.fnmatch("%s/%s" % (username, name), box_pattern) and
+            (version_pattern in ('+1', '-1') or fnmatch.fnmatch(version, version_pattern)) and
+            fnmatch.fnmatch(file_name[:-len('.box')], provider_pattern))
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
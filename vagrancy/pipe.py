@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""
+Bounded in-memory pipe between a download and an upload.
+
+This module specifies the class :class:`Pipe` that reads the body of a
+download in a background thread and provides it as the body of an upload. At
+most `max_chunks` chunks are buffered, so the memory usage does not depend on
+the size of the box file, while the download and the upload still overlap.
+
+The default size of the buffer is specified in :mod:`vagrancy.defaults`.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import queue
+import threading
+
+from .defaults import DEFAULT_BUFFER_SIZE, DEFAULT_CHUNK_SIZE
+
+
+# -----------------------------------------------------------------------------
+# Module Variables
+# -----------------------------------------------------------------------------
+# The interval in seconds the reader thread checks if the pipe was closed
+_POLL_INTERVAL = 0.1
+
+
+# -----------------------------------------------------------------------------
+# Class Definitions
+# -----------------------------------------------------------------------------
+class Pipe:
+    """Iterable upload body fed by a reader thread through a bounded queue.
+
+    The object has a length, so that it is sent with a ``Content-Length``
+    header instead of a chunked transfer encoding.
+
+    Attributes:
+        size (int):       The number of bytes passed through the pipe.
+        chunk_size (int): The size of the chunks read from the reader.
+    """
+
+    # pylint: disable=R0913
+    def __init__(self, reader, size, chunk_size = DEFAULT_CHUNK_SIZE,
+                 buffer_size = DEFAULT_BUFFER_SIZE, rate_limiter = None):
+        """Create a new Pipe object.
+
+        Args:
+            reader:                     The reader supporting ``read()``, e.g., the body of
+                                        a streamed response.
+            size (int):                 The number of bytes to pass through the pipe.
+            chunk_size (int):           The size of the chunks read from the reader.
+            buffer_size (int):          The maximum number of buffered bytes. It is
+                                        rounded up to a multiple of `chunk_size`.
+            rate_limiter (RateLimiter): The optional limit of the throughput.
+        """
+        self.size = size
+        self.chunk_size = chunk_size
+        self._reader = reader
+        self._rate_limiter = rate_limiter
+        self._queue = queue.Queue(maxsize = max(1, -(-buffer_size // chunk_size)))
+        self._closed = threading.Event()
+        self._error = None
+        self._thread = None
+
+    def __len__(self):
+        """Get the number of bytes passed through the pipe."""
+        return self.size
+
+    def __iter__(self):
+        """Iterate over the chunks read from the reader.
+
+        Raises:
+            IOError: Raised if the reader ends before `size` bytes were read.
+        """
+        self._thread = threading.Thread(target = self._read_all, daemon = True)
+        self._thread.start()
+
+        num_passed = 0
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                break
+            num_passed += len(chunk)
+            yield chunk
+
+        if self._error is not None:
+            raise self._error
+        if num_passed != self.size:
+            raise IOError("Pipe received %d of %d bytes!" % (num_passed, self.size))
+
+    def close(self):
+        """Stop the reader thread, e.g., if the upload failed."""
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _read_all(self):
+        """Read the chunks from the reader into the queue."""
+        try:
+            while not self._closed.is_set():
+                chunk = self._reader.read(self.chunk_size)
+                if not chunk:
+                    break
+                if self._rate_limiter is not None:
+                    self._rate_limiter.consume(len(chunk))
+                self._put(chunk)
+        except Exception as exception:  # pylint: disable=W0703
+            self._error = exception
+        self._put(None)
+
+    def _put(self, item):
+        """Put the item into the queue unless the pipe is closed meanwhile."""
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout = _POLL_INTERVAL)
+                return
+            except queue.Full:
+                pass
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""
+CPU and memory profiling of a block of code.
+
+This module specifies the context manager :class:`Profiler` used by the
+``--profile-cpu``, ``--profile-mem`` and ``--profile-top`` options of
+vagrancyCtrl. It profiles the CPU time using :mod:`cProfile` and the memory
+allocations using :mod:`tracemalloc`. The results are written when the block
+is left in any way, including a ``sys.exit()`` of the command.
+
+Note that :mod:`cProfile` only profiles the thread that entered the block, so
+the time spent in the worker threads of concurrent requests appears as waiting
+time. The memory allocations of all threads are traced.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import sys
+
+
+# -----------------------------------------------------------------------------
+# Class Definitions
+# -----------------------------------------------------------------------------
+class Profiler:
+    """Context manager profiling the CPU time and the memory allocations.
+
+    Attributes:
+        cpu_file (str): The path of the pstats file or None.
+        mem_file (str): The path of the tracemalloc snapshot file or None.
+        top (int):      The number of entries of the summary printed on stderr
+                        or None.
+    """
+
+    def __init__(self, cpu_file = None, mem_file = None, top = None):
+        """Create a new Profiler object.
+
+        The summary covers the requested profilers. If only `top` is given, the
+        CPU time is profiled for the summary.
+
+        Args:
+            cpu_file (str): The path of the pstats file written by the CPU profiler.
+                            If None, the CPU time is not written to a file.
+            mem_file (str): The path of the tracemalloc snapshot file. If None, the
+                            memory allocations are not traced.
+            top (int):      The number of functions and allocation sites printed on
+                            stderr. If None, no summary is printed.
+        """
+        self.cpu_file = cpu_file
+        self.mem_file = mem_file
+        self.top = top
+        self._profile = None
+        self._tracemalloc = None
+
+    def __enter__(self):
+        """Start the profilers.
+
+        Returns:
+            Profiler: This object.
+        """
+        # The profilers are only imported if they are requested.
+        # pylint: disable=C0415
+        if self.cpu_file or (self.top and not self.mem_file):
+            import cProfile
+            self._profile = cProfile.Profile()
+
+        if self.mem_file:
+            import tracemalloc
+            self._tracemalloc = tracemalloc
+            tracemalloc.start()
+
+        if self._profile is not None:
+            self._profile.enable()
+        return self
+
+    def __exit__(self, *_):
+        """Stop the profilers, write their results and print the summary."""
+        if self._profile is not None:
+            self._profile.disable()
+
+        # The snapshot is taken first, so it does not contain the allocations of
+        # the CPU summary.
+        snapshot = peak = None
+        if self._tracemalloc is not None:
+            snapshot = self._tracemalloc.take_snapshot()
+            _, peak = self._tracemalloc.get_traced_memory()
+            self._tracemalloc.stop()
+            snapshot.dump(self.mem_file)
+
+        if self._profile is not None:
+            if self.cpu_file:
+                self._profile.dump_stats(self.cpu_file)
+            if self.top:
+                self._print_cpu_summary()
+
+        if self._tracemalloc is not None and self.top:
+            self._print_mem_summary(snapshot, peak)
+
+    def _print_cpu_summary(self):
+        """Print the functions with the highest cumulative time on stderr."""
+        import pstats  # pylint: disable=C0415
+        stats = pstats.Stats(self._profile, stream = sys.stderr)
+        stats.sort_stats('cumulative').print_stats(self.top)
+
+    def _print_mem_summary(self, snapshot, peak):
+        """Print the allocation sites with the largest allocated size on stderr."""
+        sys.stderr.write("Peak traced memory: %.1f MiB\n" % (peak / (1024 * 1024)))
+        sys.stderr.write("Top %d allocation sites:\n" % self.top)
+        for statistic in snapshot.statistics('lineno')[:self.top]:
+            sys.stderr.write(" %s\n" % statistic)
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""
+Bandwidth limit of transfers.
+
+This module specifies the class :class:`RateLimiter` that implements a token
+bucket shared by all transfers it is passed to. Each transfer consumes tokens
+for the bytes it has read and waits if the bucket is exhausted, so that the
+aggregate throughput of all transfers does not exceed the configured rate.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import threading
+import time
+
+
+# -----------------------------------------------------------------------------
+# Class Definitions
+# -----------------------------------------------------------------------------
+# pylint: disable=R0903
+class RateLimiter:
+    """Thread-safe token bucket limiting the throughput in bytes per second.
+
+    The bucket holds the bytes of up to one second. A consumer that takes more
+    tokens than available drives the bucket into debt and sleeps until the debt
+    is paid back, so the next consumer waits for the remaining debt as well.
+
+    Attributes:
+        rate (float): The maximum throughput in bytes per second.
+    """
+
+    def __init__(self, rate):
+        """Create a new RateLimiter object.
+
+        Args:
+            rate (float): The maximum throughput in bytes per second.
+
+        Raises:
+            ValueError: If the `rate` is not positive.
+        """
+        if rate <= 0:
+            raise ValueError("The argument rate must be positive!")
+
+        self.rate = float(rate)
+        self._tokens = self.rate
+        self._timestamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, num_bytes):
+        """Take the tokens of the transferred bytes and wait if necessary.
+
+        Args:
+            num_bytes (int): The number of transferred bytes.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._timestamp) * self.rate)
+            self._timestamp = now
+            self._tokens -= num_bytes
+            delay = -self._tokens / self.rate
+
+        if delay > 0:
+            time.sleep(delay)
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""
+Retention policy of box files.
+
+This module specifies the class :class:`RetentionPolicy` that decides which box
+files of a set of boxes are kept and which ones are pruned. The latest version
+of each box and provider is always kept, so a policy never prunes a whole box.
+Any other box file is kept if at least one rule of the policy keeps it:
+
+- ``keep_last``: The box file is one of the latest `keep_last` versions of its
+  box and provider, using the version order of :class:`vagrancy.box.Box`.
+- ``keep_newer_than``: The box file was modified less than `keep_newer_than`
+  days ago according to the ``Last-Modified`` header of the server. Box files
+  with an unknown modification time are kept.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import email.utils
+import fnmatch
+import time
+
+
+# -----------------------------------------------------------------------------
+# Class Definitions
+# -----------------------------------------------------------------------------
+# pylint: disable=R0903
+class RetentionPolicy:
+    """Declarative policy selecting the box files to prune.
+
+    Attributes:
+        keep_last (int):         The number of latest versions to keep per box and
+                                 provider or None.
+        keep_newer_than (float): The age in days below that box files are kept or None.
+    """
+
+    def __init__(self, keep_last = None, keep_newer_than = None):
+        """Create a new RetentionPolicy object.
+
+        Args:
+            keep_last (int):         The number of latest versions to keep per box and
+                                     provider. If None, the rule is not used.
+            keep_newer_than (float): The age in days below that box files are kept. If
+                                     None, the rule is not used.
+
+        Raises:
+            ValueError: If no rule is specified or `keep_last` is below 1 or
+                        `keep_newer_than` is negative, since that would prune
+                        everything.
+        """
+        if keep_last is None and keep_newer_than is None:
+            raise ValueError("A retention policy needs at least one rule!")
+        if keep_last is not None and keep_last < 1:
+            raise ValueError("The keep_last rule must keep at least one version!")
+        if keep_newer_than is not None and keep_newer_than < 0:
+            raise ValueError("The keep_newer_than rule must not be negative!")
+
+        self.keep_last = keep_last
+        self.keep_newer_than = keep_newer_than
+
+    # pylint: disable=R0914
+    def evaluate(self, vagrancy, boxes, provider_pattern = "*", now = None):
+        """Evaluate the policy over the given boxes.
+
+        The latest version of each box and provider is always kept. The
+        modification times are only requested for box files that are not
+        already kept by the ``keep_last`` rule. The requests are performed
+        concurrently by :meth:`vagrancy.client.Vagrancy.stat_box_files`.
+
+        Args:
+            vagrancy (Vagrancy):    The client object used for the requests.
+            boxes (list):           The Box objects to evaluate.
+            provider_pattern (str): A pattern of the providers to evaluate.
+            now (float):            The current time as a POSIX timestamp. If None,
+                                    the current system time is used.
+
+        Returns:
+            tuple: The lists of the BoxFile objects to keep and to prune.
+        """
+        keep_last = self.keep_last if self.keep_last is not None else 1
+        keep = []
+        candidates = []
+        for box in boxes:
+            for provider in fnmatch.filter(box.provider_sorted_versions, provider_pattern):
+                for rank, version in enumerate(box.provider_sorted_versions[provider]):
+                    box_file = box.provider_version_map[provider][version]
+                    if rank < keep_last:
+                        keep.append(box_file)
+                    else:
+                        candidates.append(box_file)
+
+        if self.keep_newer_than is None or not candidates:
+            return keep, candidates
+
+        now = time.time() if now is None else now
+        prune = []
+        for box_file, info in zip(candidates, vagrancy.stat_box_files(candidates)):
+            modified = _parse_http_date(info['last_modified']) if info else None
+            if modified is None or now - modified < self.keep_newer_than * 86400:
+                keep.append(box_file)
+            else:
+                prune.append(box_file)
+
+        return keep, prune
+
+
+# -----------------------------------------------------------------------------
+# Internal Functions
+# -----------------------------------------------------------------------------
+def _parse_http_date(value):
+    """Parse an HTTP date into a POSIX timestamp or return None if it is invalid."""
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
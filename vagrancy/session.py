@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""
+HTTP session used to communicate with a vagrancy server.
+
+This module specifies the function :func:`create_session` that creates a
+connection-pooled :class:`requests.Session`. A single session is owned by a
+:class:`vagrancy.client.Vagrancy` object and shared with all
+:class:`vagrancy.box.Box` and :class:`vagrancy.box_file.BoxFile` objects it
+creates, so that connections are reused across requests. Each request of the
+session is reported to the hooks of :mod:`vagrancy.instrumentation`.
+
+The default settings of the session are specified in :mod:`vagrancy.defaults`.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from urllib3.util.retry import Retry
+
+from . import instrumentation
+from .defaults import DEFAULT_BACKOFF_FACTOR, DEFAULT_MAX_RETRIES, DEFAULT_POOL_SIZE
+
+
+# -----------------------------------------------------------------------------
+# Class Definitions
+# -----------------------------------------------------------------------------
+class _InstrumentedSession(requests.Session):
+    """Session reporting each request to the hooks of :mod:`vagrancy.instrumentation`."""
+
+    def send(self, request, **kwargs):
+        """Send the prepared request and report it once it is finished.
+
+        The time to the first byte is the time until the response headers were
+        received. The body of a streamed response is read by the caller, so
+        the request is reported when the response is closed.
+
+        Args:
+            request (requests.PreparedRequest): The request to send.
+            **kwargs:                           The arguments of requests.Session.send().
+
+        Returns:
+            requests.Response: The response.
+        """
+        if not instrumentation.is_enabled():
+            return super().send(request, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except Exception:
+            _report(request, None, 0, start, time.perf_counter() - start, 0)
+            raise
+
+        ttfb = response.elapsed.total_seconds()
+        if not kwargs.get('stream', False):
+            _report(request, response.status_code, len(response.content), start, ttfb,
+                    _get_num_retries(response))
+            return response
+
+        close = response.close
+
+        def close_and_report():
+            response.close = close
+            num_bytes = _get_num_streamed(response)
+            close()
+            _report(request, response.status_code, num_bytes, start, ttfb,
+                    _get_num_retries(response))
+
+        response.close = close_and_report
+        return response
+
+
+# -----------------------------------------------------------------------------
+# Exported Functions
+# -----------------------------------------------------------------------------
+def create_session(pool_size = DEFAULT_POOL_SIZE,
+                   max_retries = DEFAULT_MAX_RETRIES,
+                   keep_alive = True,
+                   backoff_factor = DEFAULT_BACKOFF_FACTOR):
+    """Create a new connection-pooled session.
+
+    Only idempotent requests (``HEAD``, ``GET`` and ``DELETE``) are retried on
+    server errors. Uploads are never retried, since their payload stream is
+    consumed by the first attempt.
+
+    Args:
+        pool_size (int):        The maximum number of connections kept per host.
+        max_retries (int):      The number of retries of failed requests.
+        keep_alive (bool):      If False, connections are closed after each request.
+        backoff_factor (float): The backoff factor between retries in seconds.
+
+    Returns:
+        requests.Session: The new session object.
+    """
+    retry = Retry(total = max_retries,
+                  backoff_factor = backoff_factor,
+                  status_forcelist = (502, 503, 504),
+                  allowed_methods = frozenset(['HEAD', 'GET', 'DELETE']),
+                  raise_on_status = False)
+    adapter = HTTPAdapter(pool_connections = pool_size,
+                          pool_maxsize = pool_size,
+                          max_retries = retry)
+
+    session = _InstrumentedSession()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+
+    return session
+
+
+# -----------------------------------------------------------------------------
+# Internal Functions
+# -----------------------------------------------------------------------------
+def _get_num_streamed(response):
+    """Get the number of body bytes read from a streamed response."""
+    return response.raw.tell() if hasattr(response.raw, 'tell') else 0
+
+
+def _get_num_retries(response):
+    """Get the number of retries performed by urllib3 to get the response."""
+    retries = getattr(response.raw, 'retries', None)
+    return len(getattr(retries, 'history', ()))
+
+
+# pylint: disable=R0913
+def _report(request, status, num_received, start, ttfb, retries):
+    """Pass the record of a finished request to the hooks."""
+    num_sent = int(request.headers.get('Content-Length', 0) or 0)
+    instrumentation.notify(instrumentation.RequestRecord(
+        method = request.method,
+        url = request.url,
+        url_class = instrumentation.classify_url(request.url),
+        status = status,
+        num_bytes = num_sent + num_received,
+        start = start,
+        ttfb = ttfb,
+        duration = time.perf_counter() - start,
+        retries = retries))
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
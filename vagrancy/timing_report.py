@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""
+Aggregated timings of the HTTP requests.
+
+This module specifies the class :class:`TimingReport` that is registered as a
+hook of :mod:`vagrancy.instrumentation` and summarizes the requests per endpoint
+class and method: the number of requests and failed requests, the 50th and 95th
+percentile of the time to the first byte and of the total duration, and the
+throughput of the transferred bytes. The throughput refers to the time at least
+one of the requests was active, so concurrent requests, e.g., the segments of a
+download, are not counted twice. It is printed by the ``--timings`` option
+of vagrancyCtrl.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import collections
+import math
+import threading
+
+from .instrumentation import RequestRecord
+
+
+# -----------------------------------------------------------------------------
+# Class Definitions
+# -----------------------------------------------------------------------------
+class TimingReport:
+    """Collector of the request records of :mod:`vagrancy.instrumentation`.
+
+    Attributes:
+        records (list): The collected RequestRecord objects.
+    """
+
+    def __init__(self):
+        """Create a new empty TimingReport object."""
+        self.records = []
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        """Collect the record of a finished request.
+
+        Args:
+            record (RequestRecord): The record of the request. Other records, i.e.,
+                                    EventRecord objects, are ignored.
+        """
+        if not isinstance(record, RequestRecord):
+            return
+        with self._lock:
+            self.records.append(record)
+
+    def format(self):
+        """Format the aggregated timings.
+
+        Returns:
+            str: The report consisting of one line per endpoint class and method.
+        """
+        with self._lock:
+            records = list(self.records)
+
+        if not records:
+            return "Timings: No HTTP requests.\n"
+
+        groups = collections.defaultdict(list)
+        for record in records:
+            groups[(record.url_class, record.method)].append(record)
+
+        wall_time = (max(record.start + record.duration for record in records) -
+                     min(record.start for record in records))
+        lines = ["Timings: %d HTTP requests in %.3f s (times in ms)" % (len(records), wall_time),
+                 "%-10s %-6s %6s %6s %7s %7s %7s %7s %7s %7s" % (
+                     "Endpoint", "Method", "Count", "Failed", "TTFB50", "TTFB95",
+                     "Time50", "Time95", "MB", "MB/s")]
+        for (url_class, method), group in sorted(groups.items()):
+            ttfbs = sorted(record.ttfb for record in group)
+            durations = sorted(record.duration for record in group)
+            num_bytes = sum(record.num_bytes for record in group)
+            busy_time = get_busy_time(group)
+            num_failed = sum(1 for record in group
+                             if record.status is None or record.status >= 400)
+            lines.append("%-10s %-6s %6d %6d %7.1f %7.1f %7.1f %7.1f %7.1f %7s" % (
+                url_class, method, len(group), num_failed,
+                get_percentile(ttfbs, 50) * 1000, get_percentile(ttfbs, 95) * 1000,
+                get_percentile(durations, 50) * 1000, get_percentile(durations, 95) * 1000,
+                num_bytes / 1e6,
+                "%.1f" % (num_bytes / 1e6 / busy_time) if num_bytes and busy_time else "-"))
+        return "\n".join(lines) + "\n"
+
+
+# -----------------------------------------------------------------------------
+# Exported Functions
+# -----------------------------------------------------------------------------
+def get_busy_time(records):
+    """Get the time at least one of the requests was active.
+
+    Args:
+        records (list): The RequestRecord objects.
+
+    Returns:
+        float: The length of the union of the request intervals in seconds.
+    """
+    busy_time = 0.0
+    busy_end = None
+    for record in sorted(records, key = lambda record: record.start):
+        end = record.start + record.duration
+        if busy_end is None or record.start >= busy_end:
+            busy_time += record.duration
+            busy_end = end
+        elif end > busy_end:
+            busy_time += end - busy_end
+            busy_end = end
+    return busy_time
+
+
+def get_percentile(values, percent):
+    """Get a percentile of sorted values using the nearest-rank method.
+
+    Args:
+        values (list):   The sorted values.
+        percent (float): The percentile between 0 and 100.
+
+    Returns:
+        float: The value of the percentile or 0.0 if there are no values.
+    """
+    if not values:
+        return 0.0
+    rank = max(1, int(math.ceil(percent / 100.0 * len(values))))
+    return values[rank - 1]
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""
+Trace of the operations as a tree of spans.
+
+This module specifies the class :class:`Tracer` that collects spans and writes
+them as a Chrome trace-event JSON file, which can be loaded into
+``chrome://tracing``, Perfetto or speedscope. Spans are opened by the context
+manager returned by :func:`span`::
+
+    with span("delete", box = box_name):
+        ...
+
+The parent of a span is the innermost open span of the current context, kept
+in a :mod:`contextvars` variable. Work handed to other threads is wrapped by
+:func:`propagate`, so that the spans opened by the threads are children of the
+span that submitted the work. The HTTP requests reported by
+:mod:`vagrancy.instrumentation` are added as spans, too.
+
+As long as no tracer is started by :func:`start_tracing`, :func:`span` returns
+a shared no-op object and :func:`propagate` returns the function as it is, so
+the spans cost a single global lookup.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+
+from . import instrumentation
+
+
+# -----------------------------------------------------------------------------
+# Module Variables
+# -----------------------------------------------------------------------------
+# The innermost open span of the current context
+_CURRENT_SPAN = contextvars.ContextVar('vagrancy_current_span', default = None)
+
+# The active tracer or None if tracing is disabled
+_TRACER = None
+
+
+# -----------------------------------------------------------------------------
+# Class Definitions
+# -----------------------------------------------------------------------------
+class Tracer:
+    """Collector of finished spans written as Chrome trace-event JSON.
+
+    Attributes:
+        events (list): The trace events of the finished spans.
+    """
+
+    def __init__(self):
+        """Create a new empty Tracer object."""
+        self.events = []
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._thread_names = {}
+        self._pid = os.getpid()
+
+    def __call__(self, record):
+        """Add the RequestRecord of a finished HTTP request as a span.
+
+        The request is a child of the innermost open span of the thread that
+        performed it. An EventRecord, e.g., a cache hit, is added as an instant
+        event.
+
+        Args:
+            record (RequestRecord): The record of the request or an EventRecord.
+        """
+        if isinstance(record, instrumentation.EventRecord):
+            self.add_instant(record.name, {'url': record.url})
+            return
+
+        self.add_span("%s %s" % (record.method, record.url_class), 'http',
+                      _CURRENT_SPAN.get(), record.start, record.duration,
+                      {'url':       record.url,
+                       'status':    record.status,
+                       'num_bytes': record.num_bytes,
+                       'ttfb_ms':   round(record.ttfb * 1000, 3),
+                       'retries':   record.retries})
+
+    def new_id(self):
+        """Get a new unique span id.
+
+        Returns:
+            int: The span id.
+        """
+        return next(self._ids)
+
+    # pylint: disable=R0913
+    def add_span(self, name, category, parent, start, duration, attributes, span_id = None):
+        """Add a finished span.
+
+        If the parent span was opened in another thread, a flow event from the
+        parent to the span is added, so that the viewer connects them.
+
+        Args:
+            name (str):         The name of the span.
+            category (str):     The category of the span, e.g., ``http``.
+            parent (Span):      The parent span or None.
+            start (float):      The start time as a :func:`time.perf_counter` value.
+            duration (float):   The duration in seconds.
+            attributes (dict):  The attributes shown as arguments of the span.
+            span_id (int):      The id of the span. If not specified, a new id is used.
+        """
+        thread = threading.current_thread()
+        span_id = span_id if span_id is not None else self.new_id()
+        timestamp = start * 1e6
+        args = dict(attributes, span_id = span_id,
+                    parent_id = parent.span_id if parent is not None else None)
+        events = [{'name': name, 'cat': category, 'ph': 'X', 'ts': timestamp,
+                   'dur': duration * 1e6, 'pid': self._pid, 'tid': thread.ident,
+                   'args': args}]
+        if parent is not None and parent.thread_id != thread.ident:
+            events.append({'name': 'submit', 'cat': category, 'ph': 's', 'id': span_id,
+                           'ts': timestamp, 'pid': self._pid, 'tid': parent.thread_id})
+            events.append({'name': 'submit', 'cat': category, 'ph': 'f', 'bp': 'e',
+                           'id': span_id, 'ts': timestamp, 'pid': self._pid,
+                           'tid': thread.ident})
+
+        with self._lock:
+            self._thread_names[thread.ident] = thread.name
+            self.events.extend(events)
+
+    def add_instant(self, name, attributes):
+        """Add an instant event of the current thread.
+
+        Args:
+            name (str):        The name of the event.
+            attributes (dict): The attributes shown as arguments of the event.
+        """
+        thread = threading.current_thread()
+        parent = _CURRENT_SPAN.get()
+        args = dict(attributes, parent_id = parent.span_id if parent is not None else None)
+        event = {'name': name, 'cat': 'event', 'ph': 'i', 's': 't',
+                 'ts': time.perf_counter() * 1e6, 'pid': self._pid, 'tid': thread.ident,
+                 'args': args}
+        with self._lock:
+            self._thread_names[thread.ident] = thread.name
+            self.events.append(event)
+
+    def write(self, trace_file):
+        """Write the trace as Chrome trace-event JSON.
+
+        Args:
+            trace_file (str): The path of the trace file.
+        """
+        with self._lock:
+            events = list(self.events)
+            thread_names = dict(self._thread_names)
+
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': thread_id,
+                     'args': {'name': thread_name}}
+                    for thread_id, thread_name in thread_names.items()]
+        with open(trace_file, 'w', encoding = 'utf-8') as handle:
+            json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, handle)
+
+
+class Span:
+    """An open span of the active tracer.
+
+    Attributes:
+        name (str):        The name of the span.
+        attributes (dict): The attributes of the span.
+        span_id (int):     The unique id of the span.
+        thread_id (int):   The identifier of the thread that opened the span.
+    """
+
+    __slots__ = ('_tracer', '_parent', '_start', '_token', 'name', 'attributes', 'span_id',
+                 'thread_id')
+
+    def __init__(self, tracer, name, attributes):
+        """Create a new Span object.
+
+        Args:
+            tracer (Tracer):   The tracer collecting the span.
+            name (str):        The name of the span.
+            attributes (dict): The attributes of the span.
+        """
+        self._tracer = tracer
+        self._parent = None
+        self._start = None
+        self._token = None
+        self.name = name
+        self.attributes = attributes
+        self.span_id = tracer.new_id()
+        self.thread_id = threading.get_ident()
+
+    def __enter__(self):
+        """Open the span as the innermost span of the current context.
+
+        Returns:
+            Span: This object.
+        """
+        self._parent = _CURRENT_SPAN.get()
+        self._token = _CURRENT_SPAN.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exception_type, exception, _):
+        """Close the span and add it to the tracer.
+
+        An exception leaving the span is recorded as the ``error`` attribute,
+        except for a :class:`SystemExit` with the exit code 0.
+        """
+        duration = time.perf_counter() - self._start
+        _CURRENT_SPAN.reset(self._token)
+        if exception_type is not None and not (issubclass(exception_type, SystemExit) and
+                                               exception.code in (None, 0)):
+            self.attributes['error'] = exception_type.__name__
+        self._tracer.add_span(self.name, 'vagrancy', self._parent, self._start, duration,
+                              self.attributes, self.span_id)
+
+
+class _NoSpan:
+    """Shared no-op span returned by :func:`span` if tracing is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        """Do nothing."""
+        return self
+
+    def __exit__(self, *_):
+        """Do nothing."""
+
+
+_NO_SPAN = _NoSpan()
+
+
+# -----------------------------------------------------------------------------
+# Exported Functions
+# -----------------------------------------------------------------------------
+def start_tracing(tracer):
+    """Activate the tracer for all spans and HTTP requests.
+
+    Args:
+        tracer (Tracer): The tracer to activate.
+    """
+    global _TRACER  # pylint: disable=W0603
+    _TRACER = tracer
+    instrumentation.add_hook(tracer)
+
+
+def stop_tracing():
+    """Deactivate the active tracer.
+
+    Returns:
+        Tracer: The deactivated tracer or None if tracing was not active.
+    """
+    global _TRACER  # pylint: disable=W0603
+    tracer, _TRACER = _TRACER, None
+    if tracer is not None:
+        instrumentation.remove_hook(tracer)
+    return tracer
+
+
+def span(name, **attributes):
+    """Get a context manager measuring a span of the active tracer.
+
+    Args:
+        name (str):    The name of the span.
+        **attributes:  The attributes of the span, e.g., the box name.
+
+    Returns:
+        The new Span object, or a no-op context manager if tracing is disabled.
+    """
+    if _TRACER is None:
+        return _NO_SPAN
+    return Span(_TRACER, name, attributes)
+
+
+def propagate(function):
+    """Bind the function to the spans of the current context.
+
+    The returned function can be called in other threads, e.g., by a thread
+    pool, and the spans opened by it are children of the current span. Each
+    call runs in its own copy of the context, so concurrent calls are possible.
+
+    Args:
+        function (callable): The function to bind.
+
+    Returns:
+        callable: The bound function or `function` itself if tracing is disabled.
+    """
+    if _TRACER is None:
+        return function
+
+    context = contextvars.copy_context()
+
+    def run_in_context(*args, **kwargs):
+        return context.copy().run(function, *args, **kwargs)
+
+    return run_in_context
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,439 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""
+Transfer of box file contents.
+
+This module specifies the functions used by :class:`vagrancy.box_file.BoxFile`
+to copy the body of a streamed HTTP response into a file descriptor. The data
+is read into a single preallocated buffer, so that the number of Python level
+iterations only depends on the chunk size.
+
+Downloads into files are written to a ``.part`` file first, that is renamed to
+the target file once the full length has arrived. An interrupted download is
+continued using a ``Range`` request, either by the next retry or by the next
+call with the same target file. The URL and the validator (ETag or Last-Modified
+header) of the ``.part`` file are kept in an additional ``.part.json`` file to
+ensure that only the same box file is continued.
+
+Large box files can also be downloaded in several byte ranges (segments) that
+are requested concurrently and written at their offset into a preallocated
+``.part`` file. Segmented downloads are not continued by later calls.
+
+All download functions accept an optional :class:`vagrancy.rate_limiter.RateLimiter`
+that limits the throughput of all transfers sharing it.
+
+The default chunk size and number of retries are specified in
+:mod:`vagrancy.defaults`.
+
+Attributes:
+    MIN_SEGMENT_SIZE (int):   The minimum size of a segment of a segmented download.
+    PART_SUFFIX (str):        The suffix of the file an incomplete download is written to.
+    TRANSFER_ERRORS (tuple):  The exceptions raised if a transfer is interrupted.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import http.client
+import json
+import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import urllib3
+
+from .         import instrumentation
+from .defaults import DEFAULT_CHUNK_SIZE, DEFAULT_RETRIES
+from .tracer   import propagate
+
+
+# -----------------------------------------------------------------------------
+# Module Variables
+# -----------------------------------------------------------------------------
+MIN_SEGMENT_SIZE   = 4 * 1024 * 1024
+PART_SUFFIX        = '.part'
+TRANSFER_ERRORS    = (requests.exceptions.ConnectionError,
+                      requests.exceptions.ChunkedEncodingError,
+                      urllib3.exceptions.HTTPError,
+                      http.client.HTTPException,
+                      http.client.IncompleteRead,
+                      socket.timeout,
+                      ConnectionError)
+
+
+# -----------------------------------------------------------------------------
+# Exported Functions
+# -----------------------------------------------------------------------------
+def get_body_reader(response):
+    """Get a reader of the body of a streamed response supporting ``readinto()``.
+
+    The :class:`urllib3.response.HTTPResponse` of the response is used, since it
+    decodes a content encoded body, counts the bytes read and wraps the errors
+    of the connection into urllib3 exceptions.
+
+    Args:
+        response (requests.Response): The response opened with ``stream=True``.
+
+    Returns:
+        The reader object.
+    """
+    raw = response.raw
+    raw.decode_content = True
+    return raw
+
+
+def write_all(file_descriptor, view):
+    """Write the whole buffer to the file descriptor.
+
+    In contrast to a single :func:`os.write` call, short writes as they occur on
+    pipes are handled by writing the remaining data again.
+
+    Args:
+        file_descriptor (int): The file descriptor to write to.
+        view (memoryview):     The data to write.
+    """
+    while view:
+        view = view[os.write(file_descriptor, view):]
+
+
+def pwrite_all(file_descriptor, view, offset):
+    """Write the whole buffer to the file descriptor at the given offset.
+
+    Args:
+        file_descriptor (int): The file descriptor to write to.
+        view (memoryview):     The data to write.
+        offset (int):          The position in the file to write to.
+    """
+    while view:
+        num_written = os.pwrite(file_descriptor, view, offset)
+        view = view[num_written:]
+        offset += num_written
+
+
+def copy_stream(reader, file_descriptor, chunk_size = DEFAULT_CHUNK_SIZE, offset = None,
+                rate_limiter = None):
+    """Copy all data from the reader to the file descriptor.
+
+    Args:
+        reader:                     The reader supporting ``readinto()``.
+        file_descriptor (int):      The file descriptor to write to.
+        chunk_size (int):           The size of the transfer buffer in bytes.
+        offset (int):               The position in the file to write to. If None,
+                                    the data is written at the current position.
+        rate_limiter (RateLimiter): The optional limit of the throughput.
+
+    Returns:
+        int: The number of bytes copied.
+    """
+    view = memoryview(bytearray(chunk_size))
+    num_copied = 0
+
+    while True:
+        num_read = reader.readinto(view)
+        if not num_read:
+            break
+        if rate_limiter is not None:
+            rate_limiter.consume(num_read)
+        if offset is None:
+            write_all(file_descriptor, view[:num_read])
+        else:
+            pwrite_all(file_descriptor, view[:num_read], offset + num_copied)
+        num_copied += num_read
+
+    return num_copied
+
+
+# pylint: disable=R0913
+def download_file(session, url, target, chunk_size = DEFAULT_CHUNK_SIZE,
+                  retries = DEFAULT_RETRIES, rate_limiter = None, header_callback = None):
+    """Download the URL into the target file, continuing previous downloads.
+
+    Args:
+        session (requests.Session): The session to use.
+        url (str):                  The URL to download.
+        target (str):               The path of the target file.
+        chunk_size (int):           The size of the transfer buffer in bytes.
+        retries (int):              The number of retries of interrupted downloads.
+        rate_limiter (RateLimiter): The optional limit of the throughput.
+        header_callback (callable): An optional function called with the headers of
+                                    each response whose body is written to the
+                                    file, so the last call describes the downloaded
+                                    contents.
+
+    Returns:
+        bool: Returns True on success, otherwise False.
+
+    Raises:
+        requests.exceptions.ConnectionError: Raised if the URL can not be
+            reached or the download is still interrupted after all retries.
+    """
+    part_file = target + PART_SUFFIX
+
+    for attempt in range(retries + 1):
+        if attempt > 0:
+            instrumentation.notify_event('retry', url)
+        try:
+            status_code, complete = _continue_download(session, url, part_file, chunk_size,
+                                                       rate_limiter, header_callback)
+        except TRANSFER_ERRORS:
+            if attempt == retries:
+                raise
+            continue
+
+        if status_code not in (200, 206, 416):
+            return False
+
+        if complete:
+            os.replace(part_file, target)
+            _remove_file(part_file + '.json')
+            return True
+
+    return False
+
+
+# pylint: disable=R0913,R0914
+def download_file_segmented(session, url, target, segments, chunk_size = DEFAULT_CHUNK_SIZE,
+                            retries = DEFAULT_RETRIES, rate_limiter = None,
+                            header_callback = None):
+    """Download the URL into the target file using concurrent range requests.
+
+    The size of the file is determined by a request of the first byte. If the
+    server does not support range requests, the size is unknown or the file is
+    too small to be split, the file is downloaded using :func:`download_file`.
+
+    Args:
+        session (requests.Session): The session to use. Its connection pool should
+                                    provide at least `segments` connections.
+        url (str):                  The URL to download.
+        target (str):               The path of the target file.
+        segments (int):             The maximum number of segments.
+        chunk_size (int):           The size of the transfer buffer of each segment.
+        retries (int):              The number of retries of each interrupted segment.
+        rate_limiter (RateLimiter): The optional limit of the throughput of all segments.
+        header_callback (callable): An optional function called with the headers of
+                                    the response describing the downloaded contents.
+
+    Returns:
+        bool: Returns True on success, otherwise False.
+
+    Raises:
+        requests.exceptions.ConnectionError: Raised if the URL can not be
+            reached or a segment is still interrupted after all retries.
+    """
+    with session.get(url, stream = True, headers = {'Range': 'bytes=0-0'}) as response:
+        total = get_total_size(response) if response.status_code == 206 else None
+        validator = response.headers.get('etag', response.headers.get('last-modified'))
+
+        headers = response.headers
+
+    segments = min(segments, (total or 0) // MIN_SEGMENT_SIZE)
+    if segments < 2 or not hasattr(os, 'pwrite'):
+        return download_file(session, url, target, chunk_size, retries, rate_limiter,
+                             header_callback)
+
+    # The segments are requested with If-Range, so all of them belong to the
+    # contents described by the headers of the first byte.
+    if header_callback is not None:
+        header_callback(headers)
+
+    part_file = target + PART_SUFFIX
+    _remove_file(part_file + '.json')
+    bounds = [total * index // segments for index in range(segments + 1)]
+
+    file_descriptor = os.open(part_file, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        if hasattr(os, 'posix_fallocate'):
+            os.posix_fallocate(file_descriptor, 0, total)
+        else:
+            os.ftruncate(file_descriptor, total)
+
+        with ThreadPoolExecutor(max_workers = segments) as executor:
+            download_segment = propagate(
+                lambda index: _download_segment(session, url, validator, file_descriptor,
+                                                bounds[index], bounds[index + 1],
+                                                chunk_size, retries, rate_limiter))
+            results = list(executor.map(download_segment, range(segments)))
+    except BaseException:
+        os.close(file_descriptor)
+        _remove_file(part_file)
+        raise
+
+    os.close(file_descriptor)
+    if not all(results):
+        _remove_file(part_file)
+        return False
+
+    os.replace(part_file, target)
+    return True
+
+
+def get_total_size(response):
+    """Get the total size of the file from a response to a (range) request.
+
+    Args:
+        response (requests.Response): The response.
+
+    Returns:
+        int: The total size in bytes or None if it is unknown.
+    """
+    if response.status_code in (206, 416):
+        total = response.headers.get('content-range', '*').rpartition('/')[2]
+    else:
+        total = response.headers.get('content-length', '*')
+
+    return int(total) if total.isdigit() else None
+
+
+# -----------------------------------------------------------------------------
+# Internal Functions
+# -----------------------------------------------------------------------------
+def _remove_file(path):
+    """Remove the file if it exists."""
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def _get_range_start(response):
+    """Get the first byte position of a partial content response."""
+    byte_range = response.headers.get('content-range', '').partition(' ')[2]
+    start = byte_range.partition('-')[0]
+    return int(start) if start.isdigit() else None
+
+
+def _get_part_offset(url, part_file):
+    """Get the size of a continuable part file and the headers to continue it.
+
+    Args:
+        url (str):       The URL to download.
+        part_file (str): The path of the part file.
+
+    Returns:
+        tuple: The offset to continue and the request headers.
+    """
+    info_file = part_file + '.json'
+    info = {}
+    if os.path.exists(info_file):
+        with open(info_file, 'r', encoding = 'utf-8') as handle:
+            info = json.load(handle)
+
+    if not os.path.exists(part_file) or info.get('url') != url:
+        _remove_file(part_file)
+        return 0, {}
+
+    offset = os.path.getsize(part_file)
+    if offset == 0:
+        return 0, {}
+
+    headers = {'Range': 'bytes=%d-' % offset}
+    if info.get('validator'):
+        headers['If-Range'] = info['validator']
+    return offset, headers
+
+
+# pylint: disable=R0913
+def _download_segment(session, url, validator, file_descriptor, start, end,
+                      chunk_size, retries, rate_limiter):
+    """Download the byte range [start, end) into the file descriptor.
+
+    Args:
+        session (requests.Session): The session to use.
+        url (str):                  The URL to download.
+        validator (str):            The ETag or Last-Modified value of the file.
+        file_descriptor (int):      The file descriptor of the part file.
+        start (int):                The first byte position of the segment.
+        end (int):                  The byte position after the segment.
+        chunk_size (int):           The size of the transfer buffer in bytes.
+        retries (int):              The number of retries of an interrupted segment.
+        rate_limiter (RateLimiter): The optional limit of the throughput.
+
+    Returns:
+        bool: Returns True if the complete segment was downloaded.
+    """
+    position = start
+
+    for attempt in range(retries + 1):
+        if attempt > 0:
+            instrumentation.notify_event('retry', url)
+        headers = {'Range': 'bytes=%d-%d' % (position, end - 1)}
+        if validator:
+            headers['If-Range'] = validator
+
+        try:
+            with session.get(url, stream = True, headers = headers) as response:
+                if response.status_code != 206 or _get_range_start(response) != position:
+                    # The server does not honor the range or the file changed
+                    return False
+                position += copy_stream(get_body_reader(response), file_descriptor,
+                                        min(chunk_size, end - position), position,
+                                        rate_limiter)
+        except TRANSFER_ERRORS:
+            if attempt == retries:
+                raise
+
+        if position >= end:
+            return position == end
+
+    return False
+
+
+# pylint: disable=R0913
+def _continue_download(session, url, part_file, chunk_size, rate_limiter, header_callback):
+    """Perform a single download attempt into the part file.
+
+    Args:
+        session (requests.Session): The session to use.
+        url (str):                  The URL to download.
+        part_file (str):            The path of the part file.
+        chunk_size (int):           The size of the transfer buffer in bytes.
+        rate_limiter (RateLimiter): The optional limit of the throughput.
+        header_callback (callable): The function called with the headers of the
+                                    response written to the part file or None.
+
+    Returns:
+        tuple: The HTTP status code and a flag indicating if the part file is complete.
+    """
+    offset, headers = _get_part_offset(url, part_file)
+
+    with session.get(url, stream = True, headers = headers) as response:
+        total = get_total_size(response)
+
+        if response.status_code == 416:
+            # The part file already covers the whole file or more than that
+            if total != offset:
+                _remove_file(part_file)
+            return response.status_code, total == offset
+
+        if response.status_code == 206 and _get_range_start(response) != offset:
+            _remove_file(part_file)
+            return response.status_code, False
+
+        if response.status_code == 200:
+            # The server ignored the range or the file changed: start over
+            offset = 0
+            validator = response.headers.get('etag', response.headers.get('last-modified'))
+            with open(part_file + '.json', 'w', encoding = 'utf-8') as handle:
+                json.dump({'url': url, 'validator': validator}, handle)
+        elif response.status_code != 206:
+            return response.status_code, False
+
+        if header_callback is not None:
+            header_callback(response.headers)
+        with open(part_file, 'ab' if offset else 'wb', buffering = 0) as payload:
+            offset += copy_stream(get_body_reader(response), payload.fileno(), chunk_size,
+                                  rate_limiter = rate_limiter)
+
+    return response.status_code, total is None or offset == total
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 by Clemens Rabe <clemens.rabe@clemensrabe.de>
+# All rights reserved.
+# This file is part of vagrancyCtrl (https://github.com/seeraven/vagrancyCtrl)
+# and is released under the "BSD 3-Clause License". Please see the LICENSE file
+# that is included as part of this package.
+#
+"""
+Version numbers of vagrant boxes.
+
+This module specifies the class :class:`Version` that orders version strings
+following the semantic versioning rules:
+
+- The release part ``1.2.3`` is compared part by part. Numeric parts are
+  compared as integers and rank above non-numeric parts, that are compared
+  lexically. So a box with a few versions like ``bionic`` still has an order.
+- A prerelease ``1.2.3-rc.1`` ranks below its release ``1.2.3``. Prerelease
+  identifiers are compared one by one, numeric identifiers as integers and
+  below alphanumeric identifiers. A hyphen only starts a prerelease if the
+  release is a numeric triple like ``1.2.3``, so a date like ``2020-01-01``
+  is a single non-numeric release part.
+- Build metadata ``1.2.3+build.5`` is ignored for the order.
+"""
+
+
+# -----------------------------------------------------------------------------
+# Module Import
+# -----------------------------------------------------------------------------
+import functools
+
+
+# -----------------------------------------------------------------------------
+# Class Definitions
+# -----------------------------------------------------------------------------
+@functools.total_ordering
+class Version:
+    """A version of a vagrant box ordered by its semantic version key.
+
+    Attributes:
+        text (str):  The version string.
+        key (tuple): The sort key of the version.
+    """
+
+    __slots__ = ('text', 'key')
+
+    def __init__(self, text):
+        """Create a new Version object.
+
+        Args:
+            text (str): The version string.
+        """
+        self.text = text
+        self.key = get_sort_key(text)
+
+    def __eq__(self, other):
+        """Check if both versions have the same order."""
+        if not isinstance(other, Version):
+            return NotImplemented
+        return self.key == other.key
+
+    def __lt__(self, other):
+        """Check if this version is older than the other version."""
+        if not isinstance(other, Version):
+            return NotImplemented
+        return self.key < other.key
+
+    def __hash__(self):
+        """Get the hash value of the sort key."""
+        return hash(self.key)
+
+    def __str__(self):
+        """Get the version string."""
+        return self.text
+
+    def __repr__(self):
+        """Get the representation of the object."""
+        return "Version(%r)" % self.text
+
+    def is_prerelease(self):
+        """Check if the version is a prerelease.
+
+        Returns:
+            bool: True if the version has a prerelease part.
+        """
+        return self.key[1][0] == 0
+
+    def next(self):
+        """Get the next release version.
+
+        The next version of a prerelease is its release, e.g., ``1.2.3`` for
+        ``1.2.3-rc.1``. Otherwise, the last part of the release is incremented,
+        e.g., ``1.2.4`` for ``1.2.3``.
+
+        Returns:
+            Version: The next version or None if the last part of the release is
+            not numeric.
+        """
+        release, prerelease = _split_version(self.text)
+        if prerelease:
+            return Version(release)
+
+        parts = release.split('.')
+        if not parts[-1].isdigit():
+            return None
+
+        parts[-1] = str(int(parts[-1]) + 1)
+        return Version('.'.join(parts))
+
+
+# -----------------------------------------------------------------------------
+# Exported Functions
+# -----------------------------------------------------------------------------
+def get_sort_key(text):
+    """Get the sort key of a version string.
+
+    Args:
+        text (str): The version string.
+
+    Returns:
+        tuple: The sort key consisting of the release key and the prerelease key.
+    """
+    release, prerelease = _split_version(text)
+    # The list comprehensions are faster than the generator expressions.
+    # pylint: disable=R1728
+    release_key = tuple([(1, int(part)) if part.isdigit() else (0, part)
+                         for part in release.split('.')])
+
+    if not prerelease:
+        return release_key, (1,)
+
+    prerelease_key = tuple([(0, int(part)) if part.isdigit() else (1, part)
+                            for part in prerelease.split('.')])
+    return release_key, (0, prerelease_key)
+
+
+def sort_versions(versions, reverse = False):
+    """Sort the version strings by their semantic version order.
+
+    Args:
+        versions (iterable): The version strings.
+        reverse (bool):      If True, the latest version is the first one.
+
+    Returns:
+        list: The sorted version strings.
+    """
+    return sorted(versions, key = get_sort_key, reverse = reverse)
+
+
+# -----------------------------------------------------------------------------
+# Internal Functions
+# -----------------------------------------------------------------------------
+def _split_version(text):
+    """Split the version string into the release and the prerelease.
+
+    The build metadata is removed. The text after the first hyphen is only a
+    prerelease if the release before it is a numeric triple like ``1.2.3``.
+
+    Args:
+        text (str): The version string.
+
+    Returns:
+        tuple: The release and the prerelease string that is empty if the
+        version is not a prerelease.
+    """
+    version = text.partition('+')[0]
+    release, _, prerelease = version.partition('-')
+    parts = release.split('.')
+    if prerelease and len(parts) == 3 and all(part.isdigit() for part in parts):
+        return release, prerelease
+    return version, ''
+
+
+# -----------------------------------------------------------------------------
+# EOF
+# -----------------------------------------------------------------------------